@@ -2,15 +2,47 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import csv
+import os
 import numpy as np
+from simulator.results_store import ResultsStore
 
+# Directorio del almacén de resultados, si el barrido lo usó
+RESULTS_PATH = "simulation_results"
+
+
+def nearest_days(recorded_days, target_days: list[int]) -> list[int]:
+    """
+    Returns the recorded day nearest to each target day, without repetitions.
+    """
+    recorded_days = np.sort(np.asarray(recorded_days))
+    if len(recorded_days) == 0:
+        return []
+    positions = np.searchsorted(recorded_days, target_days).clip(
+        1, len(recorded_days) - 1
+    )
+    if len(recorded_days) == 1:
+        return recorded_days.tolist()
+    before = recorded_days[positions - 1]
+    after = recorded_days[positions]
+    nearest = np.where(
+        np.abs(np.asarray(target_days) - before)
+        <= np.abs(after - np.asarray(target_days)),
+        before,
+        after,
+    )
+    return sorted(set(nearest.tolist()))
 
-def main():
-    # 1. Cargar el archivo CSV
-    df = pd.read_csv("simulation_summary.csv")
 
-    # 2. Definir los días de interés
-    record_days = [0, 180, 365, 540, 730]
+def main():
+    # 1. Cargar los resultados, del almacén por columnas si existe o del CSV
+    if os.path.isdir(RESULTS_PATH):
+        df = ResultsStore(RESULTS_PATH).to_pandas()
+    else:
+        df = pd.read_csv("simulation_summary.csv")
+
+    # 2. Definir los días de interés, tomando el día registrado más cercano
+    # a cada uno, ya que la simulación solo guarda los días de su calendario
+    record_days = nearest_days(df["day"].unique(), [0, 180, 365, 540, 730])
 
     # 3. Filtrar los datos para los días de interés
     df_filtered = df[df["day"].isin(record_days)]
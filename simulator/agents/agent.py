@@ -3,14 +3,20 @@ This module contains the abstract class Agent and the basic implementation of it
 """
 
 from abc import ABC, abstractmethod
-import random
-from numpy.random import poisson
+from collections import deque
+import math
+import time
 import numpy as np
 
 from enviroment_info import EnviromentInfo, Event
+from random_streams import RandomStream, default_stream
 from utils import Action
 from event_generator import EventInfo
-from utils import group_prisioners_game
+from utils import joining_payoffs
+
+# Código de cada acción sin pasar por Enum.value, y la acción de cada código
+ACTION_CODES: dict[Action, int] = {action: action.value for action in Action}
+ACTIONS: tuple[Action, ...] = tuple(Action)
 
 
 class Agent(ABC):
@@ -19,6 +25,49 @@ class Agent(ABC):
     """
 
     agent_id: int
+    external_id: int
+    rng: RandomStream = default_stream
+
+    def set_rng(self, rng: RandomStream) -> None:
+        """
+        Sets the random stream used by the agent for its decisions.
+        """
+        self.rng = rng
+
+    def batch_key(self):
+        """
+        Returns a hashable key shared by the agents of the class that
+        decide_batch can decide together, or None if the agent has to decide
+        on its own.
+        """
+        return None
+
+    @classmethod
+    def decide_batch(
+        cls,
+        agents: list["Agent"],
+        enviroment_info: EnviromentInfo,
+        event_infos: list[EventInfo],
+    ) -> list[Action]:
+        """
+        Decides the actions of several agents of the class, each one with the
+        EventInfo of its group. Classes that can decide many agents at once
+        override it.
+        """
+        return [
+            agent.active_action(enviroment_info, event_info)
+            for agent, event_info in zip(agents, event_infos)
+        ]
+
+    def remap_beliefs(self, mapping: dict[int, int]) -> None:
+        """
+        Renames the agents the agent knows about after the ids of the
+        environment are compacted. Agents missing from mapping are dead and
+        are forgotten.
+
+        Args:
+            mapping (dict[int, int]): The new id of every alive agent by its old id.
+        """
 
     @abstractmethod
     def passive_action(
@@ -55,41 +104,164 @@ class Agent(ABC):
 
 
 class Desire(ABC):
+    """
+    Strategy that proposes an action to a BDIAgent given its beliefs.
+
+    Attributes:
+        shared (bool): Whether a single instance can serve every agent. The
+            desires that draw random numbers are built for each agent, with
+            the random stream of the agent.
+    """
+
+    shared: bool = True
+
+    def __init__(self, rng: RandomStream | None = None):
+        self.rng: RandomStream = rng or default_stream
+
     @abstractmethod
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
         pass
 
+    def decide_batch(
+        self, beliefs: list[dict], event_infos: list[EventInfo]
+    ) -> list[Action]:
+        """
+        Decides for several agents, each one with the EventInfo of its group.
+        Desires that can share work between the agents override it.
+        """
+        return [
+            self.decide(belive, event_info)
+            for belive, event_info in zip(beliefs, event_infos)
+        ]
+
+
+# Desires by name, and the instance shared by every agent of the shared ones
+DESIRES: dict[str, type[Desire]] = {}
+_SHARED_DESIRES: dict[str, Desire] = {}
+
+
+def register_desire(desire: type[Desire]) -> type[Desire]:
+    """
+    Class decorator that makes a desire available to the BDIAgents by the
+    name of its class.
+    """
+    DESIRES[desire.__name__] = desire
+    if desire.shared:
+        _SHARED_DESIRES[desire.__name__] = desire()
+    return desire
 
+
+def get_desire(name: str, rng: RandomStream | None = None) -> Desire:
+    """
+    Returns the shared instance of the desire, or a new one using rng if the
+    desire is not shared.
+    """
+    if name not in DESIRES:
+        raise ValueError(f"Unknown desire: {name}")
+    if name in _SHARED_DESIRES:
+        return _SHARED_DESIRES[name]
+    return DESIRES[name](rng=rng)
+
+
+@register_desire
 class Random(Desire):
+    shared: bool = False
+
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
-        return random.choice(list(Action))
+        return self.rng.choice(list(Action))
 
 
+@register_desire
 class Pusilanime(Desire):
 
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
         return Action.COOP
 
+    def decide_batch(
+        self, beliefs: list[dict], event_infos: list[EventInfo]
+    ) -> list[Action]:
+        return [Action.COOP] * len(beliefs)
+
 
+@register_desire
 class Thief(Desire):
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
         return Action.EXPLOIT
 
+    def decide_batch(
+        self, beliefs: list[dict], event_infos: list[EventInfo]
+    ) -> list[Action]:
+        return [Action.EXPLOIT] * len(beliefs)
 
+
+def last_actions_count(belive: dict, group: list[int]) -> tuple[int, int, int]:
+    """
+    Counts the last action seen of each agent of the group as (coop, exploit,
+    inact). The agents never seen count as cooperators.
+    """
+    coop_actions = 0
+    exploit_actions = 0
+    inact_actions = 0
+    global_actions: dict = belive["global_actions"]
+    for agent in group:
+        if agent not in global_actions:
+            coop_actions += 1
+        elif global_actions[agent][-1] == Action.COOP:
+            coop_actions += 1
+        elif global_actions[agent][-1] == Action.EXPLOIT:
+            exploit_actions += 1
+        else:
+            inact_actions += 1
+    return coop_actions, exploit_actions, inact_actions
+
+
+def group_owners(event_infos: list[EventInfo]) -> np.ndarray:
+    """
+    Returns, for every member of the groups of event_infos flattened in
+    order, the position in event_infos of the group it belongs to.
+    """
+    sizes = np.fromiter((len(info.group) for info in event_infos), np.int64)
+    return np.repeat(np.arange(len(event_infos)), sizes)
+
+
+def last_actions_counts(
+    beliefs: list[dict], event_infos: list[EventInfo]
+) -> np.ndarray:
+    """
+    Returns last_actions_count of every belive for the group of its
+    EventInfo as a row of an array. The last actions of all the groups are
+    read in one pass and counted with a single bincount.
+    """
+    owners = group_owners(event_infos)
+    codes = np.fromiter(
+        (
+            ACTION_CODES[global_actions[agent][-1]] if agent in global_actions else 0
+            for global_actions, event_info in zip(
+                [belive["global_actions"] for belive in beliefs], event_infos
+            )
+            for agent in event_info.group
+        ),
+        np.int64,
+        len(owners),
+    )
+    return np.bincount(owners * 3 + codes, minlength=3 * len(beliefs)).reshape(-1, 3)
+
+
+@register_desire
 class TipForTap(Desire):
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
-        coop_actions = 0
-        exploit_actions = 0
-        inact_actions = 0
-        for agent in event_info.group:
-            if agent not in belive["global_actions"]:
-                coop_actions += 1
-            elif belive["global_actions"][agent][-1] == Action.COOP:
-                coop_actions += 1
-            elif belive["global_actions"][agent][-1] == Action.EXPLOIT:
-                exploit_actions += 1
-            else:
-                inact_actions += 1
+        return self.choose(*last_actions_count(belive, event_info.group))
+
+    def decide_batch(
+        self, beliefs: list[dict], event_infos: list[EventInfo]
+    ) -> list[Action]:
+        counts = last_actions_counts(beliefs, event_infos)
+        codes = self.choose_codes(counts[:, 0], counts[:, 1], counts[:, 2])
+        return [ACTIONS[code] for code in codes.tolist()]
+
+    def choose(
+        self, coop_actions: int, exploit_actions: int, inact_actions: int
+    ) -> Action:
         if coop_actions > exploit_actions and coop_actions > inact_actions:
             return Action.COOP
         elif exploit_actions > inact_actions:
@@ -97,27 +269,50 @@ class TipForTap(Desire):
         else:
             return Action.INACT
 
+    def choose_codes(
+        self,
+        coop_actions: np.ndarray,
+        exploit_actions: np.ndarray,
+        inact_actions: np.ndarray,
+    ) -> np.ndarray:
+        """
+        choose for arrays of counts, returning the code of each action.
+        """
+        return np.where(
+            (coop_actions > exploit_actions) & (coop_actions > inact_actions),
+            ACTION_CODES[Action.COOP],
+            np.where(
+                exploit_actions > inact_actions,
+                ACTION_CODES[Action.EXPLOIT],
+                ACTION_CODES[Action.INACT],
+            ),
+        )
+
 
-class TipForTapSecure(Desire):
-    def decide(self, belive: dict, event_info: EventInfo) -> Action:
-        coop_actions = 0
-        exploit_actions = 0
-        inact_actions = 0
-        for agent in event_info.group:
-            if agent not in belive["global_actions"]:
-                coop_actions += 1
-            elif belive["global_actions"][agent][-1] == Action.COOP:
-                coop_actions += 1
-            elif belive["global_actions"][agent][-1] == Action.EXPLOIT:
-                exploit_actions += 1
-            else:
-                inact_actions += 1
+@register_desire
+class TipForTapSecure(TipForTap):
+    def choose(
+        self, coop_actions: int, exploit_actions: int, inact_actions: int
+    ) -> Action:
         if coop_actions > exploit_actions and coop_actions > inact_actions:
             return Action.COOP
         else:
             return Action.INACT
 
+    def choose_codes(
+        self,
+        coop_actions: np.ndarray,
+        exploit_actions: np.ndarray,
+        inact_actions: np.ndarray,
+    ) -> np.ndarray:
+        return np.where(
+            (coop_actions > exploit_actions) & (coop_actions > inact_actions),
+            ACTION_CODES[Action.COOP],
+            ACTION_CODES[Action.INACT],
+        )
+
 
+@register_desire
 class ABR(Desire):
 
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
@@ -135,13 +330,66 @@ class ABR(Desire):
             return Action.COOP
         return Action.INACT
 
+    def decide_batch(
+        self, beliefs: list[dict], event_infos: list[EventInfo]
+    ) -> list[Action]:
+        owners = group_owners(event_infos)
+        trust = np.fromiter(
+            (
+                trusts.get(agent, 50)
+                for trusts, event_info in zip(
+                    [belive["trust"] for belive in beliefs], event_infos
+                )
+                for agent in event_info.group
+            ),
+            np.int64,
+            len(owners),
+        )
+        sizes = np.bincount(owners, minlength=len(beliefs))
+        totals = np.bincount(owners, weights=trust, minlength=len(beliefs))
+        # Media > 55 sin dividir, los grupos vacíos quedan inactivos
+        return [
+            Action.COOP if trusted else Action.INACT
+            for trusted in (totals > 55 * sizes).tolist()
+        ]
+
 
+@register_desire
 class Search(Desire):
+    """
+    Looks ahead over the next days simulating the group the agent could play
+    with and chooses the action that maximizes its final resources.
+
+    Every branch of the tree samples its own group and event, in the same
+    order as the original recursive search, so a seed gives the same
+    decisions. What the search no longer does is copy the trust of the agent
+    and the alive agents at every node: the reputations changed along a path
+    are kept in a small overlay over the trust, the group is drawn with one
+    sample of the alive agents instead of shuffling a copy of them, and the
+    payoffs of the three actions come from a single count of the group.
+
+    Attributes:
+        depth (int): Number of days looked ahead.
+        time_budget (float | None): Seconds a decision may take. When it runs
+            out, the unexplored nodes are evaluated as leaves.
+    """
+
+    shared: bool = False
+
+    def __init__(
+        self,
+        depth: int = 5,
+        time_budget: float | None = None,
+        rng: RandomStream | None = None,
+    ):
+        super().__init__(rng)
+        self.depth: int = depth
+        self.time_budget: float | None = time_budget
 
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
         return self.best_play(
             belive["resources"],
-            0 if len(belive["agents_alive"]) == 0 else 5,
+            0 if len(belive["agents_alive"]) == 0 else self.depth,
             belive["trust"],
             belive["agents_alive"],
         )[1]
@@ -153,58 +401,67 @@ class Search(Desire):
         reputation: dict[int, int],
         agents_alive: list[int],
     ) -> tuple[int, Action]:
-        if deep == 0:
-            return resources, Action.COOP
-
-        copy_reputation: dict[int, int] = reputation.copy()
-        copy_agents_alive: list[int] = agents_alive.copy()
-        group: list[int] = self.select_group(copy_agents_alive)
+        deadline: float | None = (
+            None if self.time_budget is None else time.perf_counter() + self.time_budget
+        )
+        gain, action = self.expand(deep, reputation, {}, agents_alive, deadline)
+        return resources + gain, action
 
-        desitions = []
-        for agent in group:
-            if agent not in copy_reputation:
+    def expand(
+        self,
+        deep: int,
+        reputation: dict[int, int],
+        changed_reputation: dict[int, int],
+        agents_alive: list[int],
+        deadline: float | None,
+    ) -> tuple[int, Action]:
+        """
+        Returns the best resources gain of the next deep days and the action
+        that achieves it. changed_reputation holds the reputations changed
+        by the groups sampled above this node, it is copied and not modified.
+        """
+        if deep == 0 or (deadline is not None and time.perf_counter() > deadline):
+            return 0, Action.COOP
+
+        changed_reputation = changed_reputation.copy()
+        desitions: list[Action] = []
+        for agent in self.select_group(agents_alive):
+            agent_reputation = changed_reputation.get(agent, reputation.get(agent))
+            if agent_reputation is None:
                 desitions.append(Action.COOP)
-                copy_reputation[agent] = 50
-            elif copy_reputation[agent] > 55:
+                changed_reputation[agent] = 50
+            elif agent_reputation > 55:
                 desitions.append(Action.COOP)
-                copy_reputation[agent] += 10
-            elif copy_reputation[agent] < 40:
+                changed_reputation[agent] = agent_reputation + 10
+            elif agent_reputation < 40:
                 desitions.append(Action.EXPLOIT)
-                copy_reputation[agent] -= 30
+                changed_reputation[agent] = agent_reputation - 30
             else:
                 desitions.append(Action.INACT)
-                copy_reputation[agent] += 3
+                changed_reputation[agent] = agent_reputation + 3
 
-        event_resources: int = random.randint(-100, 300) * len(desitions)
+        event_resources: int = self.rng.randint(-100, 300) * len(desitions)
+        payoffs: list = joining_payoffs(desitions, event_resources)
 
-        # COOP
-        desitions.append(Action.COOP)
-        my_coop_resources = (
-            resources + group_prisioners_game(desitions, event_resources)[-1]
+        # Cada rama muestrea su propio futuro, en el orden COOP, INACT, EXPLOIT
+        coop_reosurce = (
+            payoffs[Action.COOP.value]
+            + self.expand(
+                deep - 1, reputation, changed_reputation, agents_alive, deadline
+            )[0]
         )
-        coop_reosurce: int = self.best_play(
-            my_coop_resources, deep - 1, copy_reputation, copy_agents_alive
-        )[0]
-        desitions.pop()
-
-        # INACT
-        desitions.append(Action.INACT)
-        my_inact_resources = (
-            resources + group_prisioners_game(desitions, event_resources)[-1]
+        inact_reosurce = (
+            payoffs[Action.INACT.value]
+            + self.expand(
+                deep - 1, reputation, changed_reputation, agents_alive, deadline
+            )[0]
         )
-        inact_reosurce: int = self.best_play(
-            my_inact_resources, deep - 1, copy_reputation, copy_agents_alive
-        )[0]
-        desitions.pop()
-        # EXPLOIT
-        desitions.append(Action.EXPLOIT)
-        my_exploit_resources = (
-            resources + group_prisioners_game(desitions, event_resources)[-1]
+        exploit_reosurce = (
+            payoffs[Action.EXPLOIT.value]
+            + self.expand(
+                deep - 1, reputation, changed_reputation, agents_alive, deadline
+            )[0]
         )
-        exploit_reosurce: int = self.best_play(
-            my_exploit_resources, deep - 1, copy_reputation, copy_agents_alive
-        )[0]
-        desitions.pop()
 
         if coop_reosurce > inact_reosurce and coop_reosurce > exploit_reosurce:
             return coop_reosurce, Action.COOP
@@ -214,14 +471,13 @@ class Search(Desire):
             return exploit_reosurce, Action.EXPLOIT
 
     def select_group(self, agents_alive: list[int]) -> list[int]:
-        agents: list[int] = agents_alive.copy()
-        random.shuffle(agents)
-        rand: int = poisson(lam=5)
-        start: int = random.randint(0, len(agents))
-        end: int = min(start + rand, len(agents))
-        return agents[start:end]
+        rand: int = self.rng.poisson(5)
+        start: int = self.rng.randint(0, len(agents_alive))
+        end: int = min(start + rand, len(agents_alive))
+        return self.rng.sample(agents_alive, end - start)
 
 
+@register_desire
 class Resentful(Desire):
 
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
@@ -230,35 +486,108 @@ class Resentful(Desire):
                 return Action.INACT
         return Action.COOP
 
+    def decide_batch(
+        self, beliefs: list[dict], event_infos: list[EventInfo]
+    ) -> list[Action]:
+        owners = group_owners(event_infos)
+        betrayed = np.fromiter(
+            (
+                agent in betrayers
+                for betrayers, event_info in zip(
+                    [belive["betrayers"] for belive in beliefs], event_infos
+                )
+                for agent in event_info.group
+            ),
+            bool,
+            len(owners),
+        )
+        betrayers = np.bincount(owners, weights=betrayed, minlength=len(beliefs))
+        return [Action.INACT if count else Action.COOP for count in betrayers.tolist()]
+
 
+@register_desire
 class Explote(Desire):
 
     def decide(self, belive: dict, event_info: EventInfo) -> Action:
-        return max(
-            belive["best_action"], key=lambda x: np.mean(belive["best_action"].get(x))
-        )
+        return max(belive["best_action"], key=lambda x: belive["best_action"][x].mean())
+
+
+class RunningMean:
+    """
+    Mean of a stream of values kept as a running sum and count, so it uses
+    constant memory and is read in O(1). The mean of no values is nan, as
+    np.mean of an empty list.
+    """
+
+    __slots__ = ("total", "count")
+
+    def __init__(self):
+        self.total: float = 0
+        self.count: int = 0
+
+    def add(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
 
 
 # Jugador que juegue random o juega la jugada que le ha hecho ganar más puntos en el pasado
 
 
 class BDIAgent(Agent):
-    def __init__(self, agent_id: int, desires: dict):
+    """
+    Agent that chooses its actions by weighting the actions proposed by its
+    desires given its beliefs.
+
+    The beliefs use bounded memory: only the last history_length actions of
+    each agent are kept, the rewards of each action are kept as a running
+    mean and the alive agents are the read-only view of the environment,
+    shared instead of copied.
+
+    The desires are resolved through the DESIRES registry when the agent is
+    built, so a decision only walks the strategies tuple. The agents with the
+    same shared strategies can be decided together with decide_batch.
+
+    Attributes:
+        history_length (int): Number of actions remembered of each agent.
+        desires (dict[str, int]): Weight of each desire by name.
+        strategies (tuple[tuple[Desire, int], ...]): Resolved desires and weights.
+    """
+
+    history_length: int = 10
+
+    def __init__(
+        self,
+        agent_id: int,
+        desires: dict,
+        rng: RandomStream | None = None,
+        history_length: int | None = None,
+        desire_instances: dict[str, Desire] | None = None,
+    ):
+        if history_length is not None:
+            self.history_length = history_length
         self.agent_id: int = agent_id
+        self.external_id: int = agent_id
+        self.rng: RandomStream = rng or default_stream
         self.beliefs = {
             "trust": {},  # Confianza en otros agentes
             "resources": 0,  # Recursos actuales
             "day": 0,  # Día actual
             "betrayers": set(),  # Agentes que han traicionado
             "best_action": {
-                Action.COOP: [],
-                Action.EXPLOIT: [],
-                Action.INACT: [],
+                Action.COOP: RunningMean(),
+                Action.EXPLOIT: RunningMean(),
+                Action.INACT: RunningMean(),
             },  # Acción que más recursos aportó
             "global_actions": {},  # Acción que más recursos aportó
             "agents_alive": [],
         }
         self.desires: dict[str, int] = desires  # Lista de deseos (objetivos)
+        # Instancias propias de los deseos que no se comparten
+        self.own_desires: dict[str, Desire] = desire_instances or {}
+        self.resolve_desires()
         self.intentions: dict[Action, int] = {
             Action.COOP: 0,
             Action.EXPLOIT: 0,
@@ -288,59 +617,113 @@ class BDIAgent(Agent):
                     self.beliefs["trust"][agent_id] = min(
                         self.beliefs["trust"][agent_id] + 3, 100
                     )
-                if self.agent_id not in self.beliefs["global_actions"]:
-
-                    self.beliefs["global_actions"][agent_id] = [desitions]
-                else:
-                    self.beliefs["global_actions"][agent_id].append(desitions)
+                if agent_id not in self.beliefs["global_actions"]:
+                    self.beliefs["global_actions"][agent_id] = deque(
+                        maxlen=self.history_length
+                    )
+                self.beliefs["global_actions"][agent_id].append(desitions)
 
-        self.beliefs["agents_alive"] = enviroment_info.agents_alive.copy()
+        # The view of the environment is read-only and is rebuilt when the
+        # population changes, so it can be kept without copying it
+        self.beliefs["agents_alive"] = enviroment_info.agents_alive
 
-        # if self.agent_id not in self.beliefs["best_action"]:
-        #     self.beliefs["best_action"][visible_desitions[self.agent_id]] = [
-        #         enviroment_info.public_resources[self.agent_id]
-        #         - self.beliefs["resources"]
-        #     ]
-        # else:
-        #     self.beliefs["best_action"][visible_desitions[self.agent_id]].append(
-        #         enviroment_info.public_resources[self.agent_id]
-        #         - self.beliefs["resources"]
-        #     )
+        # self.beliefs["best_action"][visible_desitions[self.agent_id]].add(
+        #     enviroment_info.public_resources[self.agent_id]
+        #     - self.beliefs["resources"]
+        # )
 
         self.beliefs["resources"] = enviroment_info.public_resources[self.agent_id]
 
+    def resolve_desires(self) -> None:
+        """
+        Resolves the desires of the agent to their strategies. It has to be
+        called again if the desires change.
+        """
+        strategies: list[tuple[Desire, int]] = []
+        for name, weight in self.desires.items():
+            desire: Desire = self.own_desires.get(name) or get_desire(name, self.rng)
+            if not desire.shared:
+                self.own_desires[name] = desire
+            strategies.append((desire, weight))
+        self.strategies: tuple[tuple[Desire, int], ...] = tuple(strategies)
+
     def decide_action_based_on_beliefs_and_desires(self, event_info: EventInfo):
         intentions: dict[Action, int] = {
             Action.COOP: 0,
             Action.EXPLOIT: 0,
             Action.INACT: 0,
         }
-        for desire, weights in self.desires.items():
-            if desire == "Pusilanime":
-                intentions[Pusilanime().decide(self.beliefs, event_info)] += weights
-            elif desire == "Thief":
-                intentions[Thief().decide(self.beliefs, event_info)] += weights
-            elif desire == "TipForTap":
-                intentions[TipForTap().decide(self.beliefs, event_info)] += weights
-            elif desire == "TipForTapSecure":
-                intentions[
-                    TipForTapSecure().decide(self.beliefs, event_info)
-                ] += weights
-            elif desire == "Random":
-                intentions[Random().decide(self.beliefs, event_info)] += weights
-            elif desire == "ABR":
-                intentions[ABR().decide(self.beliefs, event_info)] += weights
-            elif desire == "Search":
-                intentions[Search().decide(self.beliefs, event_info)] += weights
-            elif desire == "Resentful":
-                intentions[Resentful().decide(self.beliefs, event_info)] += weights
-            elif desire == "Explote":
-                intentions[Explote().decide(self.beliefs, event_info)] += weights
+        for desire, weight in self.strategies:
+            intentions[desire.decide(self.beliefs, event_info)] += weight
         return max(intentions, key=intentions.get)
 
+    def batch_key(self):
+        # Only the agents whose desires are all shared, and so do not draw
+        # random numbers, are decided in batch
+        if self.own_desires:
+            return None
+        return self.strategies
+
+    @classmethod
+    def decide_batch(
+        cls,
+        agents: list["BDIAgent"],
+        enviroment_info: EnviromentInfo,
+        event_infos: list[EventInfo],
+    ) -> list[Action]:
+        strategies: tuple[tuple[Desire, int], ...] = agents[0].strategies
+        beliefs: list[dict] = [agent.beliefs for agent in agents]
+        for belive in beliefs:
+            belive["agents_alive"] = enviroment_info.agents_alive
+        if len(strategies) == 1 and strategies[0][1] > 0:
+            return strategies[0][0].decide_batch(beliefs, event_infos)
+
+        # Una fila de intenciones por agente, con las columnas en el orden de
+        # Action para que argmax desempate como max sobre el diccionario. Los
+        # pesos pueden ser reales, como los que deja DesireMutation
+        intentions = np.zeros((len(agents), len(ACTIONS)), dtype=float)
+        rows = np.arange(len(agents))
+        for desire, weight in strategies:
+            codes = np.fromiter(
+                (
+                    ACTION_CODES[action]
+                    for action in desire.decide_batch(beliefs, event_infos)
+                ),
+                np.int64,
+                len(agents),
+            )
+            intentions[rows, codes] += weight
+        return [ACTIONS[code] for code in intentions.argmax(axis=1).tolist()]
+
+    def set_rng(self, rng: RandomStream) -> None:
+        self.rng = rng
+        for desire in self.own_desires.values():
+            desire.rng = rng
+
+    def remap_beliefs(self, mapping: dict[int, int]) -> None:
+        beliefs = self.beliefs
+        beliefs["trust"] = {
+            mapping[agent]: trust
+            for agent, trust in beliefs["trust"].items()
+            if agent in mapping
+        }
+        beliefs["betrayers"] = {
+            mapping[agent] for agent in beliefs["betrayers"] if agent in mapping
+        }
+        beliefs["global_actions"] = {
+            mapping[agent]: actions
+            for agent, actions in beliefs["global_actions"].items()
+            if agent in mapping
+        }
+        # agents_alive no se renombra: se vuelve a leer del entorno antes de
+        # cada decisión
+
     def active_action(
         self, enviroment_info: EnviromentInfo, event_info: EventInfo
     ) -> Action:
+        # Las creencias solo guardan agentes vivos, así que la población se
+        # lee del entorno del día y no de la última acción pasiva
+        self.beliefs["agents_alive"] = enviroment_info.agents_alive
         action: Action = self.decide_action_based_on_beliefs_and_desires(event_info)
 
         return action
@@ -352,45 +735,56 @@ class BDIAgent(Agent):
 
 
 class PusilanimeAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"Pusilanime": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"Pusilanime": 1}, rng)
 
 
 class ThiefAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"Thief": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"Thief": 1}, rng)
 
 
 class RandomAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"Random": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"Random": 1}, rng)
 
 
 class TipForTapAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"TipForTap": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"TipForTap": 1}, rng)
 
 
 class TipForTapSecureAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"TipForTapSecure": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"TipForTapSecure": 1}, rng)
 
 
 class ExploteAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"Explote": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"Explote": 1}, rng)
 
 
 class ABRAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"ABR": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"ABR": 1}, rng)
 
 
 class SearchAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"Search": 1})
+    def __init__(
+        self,
+        agent_id: int,
+        depth: int = 5,
+        time_budget: float | None = None,
+        rng: RandomStream | None = None,
+    ):
+        super().__init__(
+            agent_id,
+            {"Search": 1},
+            rng,
+            desire_instances={"Search": Search(depth, time_budget, rng)},
+        )
 
 
 class ResentfulAgent(BDIAgent):
-    def __init__(self, agent_id: int):
-        super().__init__(agent_id, {"Resentful": 1})
+    def __init__(self, agent_id: int, rng: RandomStream | None = None):
+        super().__init__(agent_id, {"Resentful": 1}, rng)
@@ -1,11 +1,45 @@
 """
 """
 
-import random
+from bisect import bisect_left
+from collections.abc import MutableMapping
+import heapq
 import numpy as np
 
 from agents.agent import Agent
-from enviroment_info import EnviromentInfo, Event
+from enviroment_info import EnviromentInfo
+from event_log import EventLog
+from random_streams import RandomStream, default_stream
+from trust import TrustMatrix
+from type_totals import TypeTotals
+
+
+class AgentRecord:
+    """
+    What is kept of an agent once it is dead and its id has been compacted.
+
+    Attributes:
+        external_id (int): Stable id of the agent, the one used in the log.
+        agent_type (str): Name of the class of the agent.
+        death_day (int | None): Day the agent died.
+        resources (int): Resources of the agent when it died.
+    """
+
+    __slots__ = ("external_id", "agent_type", "death_day", "resources")
+
+    def __init__(
+        self, external_id: int, agent_type: str, death_day: int | None, resources: int
+    ):
+        self.external_id: int = external_id
+        self.agent_type: str = agent_type
+        self.death_day: int | None = death_day
+        self.resources: int = resources
+
+    def __str__(self) -> str:
+        return self.agent_type
+
+    def __repr__(self) -> str:
+        return str(self)
 
 
 class Enviroment:
@@ -16,8 +50,12 @@ class Enviroment:
         agents (list[Agent]): A list of Agent objects representing the agents in the environment.
         agents_alive (list[int]): A list of indices representing the indices of alive agents.
         day (int): An integer representing the current day of the simulation.
-        log (dict): A dictionary containing the log of events in the environment.
+        log (EventLog): The log of events in the environment, keeping the last log_days days when given.
         public_resources (list[int]): A list of integers representing the available public resources.
+        trust_matrix (TrustMatrix): The trust of every agent in every other agent.
+        archive (dict[int, AgentRecord]): The compacted dead agents by external id.
+        type_totals (TypeTotals): Alive agents and their resources per agent type.
+        agent_types (list[int]): Index in type_totals of the type of each agent.
 
     Methods:
         get_enviroment_from(agent: int) -> EnviromentInfo:
@@ -26,6 +64,28 @@ class Enviroment:
         next_day() -> None:
             Advances the simulation to the next day.
 
+        apply_resources(resources: dict[int, int]) -> None:
+            Adds the resources won or lost in the day's event to each agent.
+
+        apply_daily_upkeep() -> None:
+            Subtracts lost_per_day from every alive agent.
+
+        cull_overpopulation(max_population: int) -> None:
+            Zeroes the resources of the poorest agents above max_population.
+
+        remove_dead(max_population: int | None = None) -> None:
+            Drops the agents without resources from agents_alive, culling the
+            overpopulation first when max_population is given.
+
+        add_agents(new_agents: list[Agent], resources: list[int]) -> None:
+            Adds newborn agents with their starting resources.
+
+        compact() -> dict[int, int]:
+            Archives the dead agents and renumbers the alive ones to dense ids.
+
+        find_agent(external_id: int) -> Agent | AgentRecord:
+            Returns the agent, alive or archived, with the given external id.
+
         __str__() -> str:
             Returns a string representation of the Enviroment object.
 
@@ -33,36 +93,423 @@ class Enviroment:
             Returns a string representation of the Enviroment object.
     """
 
-    def __init__(self, agents: list[Agent], lost_per_day: int):
+    def __init__(
+        self,
+        agents: list[Agent],
+        lost_per_day: int,
+        rng: RandomStream | None = None,
+        log_days: int | None = None,
+    ):
+        self.rng: RandomStream = rng or default_stream
         self.agents: list[Agent] = agents
         self.agents_alive: list[int] = list(range(len(agents)))
         self.day = 0
-        self.log: dict[Event, dict] = {}
+        self.log: EventLog = EventLog(log_days)
         self.lost_per_day = lost_per_day
         self.public_resources: list[int] = [
-            random.randint(300, 600) for x in range(len(agents))
+            self.rng.randint(300, 600) for x in range(len(agents))
         ]
         self.global_reputation: dict[Agent:int] = {}
-        self.trust_matrix: list[list[int]] = [
-            [50 for j in range(len(agents))] for i in range(len(agents))
-        ]
+        self.trust_matrix: TrustMatrix = TrustMatrix(len(agents))
         self.generation = 1
+        self._snapshot: EnviromentInfo | None = None
+        self._init_external_ids()
+        self.type_totals: TypeTotals = TypeTotals()
+        self.agent_types: list[int] = self._type_indices(agents)
+        self.type_totals.add_agents(self.agent_types, self.public_resources)
+
+    def _type_indices(self, agents: list[Agent]) -> list[int]:
+        return [self.type_totals.type_index(type(agent).__name__) for agent in agents]
+
+    def _init_external_ids(self) -> None:
+        # Agent ids are compacted from time to time, the external ids never change
+        for agent_id, agent in enumerate(self.agents):
+            agent.external_id = agent_id
+        self.external_ids: list[int] = list(range(len(self.agents)))
+        self.next_external_id: int = len(self.agents)
+        self.archive: dict[int, AgentRecord] = {}
+        self.death_days: dict[int, int] = {}
 
     def get_enviroment_from(self, agent: int) -> EnviromentInfo:
-        return EnviromentInfo(
-            self.day,
-            self.lost_per_day,
-            self.public_resources,
-            self.agents_alive,
-            self.trust_matrix,
-            self.global_reputation,
-        )
+        # The snapshot is a read-only view shared by every agent until the
+        # day changes or the population is rebuilt, so it is never copied.
+        if self._snapshot is None:
+            self._snapshot = EnviromentInfo(
+                self.day,
+                self.lost_per_day,
+                self.public_resources,
+                self.agents_alive,
+                self.trust_matrix,
+                self.global_reputation,
+            )
+        return self._snapshot
 
     def next_day(self) -> None:
         self.day += 1
+        self._snapshot = None
+
+    def apply_resources(self, resources: dict[int, int]) -> None:
+        for agent, resource in resources.items():
+            self.public_resources[agent] += resource
+        self.type_totals.add_resources(
+            [self.agent_types[agent] for agent in resources], list(resources.values())
+        )
+
+    def apply_daily_upkeep(self) -> None:
+        for agent in self.agents_alive:
+            self.public_resources[agent] -= self.lost_per_day
+        self.type_totals.add_to_all(-self.lost_per_day)
+
+    def cull_overpopulation(self, max_population: int) -> None:
+        # Eliminar los n agentes con menos recursos
+        poorest: list[int] = self.poorest_agents(max_population)
+        self.type_totals.add_resources(
+            [self.agent_types[agent] for agent in poorest],
+            [-self.public_resources[agent] for agent in poorest],
+        )
+        for agent in poorest:
+            self.public_resources[agent] = 0
+
+    def poorest_agents(self, max_population: int) -> list[int]:
+        """
+        Returns the alive agents above max_population with the least
+        resources. Ties are broken by the order of agents_alive, as a stable
+        sort would.
+        """
+        overpopulation: int = len(self.agents_alive) - max_population
+        if overpopulation <= 0:
+            return []
+        # nsmallest is O(N log k) and returns the same as sorted()[:k]
+        return heapq.nsmallest(
+            overpopulation, self.agents_alive, key=self.public_resources.__getitem__
+        )
+
+    def remove_dead(self, max_population: int | None = None) -> None:
+        culled: set[int] = (
+            set(self.poorest_agents(max_population))
+            if max_population is not None
+            else set()
+        )
+        alive: list[int] = []
+        dead: list[int] = []
+        dead_resources: list[int] = []
+        for agent in self.agents_alive:
+            resources = self.public_resources[agent]
+            if agent in culled:
+                self.public_resources[agent] = 0
+            if self.public_resources[agent] > 0:
+                alive.append(agent)
+            else:
+                dead.append(agent)
+                dead_resources.append(resources)
+        self.agents_alive = alive
+        self.type_totals.remove_agents(
+            [self.agent_types[agent] for agent in dead], dead_resources
+        )
+        self.trust_matrix.release(dead)
+        for agent in dead:
+            self.death_days[agent] = self.day
+        self._snapshot = None
+
+    def add_agents(self, new_agents: list[Agent], resources: list[int]) -> None:
+        new_agents_count: int = len(new_agents)
+        first_id: int = len(self.agents)
+
+        # agents_alive is rebuilt instead of extended, since the snapshots
+        # handed to the agents are views of it
+        self.agents_alive = self.agents_alive + list(
+            range(first_id, first_id + new_agents_count)
+        )
+        self.public_resources.extend(resources)
+        new_types: list[int] = self._type_indices(new_agents)
+        self.agent_types.extend(new_types)
+        self.type_totals.add_agents(new_types, resources)
+
+        self.trust_matrix.add_agents(new_agents_count)
+
+        self._register_agents(new_agents)
+        self.generation += 1
+        self._snapshot = None
+
+    def _register_agents(self, new_agents: list[Agent]) -> None:
+        for agent in new_agents:
+            agent.external_id = self.next_external_id
+            self.external_ids.append(self.next_external_id)
+            self.next_external_id += 1
+        self.agents.extend(new_agents)
+
+    def compact(self) -> dict[int, int]:
+        """
+        Archives the dead agents and renumbers the alive ones to the dense ids
+        0..len(agents_alive) - 1, keeping their order, so the state of the
+        environment and the beliefs of the agents are proportional to the
+        alive population instead of to every agent ever born.
+
+        Returns:
+            dict[int, int]: The new id of every alive agent by its old id.
+        """
+        alive: list[int] = list(self.agents_alive)
+        mapping: dict[int, int] = {agent: new for new, agent in enumerate(alive)}
+        for agent_id, agent in enumerate(self.agents):
+            if agent_id not in mapping:
+                self.archive[agent.external_id] = AgentRecord(
+                    agent.external_id,
+                    type(agent).__name__,
+                    self.death_days.get(agent_id),
+                    int(self.public_resources[agent_id]),
+                )
+        self.death_days = {}
+
+        self.agents = [self.agents[agent] for agent in alive]
+        for agent_id, agent in enumerate(self.agents):
+            agent.agent_id = agent_id
+            agent.remap_beliefs(mapping)
+        self.external_ids = [agent.external_id for agent in self.agents]
+        self.trust_matrix.compact(alive)
+        self._compact_state(alive, mapping)
+        self._snapshot = None
+        return mapping
+
+    def _compact_state(self, alive: list[int], mapping: dict[int, int]) -> None:
+        self.public_resources = [self.public_resources[agent] for agent in alive]
+        self.agent_types = [self.agent_types[agent] for agent in alive]
+        self.global_reputation = {
+            mapping[agent]: reputation
+            for agent, reputation in self.global_reputation.items()
+            if agent in mapping
+        }
+        self.agents_alive = list(range(len(alive)))
+
+    def find_agent(self, external_id: int) -> "Agent | AgentRecord":
+        # external_ids is sorted, since compacting keeps the order of the agents
+        position: int = bisect_left(self.external_ids, external_id)
+        if (
+            position < len(self.external_ids)
+            and self.external_ids[position] == external_id
+        ):
+            return self.agents[position]
+        return self.archive[external_id]
 
     def __str__(self) -> str:
         return f"Agents: {self.agents}"
 
     def __repr__(self) -> str:
         return str(self)
+
+
+class ReputationArray(MutableMapping):
+    """
+    Dict-like view of the global reputation stored in a NumPy array.
+
+    Agents without a reputation yet are tracked with a boolean mask, so the
+    ``agent in reputation`` checks made by the simulator keep their meaning.
+    """
+
+    def __init__(self, capacity: int):
+        self.values: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self.known: np.ndarray = np.zeros(capacity, dtype=bool)
+
+    def grow(self, capacity: int) -> None:
+        values = np.zeros(capacity, dtype=np.int64)
+        known = np.zeros(capacity, dtype=bool)
+        values[: len(self.values)] = self.values
+        known[: len(self.known)] = self.known
+        self.values, self.known = values, known
+
+    def __contains__(self, agent) -> bool:
+        return 0 <= agent < len(self.known) and bool(self.known[agent])
+
+    def __getitem__(self, agent: int) -> int:
+        if agent not in self:
+            raise KeyError(agent)
+        return int(self.values[agent])
+
+    def __setitem__(self, agent: int, value: int) -> None:
+        self.values[agent] = value
+        self.known[agent] = True
+
+    def __delitem__(self, agent: int) -> None:
+        if agent not in self:
+            raise KeyError(agent)
+        self.known[agent] = False
+
+    def __iter__(self):
+        return iter(np.flatnonzero(self.known).tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.known))
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+
+class ArrayEnviroment(Enviroment):
+    """
+    Enviroment whose population state lives in contiguous NumPy arrays.
+
+    Resources, the alive mask and the reputation are stored in preallocated
+    arrays that double their capacity when agents are born, so the daily
+    upkeep, the death filter and the overpopulation culling run as vectorized
+    operations. ``public_resources`` and ``agents_alive`` are exposed with the
+    same indexing as the list based Enviroment, so the simulator and the
+    agents work with either.
+    """
+
+    def __init__(
+        self,
+        agents: list[Agent],
+        lost_per_day: int,
+        rng: RandomStream | None = None,
+        log_days: int | None = None,
+    ):
+        self.rng: RandomStream = rng or default_stream
+        self.agents: list[Agent] = agents
+        self.day = 0
+        self.log: EventLog = EventLog(log_days)
+        self.lost_per_day = lost_per_day
+        self.generation = 1
+
+        self._size: int = len(agents)
+        capacity: int = max(self._size, 1)
+        self._resources: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self._resources[: self._size] = [
+            self.rng.randint(300, 600) for x in range(self._size)
+        ]
+        self._alive: np.ndarray = np.zeros(capacity, dtype=bool)
+        self._alive[: self._size] = True
+        self.trust_matrix: TrustMatrix = TrustMatrix(self._size)
+        self.global_reputation: ReputationArray = ReputationArray(capacity)
+        self._agents_alive: list[int] | None = None
+        self._snapshot: EnviromentInfo | None = None
+        self._init_external_ids()
+        self.type_totals: TypeTotals = TypeTotals()
+        self._types: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self._types[: self._size] = self._type_indices(agents)
+        self.type_totals.add_agents(self.agent_types, self.public_resources)
+
+    @property
+    def public_resources(self) -> np.ndarray:
+        return self._resources[: self._size]
+
+    @property
+    def agent_types(self) -> np.ndarray:
+        return self._types[: self._size]
+
+    @property
+    def agents_alive(self) -> list[int]:
+        if self._agents_alive is None:
+            self._agents_alive = np.flatnonzero(self._alive[: self._size]).tolist()
+        return self._agents_alive
+
+    @agents_alive.setter
+    def agents_alive(self, agents: list[int]) -> None:
+        self._alive[:] = False
+        self._alive[list(agents)] = True
+        self._agents_alive = None
+        self._snapshot = None
+
+    def apply_resources(self, resources: dict[int, int]) -> None:
+        if not resources:
+            return
+        agents = np.fromiter(resources.keys(), dtype=np.int64, count=len(resources))
+        amounts = np.fromiter(
+            resources.values(), dtype=np.float64, count=len(resources)
+        )
+        self._resources[agents] += amounts.astype(np.int64)
+        self.type_totals.add_resources(self._types[agents], amounts.astype(np.int64))
+
+    def apply_daily_upkeep(self) -> None:
+        self._resources[self._alive] -= self.lost_per_day
+        self.type_totals.add_to_all(-self.lost_per_day)
+
+    def cull_overpopulation(self, max_population: int) -> None:
+        poorest: np.ndarray = self.poorest_agents(max_population)
+        self.type_totals.add_resources(self._types[poorest], -self._resources[poorest])
+        self._resources[poorest] = 0
+
+    def poorest_agents(self, max_population: int) -> np.ndarray:
+        alive: np.ndarray = np.flatnonzero(self._alive[: self._size])
+        overpopulation: int = len(alive) - max_population
+        if overpopulation <= 0:
+            return alive[:0]
+        if overpopulation >= len(alive):
+            return alive
+
+        # argpartition finds the resources of the last culled agent in O(N).
+        # Every poorer agent is culled, and the agents tied with it are culled
+        # in id order, as the stable sort of the list engine does
+        resources: np.ndarray = self._resources[alive]
+        kth = np.argpartition(resources, overpopulation - 1)[overpopulation - 1]
+        threshold = resources[kth]
+        culled: np.ndarray = resources < threshold
+        ties: np.ndarray = np.flatnonzero(resources == threshold)
+        culled[ties[: overpopulation - np.count_nonzero(culled)]] = True
+        return alive[culled]
+
+    def remove_dead(self, max_population: int | None = None) -> None:
+        if max_population is not None:
+            self.cull_overpopulation(max_population)
+        alive: np.ndarray = self._alive[: self._size]
+        dead: np.ndarray = alive & (self._resources[: self._size] <= 0)
+        alive &= ~dead
+        self.type_totals.remove_agents(
+            self._types[: self._size][dead], self._resources[: self._size][dead]
+        )
+        dead_agents: list[int] = np.flatnonzero(dead).tolist()
+        self.trust_matrix.release(dead_agents)
+        for agent in dead_agents:
+            self.death_days[agent] = self.day
+        self._agents_alive = None
+        self._snapshot = None
+
+    def add_agents(self, new_agents: list[Agent], resources: list[int]) -> None:
+        first_id: int = self._size
+        self._reserve(first_id + len(new_agents))
+        self._size += len(new_agents)
+
+        self._resources[first_id : self._size] = resources
+        self._alive[first_id : self._size] = True
+        self._types[first_id : self._size] = self._type_indices(new_agents)
+        self.type_totals.add_agents(self._types[first_id : self._size], resources)
+        self._agents_alive = None
+        self.trust_matrix.add_agents(len(new_agents))
+
+        self._register_agents(new_agents)
+        self.generation += 1
+        self._snapshot = None
+
+    def _compact_state(self, alive: list[int], mapping: dict[int, int]) -> None:
+        alive_ids = np.asarray(alive, dtype=np.int64)
+        self._size = len(alive)
+        capacity: int = max(self._size, 1)
+
+        resources = np.zeros(capacity, dtype=np.int64)
+        resources[: self._size] = self._resources[alive_ids]
+        types = np.zeros(capacity, dtype=np.int64)
+        types[: self._size] = self._types[alive_ids]
+        alive_mask = np.zeros(capacity, dtype=bool)
+        alive_mask[: self._size] = True
+        reputation = ReputationArray(capacity)
+        reputation.values[: self._size] = self.global_reputation.values[alive_ids]
+        reputation.known[: self._size] = self.global_reputation.known[alive_ids]
+
+        self._resources, self._alive, self._types = resources, alive_mask, types
+        self.global_reputation = reputation
+        self._agents_alive = None
+
+    def _reserve(self, size: int) -> None:
+        capacity: int = len(self._resources)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+
+        resources = np.zeros(capacity, dtype=np.int64)
+        resources[: self._size] = self._resources[: self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        types = np.zeros(capacity, dtype=np.int64)
+        types[: self._size] = self._types[: self._size]
+
+        self._resources, self._alive, self._types = resources, alive, types
+        self.global_reputation.grow(capacity)
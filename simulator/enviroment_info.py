@@ -1,32 +1,135 @@
+from collections.abc import Sequence
+from types import MappingProxyType
+import numpy as np
+
 from event_generator import Event
+from trust import TrustMatrix, TrustMatrixView
 from utils import Action
 
 
+class ReadOnlySequence(Sequence):
+    """
+    Read-only view over a list that does not copy it.
+
+    Item assignment, deletion and the list mutating methods are not defined,
+    so an agent trying to change the environment through it gets a TypeError
+    or AttributeError instead of silently altering the simulation.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list) -> None:
+        self._data = data
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, value) -> bool:
+        return value in self._data
+
+    def copy(self) -> list:
+        return list(self._data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ReadOnlySequence):
+            other = other._data
+        return self._data == other
+
+    def __repr__(self) -> str:
+        return repr(self._data)
+
+
+class ReadOnlyMatrix(ReadOnlySequence):
+    """
+    Read-only view over a list of lists whose rows are also read-only.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        row = self._data[index]
+        if isinstance(index, slice):
+            return row
+        return ReadOnlySequence(row)
+
+    def __iter__(self):
+        return (ReadOnlySequence(row) for row in self._data)
+
+    def copy(self) -> list:
+        return [list(row) for row in self._data]
+
+
+def read_only(data):
+    """
+    Returns a read-only view of data without copying it.
+    """
+    if isinstance(data, np.ndarray):
+        view: np.ndarray = data.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(data, TrustMatrix):
+        return data.read_only()
+    if isinstance(data, (ReadOnlySequence, MappingProxyType, TrustMatrixView)):
+        return data
+    if isinstance(data, list):
+        if data and isinstance(data[0], list):
+            return ReadOnlyMatrix(data)
+        return ReadOnlySequence(data)
+    return MappingProxyType(data)
+
+
 class EnviromentInfo:
     """
     Represents the environment information for the simulator.
 
+    The information is a read-only view of the environment: it is built without
+    copying the alive agents, the trust matrix or the reputation, and any attempt
+    to modify it raises an exception. Since the views are live, an agent always
+    reads the current state of the environment.
+
     Attributes:
         log (dict[Event, dict[int, Action]]): A dictionary that maps each events to a dictionary that maps each agent to the actions that he made in that event.
 
         public_resources (dict[int, int]): A dictionary that represents the public resources available of each agent.
     """
 
+    __slots__ = (
+        "day",
+        "lost_per_day",
+        "public_resources",
+        "agents_alive",
+        "matrix_of_trust",
+        "reputation",
+    )
+
     def __init__(
         self,
         day: int,
         lost_per_day: int,
         public_resources: list[int],
         agents_alive: list[int],
-        matrix_of_trust: list[list[int]],
+        matrix_of_trust: TrustMatrix,
         reputation: dict,
     ) -> None:
-        self.day: int = day
-        self.lost_per_day: int = lost_per_day
-        self.public_resources: list[int] = public_resources
-        self.agents_alive: list[int] = agents_alive.copy()
-        self.matrix_of_trust: list[list[int]] = matrix_of_trust.copy()
-        self.reputation: dict = reputation.copy()
+        set_attribute = super().__setattr__
+        set_attribute("day", day)
+        set_attribute("lost_per_day", lost_per_day)
+        set_attribute("public_resources", read_only(public_resources))
+        set_attribute("agents_alive", read_only(agents_alive))
+        set_attribute("matrix_of_trust", read_only(matrix_of_trust))
+        set_attribute("reputation", read_only(reputation))
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("EnviromentInfo is read-only.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("EnviromentInfo is read-only.")
 
     def __str__(self) -> str:
         return f"Day: {self.day}\nLost per day: {self.lost_per_day}\nPublic resources: {self.public_resources}"
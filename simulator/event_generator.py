@@ -1,24 +1,51 @@
 """
 """
 
-import random
 from abc import ABC, abstractmethod
-from numpy.random import poisson
 from utils import EventType
+from random_streams import RandomStream, default_stream
+from exclusion import ExclusionPolicy, HardThreshold, exclude_from_groups
+from grouping import PoissonGrouping, TrustGrouping
+from trust import TrustMatrix
 
 
 class EventInfo:
-    def __init__(self, event_type: EventType, group: list[int], resources: int):
-        self.event_type: EventType = event_type
-        self.group: list[int] = group
-        self.resources: int = resources
+    """
+    What the agents of a group know about the event. It is shared by every
+    agent of the group, so it can not be changed.
+    """
+
+    __slots__ = ("event_type", "group", "resources")
+
+    def __init__(self, event_type: EventType, group, resources: int):
+        object.__setattr__(self, "event_type", event_type)
+        object.__setattr__(self, "group", tuple(group))
+        object.__setattr__(self, "resources", resources)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("EventInfo is read-only.")
 
 
 class Event:
+    """
+    Event of a day and the groups that play it.
+
+    The EventInfo of every group and the group of every agent are built when
+    the event is created, so getEventInfo is a dictionary lookup and every
+    agent of a group gets the same EventInfo.
+    """
+
     def __init__(self, event_type: EventType, groups: list[list[int]], resources: int):
         self.event_type: EventType = event_type
         self.groups: list[list[int]] = groups
         self.resources: int = resources
+        self.infos: list[EventInfo] = [
+            EventInfo(event_type, group, resources) for group in groups
+        ]
+        self.group_of: dict[int, int] = {}
+        for index, group in enumerate(groups):
+            for agent in group:
+                self.group_of.setdefault(agent, index)
 
     def __hash__(self) -> int:
         return id(self)
@@ -32,41 +59,41 @@ class Event:
         return str(self)
 
     def getEventInfo(self, agent_id: int) -> EventInfo:
-        for group in self.groups:
-            if agent_id in group:
-                return EventInfo(self.event_type, group.copy(), self.resources)
-        raise ValueError("The agent is not in the event.")
+        if agent_id not in self.group_of:
+            raise ValueError("The agent is not in the event.")
+        return self.infos[self.group_of[agent_id]]
 
 
 class EventGenerator(ABC):
+    rng: RandomStream = default_stream
+
     @abstractmethod
     def GetNewEvent(self, agents, thief_toleration) -> Event:
         pass
 
 
 class SimpleEventGenerator(EventGenerator):
+    def __init__(
+        self,
+        rng: RandomStream | None = None,
+        grouping: PoissonGrouping | None = None,
+    ):
+        self.rng: RandomStream = rng or default_stream
+        self.grouping: PoissonGrouping = grouping or PoissonGrouping()
+
     def GetNewEvent(
         self,
         agents: list[int],
         thief_toleration: int,
         global_reputation: dict,
     ) -> Event:
-        event_type: EventType = random.choice(list(EventType))
+        event_type: EventType = self.rng.choice(list(EventType))
         groups: list[list[int]] = self.select_groups(agents)
-        resources: int = random.randint(-100, 350) * len(agents)
+        resources: int = self.rng.randint(-100, 350) * len(agents)
         return Event(event_type, groups, resources)
 
     def select_groups(self, agents) -> list[list[int]]:
-        agents: list[int] = agents.copy()
-        random.shuffle(agents)
-        index = 0
-        result: list[list[int]] = []
-        while index < len(agents):
-            rand: int = poisson(lam=5)
-            end: int = min(index + rand, len(agents))
-            result.append(agents[index:end])
-            index: int = end
-        return result
+        return self.grouping.select(agents, self.rng)
 
 
 class ProbabilisticEventGenerator(EventGenerator):
@@ -75,33 +102,47 @@ class ProbabilisticEventGenerator(EventGenerator):
         good_time_probabilities: float,
         coop_event_probability: float,
         good_coop_resource_probability: float,
+        rng: RandomStream | None = None,
+        trust_grouping: bool = False,
+        grouping: PoissonGrouping | None = None,
+        exclusion_policy: ExclusionPolicy | None = None,
     ):
+        self.rng: RandomStream = rng or default_stream
+        # Distribución del tamaño de los grupos
+        self.grouping: PoissonGrouping = grouping or PoissonGrouping()
+        self.exclusion_policy: ExclusionPolicy = exclusion_policy or HardThreshold()
         self.good_time_probabilities: float = good_time_probabilities
         self.coop_event_probability: float = coop_event_probability
         self.good_coop_resource_probability: float = good_coop_resource_probability
+        # Con trust_grouping los grupos se forman según la confianza entre agentes
+        self.trust_grouping: TrustGrouping | None = (
+            TrustGrouping(self.grouping.lam) if trust_grouping else None
+        )
 
     def GetNewEvent(
         self,
         agents: list[int],
         thief_toleration: int,
         global_reputation: dict,
-        matrix: list[list[int]],
+        matrix: TrustMatrix,
     ) -> Event:
         event_type: EventType = self.select_event_type()
-        groups: list[list[int]] = self.select_groups(agents)
-        # groups: list[list[int]] = self.select_groups_with_trust(agents, matrix)
+        if self.trust_grouping is not None:
+            groups: list[list[int]] = self.select_groups_with_trust(agents, matrix)
+        else:
+            groups: list[list[int]] = self.select_groups(agents)
 
         if event_type == EventType.COOP:
-            if random.random() < self.good_coop_resource_probability:
+            if self.rng.random() < self.good_coop_resource_probability:
                 self.thief_control(thief_toleration, groups, global_reputation)
-                resources: int = random.randint(100, 300) * len(agents)
+                resources: int = self.rng.randint(100, 300) * len(agents)
             else:
-                resources: int = random.randint(-50, 0) * len(agents)
+                resources: int = self.rng.randint(-50, 0) * len(agents)
         else:
-            if random.random() < self.good_time_probabilities:
-                resources: int = random.randint(0, 50) * len(agents)
+            if self.rng.random() < self.good_time_probabilities:
+                resources: int = self.rng.randint(0, 50) * len(agents)
             else:
-                resources: int = random.randint(-10, 0) * len(agents)
+                resources: int = self.rng.randint(-10, 0) * len(agents)
         return Event(event_type, groups, resources)
 
     def thief_control(
@@ -110,77 +151,26 @@ class ProbabilisticEventGenerator(EventGenerator):
         groups: list[list[int]],
         global_reputation: dict,
     ):
-        for group in groups:
-            group[:] = [
-                agent
-                for agent in group
-                if agent not in global_reputation
-                or global_reputation[agent] > 30
-                or random.random() < thief_toleration
-            ]
+        """
+        Leaves out of their groups the agents chosen by the exclusion policy,
+        with one uniform draw for every agent of the event.
+        """
+        count: int = sum(len(group) for group in groups)
+        exclude_from_groups(
+            groups,
+            global_reputation,
+            thief_toleration,
+            self.exclusion_policy,
+            self.rng.generator.random(count),
+        )
 
     def select_event_type(self) -> EventType:
-        if random.random() < self.coop_event_probability:
+        if self.rng.random() < self.coop_event_probability:
             return EventType.COOP
         return EventType.SPECIAL
 
     def select_groups(self, agents) -> list[list[int]]:
-        agents: list[int] = agents.copy()
-        random.shuffle(agents)
-        index = 0
-        result: list[list[int]] = []
-        while index < len(agents):
-            rand: int = poisson(lam=5)
-            end: int = min(index + rand, len(agents))
-            result.append(agents[index:end])
-            index: int = end
-        return result
-
-    def ordenar_por_posiciones(self, array: list[int]) -> list[int]:
-        arr: list[int] = array.copy()
-        # Paso 2: Crear una lista de pares (valor, índice)
-        pares: list[tuple[int, int]] = [
-            (valor, indice) for indice, valor in enumerate(arr)
-        ]
-
-        # Paso 3: Ordenar la lista de pares en orden descendente por el valor
-        pares_ordenados: list[tuple[int, int]] = sorted(
-            pares, key=lambda x: x[0], reverse=True
-        )
-
-        # Paso 4: Extraer los índices ordenados
-        indices_ordenados: list[int] = [par[1] for par in pares_ordenados]
-
-        # Paso 5: Devolver los índices ordenados
-        return indices_ordenados
+        return self.grouping.select(agents, self.rng)
 
     def select_groups_with_trust(self, agents, matrix) -> list[list[int]]:
-        agents: list[int] = agents.copy()
-        random.shuffle(agents)
-        result: list[list[int]] = []
-        while agents:
-            rand: int = poisson(lam=5)
-            group = []
-            group.append(agents[0])
-            indices_ordenados: list[int] = self.ordenar_por_posiciones(
-                matrix[agents[0]]
-            )
-            for i in range(len(indices_ordenados)):
-                if rand == 0:
-                    break
-                for roommate in group:
-                    if not (
-                        indices_ordenados[i] != roommate
-                        and indices_ordenados[i] in agents
-                        and random.random() < matrix[roommate][indices_ordenados[i]]
-                    ):
-                        break
-                else:
-                    group.append(indices_ordenados[i])
-                    agents.remove(indices_ordenados[i])
-                    rand -= 1
-
-            result.append(group)
-            agents.remove(agents[0])
-
-        return result
+        return self.trust_grouping.select(agents, matrix, self.rng)
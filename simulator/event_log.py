@@ -0,0 +1,255 @@
+"""
+This module contains the EventLog class, the columnar log of the events of a simulation.
+"""
+
+import numpy as np
+
+from utils import Action, EventType
+
+# Code stored for the agents that were in an event without deciding (SPECIAL events)
+NO_ACTION: int = -1
+
+_ACTIONS: tuple[Action, ...] = tuple(Action)
+_EVENT_TYPES: tuple[EventType, ...] = tuple(EventType)
+
+
+class LoggedEvent:
+    """
+    An event read back from the log.
+
+    Attributes:
+        day (int): Day of the event.
+        event_type (EventType): Type of the event.
+        resources (int): Resources at stake.
+        groups (list[list[int]]): Agents of every group of the event.
+        decisions (dict[int, Action]): Action taken by each agent that decided.
+    """
+
+    def __init__(
+        self,
+        day: int,
+        event_type: EventType,
+        resources: int,
+        groups: list[list[int]],
+        decisions: dict[int, Action],
+    ):
+        self.day: int = day
+        self.event_type: EventType = event_type
+        self.resources: int = resources
+        self.groups: list[list[int]] = groups
+        self.decisions: dict[int, Action] = decisions
+
+    def __str__(self) -> str:
+        return (
+            f"{self.event_type}, agents id: {self.groups}, resources: {self.resources}"
+        )
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class EventLog:
+    """
+    Append-only log of the events of a simulation stored in growable NumPy
+    columns instead of a dict of Event objects.
+
+    Every participation is one row with the day, the agent id (its external id
+    when the simulator gives it), its group in the
+    event and its action as an int8 code (NO_ACTION for SPECIAL events), and
+    every day has one row with the event type, the resources at stake and the
+    offset of its first participation. With max_days the log works as a ring
+    buffer that only keeps the last max_days days, so long runs use constant
+    memory.
+
+    The decisions of the day being played are also kept in the current dict
+    for constant time lookups while the simulator resolves the event.
+
+    Attributes:
+        max_days (int | None): Number of days kept, or None to keep them all.
+        current (dict[int, Action]): Decisions of the last recorded day.
+    """
+
+    def __init__(self, max_days: int | None = None, capacity: int = 1024):
+        self.max_days: int | None = max_days
+        self.current: dict[int, Action] = {}
+
+        self._days = np.empty(capacity, dtype=np.int32)
+        self._agents = np.empty(capacity, dtype=np.int32)
+        self._groups = np.empty(capacity, dtype=np.int32)
+        self._actions = np.empty(capacity, dtype=np.int8)
+        self._start: int = 0
+        self._end: int = 0
+
+        day_capacity: int = 64
+        self._event_days = np.empty(day_capacity, dtype=np.int32)
+        self._event_types = np.empty(day_capacity, dtype=np.int8)
+        self._event_resources = np.empty(day_capacity, dtype=np.int64)
+        self._event_offsets = np.empty(day_capacity, dtype=np.int64)
+        self._first_day: int = 0
+        self._last_day: int = 0
+
+    def record_event(self, day: int, event_type: EventType, resources: int) -> None:
+        """
+        Starts the record of a new day.
+        """
+        if self._last_day == len(self._event_days):
+            self._make_room_for_days()
+        index = self._last_day
+        self._event_days[index] = day
+        self._event_types[index] = event_type.value
+        self._event_resources[index] = resources
+        self._event_offsets[index] = self._end
+        self._last_day += 1
+        self.current = {}
+
+        if self.max_days is not None and len(self) > self.max_days:
+            self._first_day += 1
+            self._start = int(self._event_offsets[self._first_day])
+
+    def record(
+        self,
+        agent: int,
+        action: Action | None,
+        group: int,
+        external_id: int | None = None,
+    ) -> None:
+        """
+        Records the participation of agent in group of the current day. The
+        log stores external_id when given, so it survives the compaction of
+        the agent ids, while current stays keyed by agent.
+        """
+        if self._end == len(self._days):
+            self._make_room_for_rows()
+        index = self._end
+        self._days[index] = self._event_days[self._last_day - 1]
+        self._agents[index] = agent if external_id is None else external_id
+        self._groups[index] = group
+        self._actions[index] = NO_ACTION if action is None else action.value
+        self._end += 1
+        if action is not None:
+            self.current[agent] = action
+
+    def record_groups(
+        self,
+        groups: list[list[int]],
+        decisions: dict[int, Action] | None = None,
+        agents: list | None = None,
+    ) -> None:
+        """
+        Records every group of the current day with the decisions of its agents.
+        With agents, the external id of each agent is stored.
+        """
+        for group_index, group in enumerate(groups):
+            for agent in group:
+                self.record(
+                    agent,
+                    None if decisions is None else decisions[agent],
+                    group_index,
+                    None if agents is None else agents[agent].external_id,
+                )
+
+    def __len__(self) -> int:
+        return self._last_day - self._first_day
+
+    def __iter__(self):
+        for index in range(self._first_day, self._last_day):
+            yield self._read_event(index)
+
+    def last_event(self) -> LoggedEvent | None:
+        if len(self) == 0:
+            return None
+        return self._read_event(self._last_day - 1)
+
+    def get_event(self, day: int) -> LoggedEvent | None:
+        """
+        Returns the event of the given day if it is still kept in the log.
+        """
+        days = self._event_days[self._first_day : self._last_day]
+        position = int(np.searchsorted(days, day))
+        if position == len(days) or days[position] != day:
+            return None
+        return self._read_event(self._first_day + position)
+
+    def agent_history(self, agent: int) -> list[tuple[int, Action]]:
+        """
+        Returns the (day, action) pairs of every decision of agent kept in the log.
+        """
+        agents = self._agents[self._start : self._end]
+        actions = self._actions[self._start : self._end]
+        rows = np.flatnonzero((agents == agent) & (actions != NO_ACTION))
+        days = self._days[self._start : self._end][rows].tolist()
+        return [
+            (day, _ACTIONS[code]) for day, code in zip(days, actions[rows].tolist())
+        ]
+
+    def _read_event(self, index: int) -> LoggedEvent:
+        start = int(self._event_offsets[index])
+        end = (
+            int(self._event_offsets[index + 1])
+            if index + 1 < self._last_day
+            else self._end
+        )
+        groups: list[list[int]] = []
+        decisions: dict[int, Action] = {}
+        last_group = -1
+        for agent, group, code in zip(
+            self._agents[start:end].tolist(),
+            self._groups[start:end].tolist(),
+            self._actions[start:end].tolist(),
+        ):
+            if group != last_group:
+                groups.append([])
+                last_group = group
+            groups[-1].append(agent)
+            if code != NO_ACTION:
+                decisions[agent] = _ACTIONS[code]
+        return LoggedEvent(
+            int(self._event_days[index]),
+            _EVENT_TYPES[self._event_types[index]],
+            int(self._event_resources[index]),
+            groups,
+            decisions,
+        )
+
+    def _make_room_for_rows(self) -> None:
+        # Dropped rows are reclaimed before growing, so a ring buffer log
+        # stops growing once it holds max_days days
+        kept = self._end - self._start
+        if self._start > 0 and self._start >= len(self._days) // 2:
+            columns = (self._days, self._agents, self._groups, self._actions)
+            for column in columns:
+                column[:kept] = column[self._start : self._end]
+        else:
+            columns = []
+            for column in (self._days, self._agents, self._groups, self._actions):
+                grown = np.empty(2 * len(column), dtype=column.dtype)
+                grown[:kept] = column[self._start : self._end]
+                columns.append(grown)
+            self._days, self._agents, self._groups, self._actions = columns
+        self._event_offsets[self._first_day : self._last_day] -= self._start
+        self._start, self._end = 0, kept
+
+    def _make_room_for_days(self) -> None:
+        kept = self._last_day - self._first_day
+        columns = (
+            self._event_days,
+            self._event_types,
+            self._event_resources,
+            self._event_offsets,
+        )
+        if self._first_day > 0 and self._first_day >= len(self._event_days) // 2:
+            for column in columns:
+                column[:kept] = column[self._first_day : self._last_day]
+        else:
+            grown_columns = []
+            for column in columns:
+                grown = np.empty(2 * len(column), dtype=column.dtype)
+                grown[:kept] = column[self._first_day : self._last_day]
+                grown_columns.append(grown)
+            (
+                self._event_days,
+                self._event_types,
+                self._event_resources,
+                self._event_offsets,
+            ) = grown_columns
+        self._first_day, self._last_day = 0, kept
@@ -0,0 +1,182 @@
+"""
+This module contains the EventSchedule, a pregenerated sequence of daily events, and the ReplayEventGenerator that plays it back.
+"""
+
+import numpy as np
+
+from event_generator import Event, EventGenerator, ProbabilisticEventGenerator
+from exclusion import ExclusionPolicy, HardThreshold, exclude_from_groups
+from random_streams import RandomStream, default_stream
+from trust import TrustMatrix
+from utils import EventType
+
+EVENT_TYPES: list[EventType] = list(EventType)
+
+
+class EventSchedule:
+    """
+    Every random number the event generator needs for a scenario, drawn in
+    advance for each day.
+
+    Replaying the same schedule in several simulations gives all of them the
+    same environment (event types, resources, group sizes, shuffles and
+    thief control draws), so the comparison of strategies is not blurred by
+    the noise of the events (common random numbers). Resources are stored
+    per alive agent and the draws per position in the shuffled population,
+    since the population of each simulation is different.
+
+    Attributes:
+        event_types (np.ndarray): Index in EventType of the event of each day.
+        good (np.ndarray): Whether each day is good, a cooperative event with
+            good resources runs the thief control.
+        resources (np.ndarray): Resources of each day per alive agent.
+        shuffle_keys (np.ndarray): days x capacity keys, the agents are
+            shuffled by sorting the keys of their positions.
+        thief_uniforms (np.ndarray): days x capacity draws of the thief control.
+        group_cuts (np.ndarray): Cut points of the groups of every day,
+            concatenated, each day from 0 to at least capacity.
+        cut_offsets (np.ndarray): Start of the cut points of each day.
+    """
+
+    arrays: tuple[str, ...] = (
+        "event_types",
+        "good",
+        "resources",
+        "shuffle_keys",
+        "thief_uniforms",
+        "group_cuts",
+        "cut_offsets",
+    )
+
+    def __init__(self, **arrays):
+        for name in self.arrays:
+            setattr(self, name, np.asarray(arrays[name]))
+
+    def __len__(self) -> int:
+        return len(self.event_types)
+
+    @property
+    def capacity(self) -> int:
+        return self.shuffle_keys.shape[1]
+
+    @classmethod
+    def generate(
+        cls,
+        event_generator: ProbabilisticEventGenerator,
+        days: int,
+        capacity: int,
+        rng: RandomStream | None = None,
+    ) -> "EventSchedule":
+        """
+        Draws the schedule of days events with the probabilities and the
+        group sizes of event_generator.
+
+        Args:
+            event_generator (ProbabilisticEventGenerator): Scenario to draw.
+            days (int): Number of days.
+            capacity (int): Largest population the schedule can group.
+            rng (RandomStream | None): Stream used for the draws.
+        """
+        rng = rng or default_stream
+        generator = rng.generator
+        coop = generator.random(days) < event_generator.coop_event_probability
+        good = generator.random(days) < np.where(
+            coop,
+            event_generator.good_coop_resource_probability,
+            event_generator.good_time_probabilities,
+        )
+        # Mismos rangos que ProbabilisticEventGenerator.GetNewEvent
+        low = np.select([coop & good, coop, good], [100, -50, 0], -10)
+        high = np.select([coop & good, coop, good], [300, 0, 50], 0)
+        resources = generator.integers(low, high, endpoint=True)
+
+        group_cuts = [
+            event_generator.grouping.offsets(capacity, rng) for _ in range(days)
+        ]
+        cut_offsets = np.zeros(days + 1, dtype=np.int64)
+        cut_offsets[1:] = np.cumsum([len(cuts) for cuts in group_cuts])
+        return cls(
+            event_types=np.where(
+                coop,
+                EVENT_TYPES.index(EventType.COOP),
+                EVENT_TYPES.index(EventType.SPECIAL),
+            ).astype(np.int8),
+            good=good,
+            resources=resources.astype(np.int64),
+            shuffle_keys=generator.random((days, capacity), dtype=np.float32),
+            thief_uniforms=generator.random((days, capacity)),
+            group_cuts=(np.concatenate(group_cuts) if days else np.zeros(0, np.int64)),
+            cut_offsets=cut_offsets,
+        )
+
+    def day_cuts(self, day: int, count: int) -> np.ndarray:
+        """
+        Returns the cut points of the groups of day for count agents.
+        """
+        cuts = self.group_cuts[self.cut_offsets[day] : self.cut_offsets[day + 1]]
+        return np.append(cuts[cuts < count], count)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.arrays})
+
+    @classmethod
+    def load(cls, path: str) -> "EventSchedule":
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in cls.arrays})
+
+
+class ReplayEventGenerator(EventGenerator):
+    """
+    Event generator that plays an EventSchedule back, one day per call to
+    GetNewEvent, instead of drawing the events.
+
+    Attributes:
+        schedule (EventSchedule): The schedule played.
+        day (int): Index of the next day of the schedule.
+        exclusion_policy (ExclusionPolicy): Policy of the thief control.
+    """
+
+    def __init__(
+        self,
+        schedule: EventSchedule,
+        exclusion_policy: ExclusionPolicy | None = None,
+    ):
+        self.schedule: EventSchedule = schedule
+        self.day: int = 0
+        self.exclusion_policy: ExclusionPolicy = exclusion_policy or HardThreshold()
+
+    def GetNewEvent(
+        self,
+        agents: list[int],
+        thief_toleration: int,
+        global_reputation: dict,
+        matrix: TrustMatrix | None = None,
+    ) -> Event:
+        schedule: EventSchedule = self.schedule
+        day: int = self.day
+        if day >= len(schedule):
+            raise ValueError(f"The event schedule only has {len(schedule)} days.")
+        if len(agents) > schedule.capacity:
+            raise ValueError(
+                f"The event schedule can group at most {schedule.capacity} agents."
+            )
+        self.day += 1
+
+        keys = schedule.shuffle_keys[day, : len(agents)]
+        order = np.asarray(agents, dtype=np.int64)[np.argsort(keys, kind="stable")]
+        cuts = schedule.day_cuts(day, len(agents)).tolist()
+        groups: list[list[int]] = [
+            order[start:end].tolist() for start, end in zip(cuts[:-1], cuts[1:])
+        ]
+
+        event_type: EventType = EVENT_TYPES[schedule.event_types[day]]
+        if event_type == EventType.COOP and schedule.good[day]:
+            exclude_from_groups(
+                groups,
+                global_reputation,
+                thief_toleration,
+                self.exclusion_policy,
+                schedule.thief_uniforms[day],
+            )
+        resources: int = int(schedule.resources[day]) * len(agents)
+        return Event(event_type, groups, resources)
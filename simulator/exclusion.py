@@ -0,0 +1,134 @@
+"""
+This module contains the exclusion policies, which decide which agents with bad reputation are left out of a cooperative event.
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+def reputation_of(
+    global_reputation, agents: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the reputation of each of agents and whether it is known. A
+    ReputationArray is read with fancy indexing, a dict one agent at a time.
+    """
+    if hasattr(global_reputation, "known"):
+        inside = agents < len(global_reputation.known)
+        indices = np.where(inside, agents, 0)
+        known = inside & global_reputation.known[indices]
+        return global_reputation.values[indices].astype(float), known
+    known = np.fromiter(
+        (agent in global_reputation for agent in agents.tolist()), bool, len(agents)
+    )
+    reputation = np.fromiter(
+        (global_reputation.get(agent, 0) for agent in agents.tolist()),
+        float,
+        len(agents),
+    )
+    return reputation, known
+
+
+class ExclusionPolicy(ABC):
+    """
+    Gives the probability of every agent of a cooperative event being left out
+    of its group, from its reputation and the thief toleration of the
+    simulation.
+    """
+
+    @abstractmethod
+    def exclusion_probability(
+        self, reputation: np.ndarray, known: np.ndarray, thief_toleration: float
+    ) -> np.ndarray:
+        """
+        Args:
+            reputation (np.ndarray): Global reputation of each agent.
+            known (np.ndarray): Whether each agent has a reputation yet.
+            thief_toleration (float): Probability of letting a suspect play.
+        """
+
+    def excluded(
+        self,
+        reputation: np.ndarray,
+        known: np.ndarray,
+        thief_toleration: float,
+        uniforms: np.ndarray,
+    ) -> np.ndarray:
+        return uniforms < self.exclusion_probability(
+            reputation, known, thief_toleration
+        )
+
+
+class HardThreshold(ExclusionPolicy):
+    """
+    Agents with a known reputation up to threshold are left out unless they
+    are tolerated, with probability thief_toleration.
+    """
+
+    def __init__(self, threshold: float = 30):
+        self.threshold: float = threshold
+
+    def exclusion_probability(
+        self, reputation: np.ndarray, known: np.ndarray, thief_toleration: float
+    ) -> np.ndarray:
+        suspect = known & (reputation <= self.threshold)
+        return np.where(suspect, 1 - thief_toleration, 0.0)
+
+
+class LogisticExclusion(ExclusionPolicy):
+    """
+    Agents with a known reputation are left out with a probability that falls
+    smoothly around midpoint, scaled by the part not tolerated.
+
+    Attributes:
+        midpoint (float): Reputation left out with half the probability.
+        steepness (float): How fast the probability falls with reputation.
+    """
+
+    def __init__(self, midpoint: float = 30, steepness: float = 0.2):
+        self.midpoint: float = midpoint
+        self.steepness: float = steepness
+
+    def exclusion_probability(
+        self, reputation: np.ndarray, known: np.ndarray, thief_toleration: float
+    ) -> np.ndarray:
+        # 1 / (1 + exp(x)) escrito con tanh, que no desborda con reputaciones
+        # muy lejos de midpoint
+        logistic = 0.5 * (
+            1 - np.tanh(0.5 * self.steepness * (reputation - self.midpoint))
+        )
+        return np.where(known, (1 - thief_toleration) * logistic, 0.0)
+
+
+def exclude_from_groups(
+    groups: list[list[int]],
+    global_reputation,
+    thief_toleration: float,
+    policy: ExclusionPolicy,
+    uniforms: np.ndarray,
+) -> None:
+    """
+    Removes in place from groups the agents excluded by policy, as one mask
+    over every agent of the event. uniforms holds a draw for each agent, in
+    the order of the groups.
+    """
+    sizes = np.fromiter((len(group) for group in groups), np.int64, len(groups))
+    if sizes.sum() == 0:
+        return
+    agents = np.fromiter(
+        (agent for group in groups for agent in group), np.int64, sizes.sum()
+    )
+    reputation, known = reputation_of(global_reputation, agents)
+    excluded = policy.excluded(
+        reputation, known, thief_toleration, uniforms[: len(agents)]
+    )
+    if not excluded.any():
+        return
+    kept = agents[~excluded].tolist()
+    # Fin de cada grupo en kept
+    kept_before = np.concatenate(([0], np.cumsum(~excluded)))
+    ends = kept_before[np.cumsum(sizes)].tolist()
+    start = 0
+    for group, end in zip(groups, ends):
+        group[:] = kept[start:end]
+        start = end
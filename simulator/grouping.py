@@ -0,0 +1,136 @@
+"""
+This module contains the grouping engines, which split the alive agents into the groups of an event.
+"""
+
+import numpy as np
+
+from random_streams import RandomStream
+from trust import TrustMatrix
+
+
+class TrustGrouping:
+    """
+    Forms groups around a random seed agent with the agents it trusts most.
+
+    The unassigned agents are kept in a boolean bitmap indexed by agent id.
+    For every group the seed takes the top candidates of its trust row with
+    one argpartition over the unassigned pool, instead of sorting the whole
+    row, and the acceptance of every candidate by every possible member is
+    drawn at once: a candidate joins when each member already in the group
+    accepts it, with probability trust / trust_scale.
+
+    Attributes:
+        lam (float): Mean of the Poisson number of agents a seed invites.
+        candidates (int): Candidates considered per invited agent.
+        trust_scale (float): Trust at which an agent is always accepted.
+    """
+
+    def __init__(self, lam: float = 5, candidates: int = 4, trust_scale: float = 100):
+        self.lam: float = lam
+        self.candidates: int = candidates
+        self.trust_scale: float = trust_scale
+
+    def select(
+        self, agents: list[int], matrix: TrustMatrix, rng: RandomStream
+    ) -> list[list[int]]:
+        if len(agents) == 0:
+            return []
+        order = rng.generator.permutation(np.asarray(agents, dtype=np.int64))
+        free = np.zeros(int(order.max()) + 1, dtype=bool)
+        free[order] = True
+        remaining: int = len(order)
+
+        result: list[list[int]] = []
+        for seed in order.tolist():
+            if not free[seed]:
+                continue
+            free[seed] = False
+            remaining -= 1
+            group: list[int] = [seed]
+            invited: int = rng.poisson(self.lam)
+            if invited > 0 and remaining > 0:
+                group.extend(self.invite(seed, invited, free, matrix, rng))
+                free[group[1:]] = False
+                remaining -= len(group) - 1
+            result.append(group)
+        return result
+
+    def invite(
+        self,
+        seed: int,
+        invited: int,
+        free: np.ndarray,
+        matrix: TrustMatrix,
+        rng: RandomStream,
+    ) -> list[int]:
+        """
+        Returns up to invited agents of the pool that join the group of seed.
+        """
+        pool = np.flatnonzero(free)
+        trust = matrix.row(seed, pool)
+        count: int = min(len(pool), invited * self.candidates)
+        if count < len(pool):
+            top = np.argpartition(-trust, count - 1)[:count]
+            top = top[np.lexsort((pool[top], -trust[top]))]
+        else:
+            top = np.lexsort((pool, -trust))
+        candidates = pool[top]
+
+        # Fila i: aceptación de cada candidato por el seed (i = 0) o por el
+        # candidato i - 1, si llega a formar parte del grupo
+        members = np.concatenate(([seed], candidates))
+        probabilities = matrix.block(members, candidates) / self.trust_scale
+        accepts = rng.generator.random(probabilities.shape) < probabilities
+
+        joined: list[int] = [0]
+        for position in range(len(candidates)):
+            if accepts[joined, position].all():
+                joined.append(position + 1)
+                if len(joined) > invited:
+                    break
+        return members[joined[1:]].tolist()
+
+
+class PoissonGrouping:
+    """
+    Splits the agents at random into consecutive groups with Poisson sizes.
+
+    All the sizes of a day are drawn with one vectorized call and clipped to
+    [min_size, max_size], and the cut points are their cumulative sum over a
+    random permutation of the agents. The last group keeps the agents that
+    are left, so it may be smaller than min_size.
+
+    Attributes:
+        lam (float): Mean of the Poisson size of a group.
+        min_size (int): Minimum size of a group, 1 so no group is empty.
+        max_size (int | None): Maximum size of a group, unbounded if None.
+    """
+
+    def __init__(self, lam: float = 5, min_size: int = 1, max_size: int | None = None):
+        if min_size < 1 or (max_size is not None and max_size < min_size):
+            raise ValueError("The group sizes must satisfy 1 <= min_size <= max_size.")
+        self.lam: float = lam
+        self.min_size: int = min_size
+        self.max_size: int | None = max_size
+
+    def offsets(self, count: int, rng: RandomStream) -> np.ndarray:
+        """
+        Returns the start of every group and, last, count.
+        """
+        mean: float = max(self.lam, self.min_size)
+        cuts = np.zeros(1, dtype=np.int64)
+        while cuts[-1] < count:
+            draws: int = int((count - cuts[-1]) / mean) + 8
+            sizes = np.clip(
+                rng.generator.poisson(self.lam, draws), self.min_size, self.max_size
+            )
+            cuts = np.concatenate((cuts, cuts[-1] + np.cumsum(sizes)))
+        groups: int = int(np.searchsorted(cuts, count))
+        cuts = cuts[: groups + 1]
+        cuts[-1] = count
+        return cuts
+
+    def select(self, agents: list[int], rng: RandomStream) -> list[list[int]]:
+        order = rng.generator.permutation(np.asarray(agents, dtype=np.int64))
+        cuts = self.offsets(len(order), rng)
+        return [order[start:end].tolist() for start, end in zip(cuts[:-1], cuts[1:])]
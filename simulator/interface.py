@@ -1,7 +1,7 @@
+import os
 import random
 import csv
-import pandas as pd
-import matplotlib.pyplot as plt
+import itertools
 from multiprocessing import Pool, cpu_count
 from tqdm import tqdm
 from agents.agent import (
@@ -17,12 +17,45 @@ from agents.agent import (
     ExploteAgent,
 )
 from event_generator import ProbabilisticEventGenerator
+from event_stream import EventSchedule, ReplayEventGenerator
 from simulation import Simulator
+from random_streams import RandomStream, RandomStreams, default_stream
+from results_store import ResultsStore
+from stats import LiveDashboard
+
+AGENT_TYPES: list[str] = [
+    "PusilanimeAgent",
+    "ThiefAgent",
+    "TipForTapAgent",
+    "TipForTapSecureAgent",
+    "RandomAgent",
+    "ABRAgent",
+    "SearchAgent",
+    "ResentfulAgent",
+    "ExploteAgent",
+]
+
+# Campos del CSV de resumen
+SUMMARY_FIELDNAMES: list[str] = (
+    [
+        "simulation_number",
+        "day",
+        "avg_resources",
+        "total_thefts",
+        "agents_alive",
+    ]
+    + [f"count_{agent_type}" for agent_type in AGENT_TYPES]
+    + [f"avg_resources_{agent_type}" for agent_type in AGENT_TYPES]
+)
 
 
 def run_single_simulation(args):
-    simulation_params, simulation_number = args
-    agents = population_random_generator(simulation_params["population_size"])
+    simulation_params, simulation_number, *seed = args
+    # Cada réplica tiene sus propios streams derivados de la semilla base
+    streams = RandomStreams(seed[0] if seed else None, replica=simulation_number)
+    agents = population_random_generator(
+        simulation_params["population_size"], streams.stream("population")
+    )
 
     event_generator = ProbabilisticEventGenerator(
         good_coop_resource_probability=simulation_params[
@@ -30,7 +63,18 @@ def run_single_simulation(args):
         ],
         good_time_probabilities=simulation_params["good_time_probabilities"],
         coop_event_probability=simulation_params["coop_event_probability"],
+        trust_grouping=simulation_params.get("trust_grouping", False),
+        grouping=simulation_params.get("grouping"),
+        exclusion_policy=simulation_params.get("exclusion_policy"),
     )
+    # Con un calendario de eventos todas las simulaciones viven los mismos eventos
+    event_schedule = simulation_params.get("event_schedule")
+    if event_schedule is not None:
+        if isinstance(event_schedule, str):
+            event_schedule = EventSchedule.load(event_schedule)
+        event_generator = ReplayEventGenerator(
+            event_schedule, simulation_params.get("exclusion_policy")
+        )
 
     sim = Simulator(
         agents,
@@ -42,9 +86,18 @@ def run_single_simulation(args):
         max_population=simulation_params["max_population"],
         global_visible_desitions=simulation_params["global_visible_desitions"],
         noise=simulation_params["noise"],
+        sinks=(
+            [LiveDashboard()]
+            if simulation_params.get("live_dashboard", False)
+            else None
+        ),
+        log_path=simulation_params.get("log_path", "log.txt"),
+        seed=streams,
+        record_schedule=simulation_params.get("record_schedule"),
     )
 
     result = sim.run(simulation_params["days"], verbose=False)
+    sim.close()
     summary_data = result["summary_data"]
 
     # Retornar los resultados incluyendo summary_data
@@ -52,13 +105,22 @@ def run_single_simulation(args):
         "simulation_number": simulation_number,
         "final_day": sim.enviroment.day,
         "agents_alive": len(sim.enviroment.agents_alive),
-        "total_resources": sum(sim.enviroment.public_resources),
-        "agent_types": [type(agent).__name__ for agent in sim.enviroment.agents],
+        "total_resources": sum(
+            sim.enviroment.public_resources[agent]
+            for agent in sim.enviroment.agents_alive
+        ),
+        "agent_types": [
+            str(sim.enviroment.find_agent(external_id))
+            for external_id in range(sim.enviroment.next_external_id)
+        ],
         "summary_data": summary_data,
+        "series": result["series"],
     }
 
 
-def population_random_generator(length: int) -> list[Agent]:
+def population_random_generator(
+    length: int, rng: RandomStream = default_stream
+) -> list[Agent]:
     agent_classes = [
         PusilanimeAgent,
         ThiefAgent,
@@ -70,65 +132,172 @@ def population_random_generator(length: int) -> list[Agent]:
         ResentfulAgent,
         ExploteAgent,
     ]
-    return [random.choice(agent_classes)(i) for i in range(length)]
+    return [rng.choice(agent_classes)(i, rng=rng) for i in range(length)]
+
+
+def summary_rows(result: dict) -> list[dict]:
+    """
+    Expands the summary_data of a finished simulation into CSV rows.
+    """
+    rows = []
+    sim_number = result["simulation_number"]
+    for data in result["summary_data"]:
+        row = {
+            "simulation_number": sim_number,
+            "day": data["day"],
+            "avg_resources": data["avg_resources"],
+            "total_thefts": data["total_thefts"],
+            "agents_alive": data["agents_alive"],
+        }
+        # Añadir conteo de agentes por tipo
+        for agent_type in AGENT_TYPES:
+            row[f"count_{agent_type}"] = data["agent_type_counts"].get(agent_type, 0)
+
+        # Añadir recursos promedio por tipo de agente
+        for agent_type in AGENT_TYPES:
+            row[f"avg_resources_{agent_type}"] = data["agent_type_avg_resources"].get(
+                agent_type, 0
+            )
+
+        rows.append(row)
+    return rows
 
 
 def save_simulation_summary(simulation_results):
-    agent_types_list = [
-        "PusilanimeAgent",
-        "ThiefAgent",
-        "TipForTapAgent",
-        "TipForTapSecureAgent",
-        "RandomAgent",
-        "ABRAgent",
-        "SearchAgent",
-        "ResentfulAgent",
-        "ExploteAgent",
+    # Guardar en un archivo CSV
+    with open("simulation_summary.csv", "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_FIELDNAMES)
+        writer.writeheader()
+        for result in simulation_results:
+            writer.writerows(summary_rows(result))
+
+
+def parameter_grid(base_params: dict, grid: dict[str, list]) -> list[dict]:
+    """
+    Returns one parameter set for every combination of the values in grid,
+    taking the rest of the parameters from base_params.
+    """
+    keys = list(grid)
+    return [
+        {**base_params, **dict(zip(keys, values))}
+        for values in itertools.product(*(grid[key] for key in keys))
     ]
 
-    # Definir los campos del CSV
-    fieldnames = [
-        "simulation_number",
-        "day",
-        "avg_resources",
-        "total_thefts",
-        "agents_alive",
+
+def parameter_sample(
+    base_params: dict, space: dict, samples: int, seed: int | None = None
+) -> list[dict]:
+    """
+    Returns samples random parameter sets. A tuple (low, high) in space is
+    drawn uniformly (as an int when both bounds are ints) and a list is
+    drawn with random.choice.
+    """
+    rng = random.Random(seed)
+    param_sets = []
+    for _ in range(samples):
+        params = dict(base_params)
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(values)
+        param_sets.append(params)
+    return param_sets
+
+
+def run_sweep(
+    param_sets: list[dict],
+    replicas: int = 1,
+    output_path: str = "simulation_summary.csv",
+    params_path: str | None = "simulation_parameters.csv",
+    processes: int | None = None,
+    chunksize: int | None = None,
+    base_seed: int | None = None,
+    results_store: ResultsStore | None = None,
+    log_dir: str | None = None,
+) -> int:
+    """
+    Runs replicas simulations of every parameter set in a process pool and
+    streams the summary rows of each simulation to output_path as soon as it
+    finishes, so the results are never held in memory all together.
+
+    Every replica gets its own simulation_number and its random streams are
+    derived from base_seed and that number, which makes the sweep
+    reproducible regardless of the worker that runs it. Without base_seed
+    each replica draws fresh entropy. The parameters of every
+    simulation_number are written to params_path.
+
+    With a results_store the time series of each simulation is appended to
+    it as a chunk of typed columns instead of writing the CSV rows.
+
+    Every simulation writes its event log to log_dir/log_<simulation_number>.txt,
+    or no log at all without log_dir, so the workers never share a file.
+
+    Returns the number of simulations run.
+    """
+    args_list = [
+        (params, simulation_number, base_seed)
+        for simulation_number, params in enumerate(
+            (params for params in param_sets for _ in range(replicas)), start=1
+        )
     ]
-    for agent_type in agent_types_list:
-        fieldnames.append(f"count_{agent_type}")
-    for agent_type in agent_types_list:
-        fieldnames.append(f"avg_resources_{agent_type}")
-
-    all_rows = []
-    for result in simulation_results:
-        sim_number = result["simulation_number"]
-        summary_data = result["summary_data"]
-        for data in summary_data:
-            row = {
-                "simulation_number": sim_number,
-                "day": data["day"],
-                "avg_resources": data["avg_resources"],
-                "total_thefts": data["total_thefts"],
-                "agents_alive": data["agents_alive"],
-            }
-            # Añadir conteo de agentes por tipo
-            for agent_type in agent_types_list:
-                count = data["agent_type_counts"].get(agent_type, 0)
-                row[f"count_{agent_type}"] = count
-
-            # Añadir recursos promedio por tipo de agente
-            for agent_type in agent_types_list:
-                avg_res = data["agent_type_avg_resources"].get(agent_type, 0)
-                row[f"avg_resources_{agent_type}"] = avg_res
-
-            all_rows.append(row)
+    processes = processes or cpu_count()
+    if chunksize is None:
+        chunksize = max(1, len(args_list) // (processes * 4))
 
-    # Guardar en un archivo CSV
-    with open("simulation_summary.csv", "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    if params_path is not None:
+        param_keys = sorted({key for params in param_sets for key in params})
+        with open(params_path, "w", newline="") as csvfile:
+            writer = csv.DictWriter(
+                csvfile, fieldnames=["simulation_number"] + param_keys
+            )
+            writer.writeheader()
+            for params, simulation_number, _ in args_list:
+                writer.writerow({"simulation_number": simulation_number, **params})
+
+    if log_dir is not None:
+        os.makedirs(log_dir, exist_ok=True)
+    args_list = [
+        (
+            {
+                **params,
+                "log_path": (
+                    None
+                    if log_dir is None
+                    else os.path.join(log_dir, f"log_{simulation_number}.txt")
+                ),
+            },
+            simulation_number,
+            seed,
+        )
+        for params, simulation_number, seed in args_list
+    ]
+
+    if results_store is not None:
+        with Pool(processes=processes) as pool:
+            for result in tqdm(
+                pool.imap_unordered(run_single_simulation, args_list, chunksize),
+                total=len(args_list),
+            ):
+                results_store.append(result["simulation_number"], result["series"])
+        return len(args_list)
+
+    with open(output_path, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_FIELDNAMES)
         writer.writeheader()
-        for row in all_rows:
-            writer.writerow(row)
+        with Pool(processes=processes) as pool:
+            for result in tqdm(
+                pool.imap_unordered(run_single_simulation, args_list, chunksize),
+                total=len(args_list),
+            ):
+                writer.writerows(summary_rows(result))
+                csvfile.flush()
+
+    return len(args_list)
 
 
 def main():
@@ -145,13 +314,14 @@ def main():
         "global_visible_desitions": False,
         "noise": 0.1,
         "days": 360,
+        "live_dashboard": True,
     }
 
     num_simulations = 1
-    simulation_numbers = list(range(1, num_simulations + 1))
 
-    # Crear una lista de argumentos para mapear
-    args_list = [(simulation_params, sim_num) for sim_num in simulation_numbers]
+    if num_simulations == 1:
+        run_single_simulation((simulation_params, 1))
+        return
 
     # Determinar el número de procesos (opcionalmente puedes usar cpu_count())
     num_processes = cpu_count()
@@ -160,17 +330,12 @@ def main():
         f"Ejecutando {num_simulations} simulaciones en paralelo usando {num_processes} procesos"
     )
 
-    # Usar Pool para ejecutar simulaciones en paralelo
-    run_single_simulation((simulation_params, 1))
-    # with Pool(processes=num_processes) as pool:
-    #     simulation_results = list(
-    #         tqdm(
-    #             pool.imap_unordered(run_single_simulation, args_list),
-    #             total=num_simulations,
-    #         )
-    #     )
-
-    # save_simulation_summary(simulation_results)
+    # Las réplicas en paralelo no muestran la gráfica
+    run_sweep(
+        [{**simulation_params, "live_dashboard": False}],
+        replicas=num_simulations,
+        processes=num_processes,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+"""
+This module contains the LogWriter class, which streams the log of a simulation to disk.
+"""
+
+import atexit
+from collections.abc import Callable
+import gzip
+import struct
+import numpy as np
+
+from event_log import LoggedEvent, NO_ACTION
+from utils import Action, EventType
+
+# Días en memoria entre dos escrituras del log
+DEFAULT_BUFFER_DAYS: int = 50
+
+# day, event type, resources, number of participations
+_HEADER = struct.Struct("<iBqi")
+_ACTIONS: tuple[Action, ...] = tuple(Action)
+_EVENT_TYPES: tuple[EventType, ...] = tuple(EventType)
+
+
+def format_event(event: LoggedEvent, find_agent: Callable[[int], object]) -> str:
+    """
+    Returns the text of one day of the log. find_agent returns the agent (or
+    its archived record) of an id stored in the log.
+    """
+    log_text = [f"Day: {event.day}\n", f"Event: {event}\n"]
+    for agent, action in event.decisions.items():
+        log_text.append(f"\tAgent {agent}: {action} ( {find_agent(agent)} )\n")
+    return "".join(log_text)
+
+
+class LogWriter:
+    """
+    Appends the event and decisions of every day to the log files while the
+    simulation runs, instead of building the whole log in memory at the end.
+
+    The human-readable log is written to path. With binary_path, a gzip
+    compressed binary log with the day, event type, resources and the agent,
+    group and action code of every participation is written too; it can be
+    read back with read_binary_log. The writes are buffered and flushed every
+    buffer_days days and when the writer is closed, which also happens at
+    interpreter exit, so an interrupted run keeps everything up to its last
+    flush.
+
+    Attributes:
+        path (str | None): Path of the text log.
+        binary_path (str | None): Path of the compressed binary log.
+        buffer_days (int): Days kept in memory between flushes.
+        echo (bool): Whether every day is also printed.
+    """
+
+    def __init__(
+        self,
+        path: str | None = "log.txt",
+        binary_path: str | None = None,
+        buffer_days: int = DEFAULT_BUFFER_DAYS,
+        echo: bool = False,
+    ):
+        self.path: str | None = path
+        self.binary_path: str | None = binary_path
+        self.buffer_days: int = buffer_days
+        self.echo: bool = echo
+        self.text_file = (
+            open(path, "w", encoding="ISO-8859-1") if path is not None else None
+        )
+        self.binary_file = (
+            gzip.open(binary_path, "wb") if binary_path is not None else None
+        )
+        self.text_buffer: list[str] = []
+        self.binary_buffer: list[bytes] = []
+        self.buffered_days: int = 0
+        self.closed: bool = False
+        atexit.register(self.close)
+
+    def write_event(
+        self, event: LoggedEvent, find_agent: Callable[[int], object]
+    ) -> None:
+        if self.text_file is not None or self.echo:
+            text = format_event(event, find_agent)
+            if self.echo:
+                print(text, end="")
+            if self.text_file is not None:
+                self.text_buffer.append(text)
+
+        if self.binary_file is not None:
+            members = [
+                (agent, group)
+                for group, agents_in_group in enumerate(event.groups)
+                for agent in agents_in_group
+            ]
+            self.binary_buffer.append(
+                _HEADER.pack(
+                    event.day,
+                    event.event_type.value,
+                    event.resources,
+                    len(members),
+                )
+            )
+            self.binary_buffer.append(
+                np.fromiter(
+                    (agent for agent, _ in members), dtype="<i4", count=len(members)
+                ).tobytes()
+            )
+            self.binary_buffer.append(
+                np.fromiter(
+                    (group for _, group in members), dtype="<i4", count=len(members)
+                ).tobytes()
+            )
+            self.binary_buffer.append(
+                np.fromiter(
+                    (
+                        (
+                            event.decisions[agent].value
+                            if agent in event.decisions
+                            else NO_ACTION
+                        )
+                        for agent, _ in members
+                    ),
+                    dtype="<i1",
+                    count=len(members),
+                ).tobytes()
+            )
+
+        self.buffered_days += 1
+        if self.buffered_days >= self.buffer_days:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.text_file is not None and self.text_buffer:
+            self.text_file.write("".join(self.text_buffer))
+            self.text_file.flush()
+            self.text_buffer = []
+        if self.binary_file is not None and self.binary_buffer:
+            self.binary_file.write(b"".join(self.binary_buffer))
+            self.binary_file.flush()
+            self.binary_buffer = []
+        self.buffered_days = 0
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.flush()
+        for file in (self.text_file, self.binary_file):
+            if file is not None:
+                file.close()
+        self.closed = True
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "LogWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def read_binary_log(path: str):
+    """
+    Yields the LoggedEvents stored in a binary log written by LogWriter.
+    """
+    with gzip.open(path, "rb") as file:
+        while header := file.read(_HEADER.size):
+            day, event_type, resources, count = _HEADER.unpack(header)
+            agents = np.frombuffer(file.read(4 * count), dtype="<i4").tolist()
+            groups = np.frombuffer(file.read(4 * count), dtype="<i4").tolist()
+            actions = np.frombuffer(file.read(count), dtype="<i1").tolist()
+
+            event_groups: list[list[int]] = []
+            decisions: dict[int, Action] = {}
+            last_group = -1
+            for agent, group, code in zip(agents, groups, actions):
+                if group != last_group:
+                    event_groups.append([])
+                    last_group = group
+                event_groups[-1].append(agent)
+                if code != NO_ACTION:
+                    decisions[agent] = _ACTIONS[code]
+            yield LoggedEvent(
+                day, _EVENT_TYPES[event_type], resources, event_groups, decisions
+            )
@@ -0,0 +1,78 @@
+"""
+This module contains the random number streams used to make simulations reproducible.
+"""
+
+import random
+import zlib
+import numpy as np
+
+
+class RandomStream(random.Random):
+    """
+    random.Random paired with a NumPy Generator seeded from the same SeedSequence.
+
+    It offers the usual random module methods (random, randint, choice, sample,
+    shuffle, uniform, choices...) plus poisson, so a component only needs one
+    object for all its randomness.
+
+    Attributes:
+        seed_sequence (np.random.SeedSequence): Sequence the stream was seeded from.
+        generator (np.random.Generator): NumPy generator for vectorized draws.
+    """
+
+    def __init__(self, seed: int | np.random.SeedSequence | None = None):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence: np.random.SeedSequence = seed
+        self.generator: np.random.Generator = np.random.default_rng(seed)
+        super().__init__(int.from_bytes(seed.generate_state(4).tobytes(), "little"))
+
+    def poisson(self, lam: float) -> int:
+        return int(self.generator.poisson(lam))
+
+    def __reduce__(self):
+        return _restore_stream, (
+            self.seed_sequence,
+            self.getstate(),
+            self.generator.bit_generator.state,
+        )
+
+
+def _restore_stream(seed_sequence, state, generator_state) -> RandomStream:
+    stream = RandomStream(seed_sequence)
+    stream.setstate(state)
+    stream.generator.bit_generator.state = generator_state
+    return stream
+
+
+class RandomStreams:
+    """
+    Factory of independent, named RandomStreams derived from a single seed.
+
+    Every component asks for its own stream by name, so adding draws to one
+    component does not shift the numbers seen by the others. Replicas of the
+    same seed get independent streams through the replica number.
+
+    Attributes:
+        seed (int): Root entropy; when no seed is given it is drawn from the OS
+            and can be read back to reproduce the run.
+        replica (int): Replica number mixed into every stream.
+    """
+
+    def __init__(self, seed: int | None = None, replica: int = 0):
+        self.seed: int = np.random.SeedSequence(seed).entropy
+        self.replica: int = replica
+        self.streams: dict[str, RandomStream] = {}
+
+    def stream(self, name: str) -> RandomStream:
+        if name not in self.streams:
+            self.streams[name] = RandomStream(
+                np.random.SeedSequence(
+                    self.seed, spawn_key=(self.replica, zlib.crc32(name.encode()))
+                )
+            )
+        return self.streams[name]
+
+
+# Stream used by the components that are created without one
+default_stream: RandomStream = RandomStream()
@@ -0,0 +1,201 @@
+"""
+This module contains the recording schedules, which choose the days whose summary is kept, and the TimeSeries that stores it.
+"""
+
+from abc import ABC, abstractmethod
+import csv
+import numpy as np
+
+# Días registrados por defecto
+DEFAULT_RECORD_DAYS: list[int] = [1, 90, 180, 270, 360, 450, 540, 630, 720]
+
+
+class RecordingSchedule(ABC):
+    """
+    Chooses the days of a simulation whose summary is recorded.
+    """
+
+    @abstractmethod
+    def should_record(self, day: int) -> bool:
+        pass
+
+    def count(self, days: int, first_day: int = 1) -> int:
+        """
+        Returns how many of the days first_day..first_day + days - 1 are recorded.
+        """
+        return sum(
+            1 for day in range(first_day, first_day + days) if self.should_record(day)
+        )
+
+
+class EveryDays(RecordingSchedule):
+    """
+    Records the first day and every day multiple of every.
+    """
+
+    def __init__(self, every: int):
+        self.every: int = every
+
+    def should_record(self, day: int) -> bool:
+        return day == 1 or day % self.every == 0
+
+    def count(self, days: int, first_day: int = 1) -> int:
+        last_day: int = first_day + days - 1
+        multiples: int = last_day // self.every - (first_day - 1) // self.every
+        return multiples + (1 if first_day <= 1 <= last_day and self.every > 1 else 0)
+
+
+class LogSpacedDays(RecordingSchedule):
+    """
+    Records about count days spaced logarithmically between the first day and
+    last_day, so the start of the simulation is sampled more densely.
+    """
+
+    def __init__(self, count: int, last_day: int):
+        self.days: frozenset[int] = frozenset(
+            np.unique(np.rint(np.geomspace(1, last_day, count))).astype(int).tolist()
+        )
+
+    def should_record(self, day: int) -> bool:
+        return day in self.days
+
+
+class ExplicitDays(RecordingSchedule):
+    """
+    Records the given days.
+    """
+
+    def __init__(self, days):
+        self.days: frozenset[int] = frozenset(days)
+
+    def should_record(self, day: int) -> bool:
+        return day in self.days
+
+
+class AllDays(RecordingSchedule):
+    """
+    Records every day.
+    """
+
+    def should_record(self, day: int) -> bool:
+        return True
+
+    def count(self, days: int, first_day: int = 1) -> int:
+        return days
+
+
+class TimeSeries:
+    """
+    Summaries of the recorded days of a run stored as columns in preallocated
+    NumPy arrays, one row per recorded day.
+
+    The columns are day, avg_resources, total_thefts and agents_alive plus a
+    count_<type> and avg_resources_<type> column for each agent type. The
+    columns of a type that appears later are filled with zeros for the
+    previous days.
+
+    Attributes:
+        columns (dict[str, np.ndarray]): The arrays of each column, with room
+            for more rows than len(self).
+    """
+
+    base_columns: dict[str, type] = {
+        "day": np.int64,
+        "avg_resources": np.float64,
+        "total_thefts": np.int64,
+        "agents_alive": np.int64,
+    }
+
+    def __init__(self, agent_types=(), capacity: int = 64):
+        self.size: int = 0
+        self.columns: dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype)
+            for name, dtype in self.base_columns.items()
+        }
+        self.agent_types: list[str] = []
+        for agent_type in agent_types:
+            self.add_agent_type(agent_type)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def capacity(self) -> int:
+        return len(self.columns["day"])
+
+    def reserve(self, capacity: int) -> None:
+        if capacity <= self.capacity():
+            return
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            self.columns[name] = grown
+
+    def add_agent_type(self, agent_type: str) -> None:
+        self.agent_types.append(agent_type)
+        self.columns[f"count_{agent_type}"] = np.zeros(self.capacity(), np.int64)
+        self.columns[f"avg_resources_{agent_type}"] = np.zeros(
+            self.capacity(), np.float64
+        )
+
+    def append(self, summary: dict) -> None:
+        """
+        Adds a row with a summary as returned by Simulator.collect_summary_data.
+        """
+        if self.size == self.capacity():
+            self.reserve(2 * self.capacity())
+        row: int = self.size
+        for name in self.base_columns:
+            self.columns[name][row] = summary[name]
+        for agent_type in summary["agent_type_counts"]:
+            if f"count_{agent_type}" not in self.columns:
+                self.add_agent_type(agent_type)
+        for agent_type, count in summary["agent_type_counts"].items():
+            self.columns[f"count_{agent_type}"][row] = count
+        for agent_type, resources in summary["agent_type_avg_resources"].items():
+            self.columns[f"avg_resources_{agent_type}"][row] = resources
+        self.size += 1
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name][: self.size]
+
+    def to_dict(self) -> dict[str, np.ndarray]:
+        return {name: column[: self.size] for name, column in self.columns.items()}
+
+    def to_rows(self, **extra) -> list[dict]:
+        """
+        Returns the rows as dicts, with the extra fields added to each row.
+        """
+        names: list[str] = list(self.columns)
+        values = zip(*(self.columns[name][: self.size].tolist() for name in names))
+        return [{**extra, **dict(zip(names, row))} for row in values]
+
+    def to_csv(self, path: str, **extra) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=[*extra, *self.columns])
+            writer.writeheader()
+            writer.writerows(self.to_rows(**extra))
+
+    def to_npz(self, path: str) -> None:
+        np.savez_compressed(path, **self.to_dict())
+
+    def to_parquet(self, path: str) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError(
+                "pyarrow is needed to export to Parquet, use to_npz or to_csv instead."
+            ) from error
+        pyarrow.parquet.write_table(pyarrow.table(self.to_dict()), path)
+
+    @classmethod
+    def from_npz(cls, path: str) -> "TimeSeries":
+        with np.load(path) as data:
+            columns: dict[str, np.ndarray] = {name: data[name] for name in data.files}
+        series = cls(capacity=len(columns["day"]))
+        series.columns = columns
+        series.agent_types = [
+            name[len("count_") :] for name in columns if name.startswith("count_")
+        ]
+        series.size = len(columns["day"])
+        return series
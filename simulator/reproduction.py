@@ -0,0 +1,218 @@
+"""
+This module contains the reproduction policies, which choose the agents born on a reproduction day.
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+
+from agents.agent import Agent, BDIAgent
+from enviroment import Enviroment
+from random_streams import RandomStream
+
+# Starting resources of the newborns of a type without alive agents
+DEFAULT_RESOURCES: int = 450
+
+
+def agent_classes(base: type[Agent] = BDIAgent) -> dict[str, type[Agent]]:
+    """
+    Returns every subclass of base, at any depth, by its name.
+    """
+    classes: dict[str, type[Agent]] = {}
+    pending: list[type[Agent]] = [base]
+    while pending:
+        for subclass in pending.pop().__subclasses__():
+            classes.setdefault(subclass.__name__, subclass)
+            pending.append(subclass)
+    return classes
+
+
+class ReproductionPolicy(ABC):
+    """
+    Chooses the types of the agents born on a reproduction day and builds
+    them.
+
+    The classes are looked up in a name registry built when the policy is
+    created, and the cohort is drawn and given its starting resources with
+    vectorized draws, so a reproduction day costs one call per cohort.
+
+    Attributes:
+        classes (dict[str, type[Agent]]): Agent classes by name.
+        variation (float): Maximum relative variation of the starting
+            resources of a newborn around the mean of its type.
+    """
+
+    def __init__(self, variation: float = 0.1):
+        self.classes: dict[str, type[Agent]] = agent_classes()
+        self.variation: float = variation
+
+    @abstractmethod
+    def choose_types(
+        self,
+        enviroment: Enviroment,
+        type_resources: dict[str, float],
+        count: int,
+        rng: RandomStream,
+    ) -> list[str]:
+        """
+        Returns the type of each of the count newborns.
+
+        Args:
+            enviroment (Enviroment): The environment the agents are born in.
+            type_resources (dict[str, float]): Mean resources of the alive agents of each type.
+            count (int): Number of newborns.
+            rng (RandomStream): Stream used for the draws.
+        """
+
+    def reproduce(
+        self,
+        enviroment: Enviroment,
+        type_resources: dict[str, float],
+        count: int,
+        rng: RandomStream,
+        agents_rng: RandomStream,
+    ) -> tuple[list[Agent], list[int]]:
+        """
+        Returns the newborn agents and their starting resources.
+        """
+        agent_types: list[str] = self.choose_types(
+            enviroment, type_resources, count, rng
+        )
+        first_id: int = len(enviroment.agents)
+        new_agents: list[Agent] = [
+            self.classes[agent_type](first_id + index, rng=agents_rng)
+            for index, agent_type in enumerate(agent_types)
+        ]
+        return new_agents, self.initial_resources(agent_types, type_resources, rng)
+
+    def initial_resources(
+        self,
+        agent_types: list[str],
+        type_resources: dict[str, float],
+        rng: RandomStream,
+    ) -> list[int]:
+        # The mean resources of the type with a little variation
+        means = np.array(
+            [
+                type_resources.get(agent_type, DEFAULT_RESOURCES)
+                for agent_type in agent_types
+            ],
+            dtype=float,
+        )
+        variation = rng.generator.uniform(
+            -self.variation, self.variation, len(agent_types)
+        )
+        return (means * (1 + variation)).astype(np.int64).tolist()
+
+
+class FitnessProportional(ReproductionPolicy):
+    """
+    Each newborn is of a type with probability proportional to the mean
+    resources of the alive agents of that type.
+    """
+
+    def choose_types(
+        self,
+        enviroment: Enviroment,
+        type_resources: dict[str, float],
+        count: int,
+        rng: RandomStream,
+    ) -> list[str]:
+        agent_types: list[str] = list(type_resources)
+        if not agent_types or count <= 0:
+            return []
+        weights = np.clip(np.array(list(type_resources.values()), dtype=float), 0, None)
+        if weights.sum() <= 0:
+            weights = np.ones(len(agent_types))
+        chosen = rng.generator.choice(
+            len(agent_types), size=count, p=weights / weights.sum()
+        )
+        return [agent_types[index] for index in chosen.tolist()]
+
+
+class Tournament(ReproductionPolicy):
+    """
+    Each newborn is of the type of the richest of size alive agents drawn at
+    random.
+
+    Attributes:
+        size (int): Agents in each tournament.
+    """
+
+    def __init__(self, size: int = 3, variation: float = 0.1):
+        super().__init__(variation)
+        self.size: int = size
+
+    def choose_types(
+        self,
+        enviroment: Enviroment,
+        type_resources: dict[str, float],
+        count: int,
+        rng: RandomStream,
+    ) -> list[str]:
+        alive = np.asarray(enviroment.agents_alive, dtype=np.int64)
+        if len(alive) == 0 or count <= 0:
+            return []
+        resources = np.asarray(enviroment.public_resources)[alive]
+        contestants = rng.generator.integers(0, len(alive), (count, self.size))
+        winners = contestants[
+            np.arange(count), np.argmax(resources[contestants], axis=1)
+        ]
+        return [
+            type(enviroment.agents[agent]).__name__ for agent in alive[winners].tolist()
+        ]
+
+
+class DesireMutation(ReproductionPolicy):
+    """
+    Chooses the newborns with another policy and mutates the desire weights of
+    some of them, multiplying each weight by a log-normal factor.
+
+    Attributes:
+        policy (ReproductionPolicy): Policy that chooses the newborns.
+        rate (float): Probability of a newborn being mutated.
+        scale (float): Standard deviation of the logarithm of the factor.
+    """
+
+    def __init__(
+        self,
+        policy: ReproductionPolicy | None = None,
+        rate: float = 0.1,
+        scale: float = 0.2,
+    ):
+        self.policy: ReproductionPolicy = policy or FitnessProportional()
+        super().__init__(self.policy.variation)
+        self.rate: float = rate
+        self.scale: float = scale
+
+    def choose_types(
+        self,
+        enviroment: Enviroment,
+        type_resources: dict[str, float],
+        count: int,
+        rng: RandomStream,
+    ) -> list[str]:
+        return self.policy.choose_types(enviroment, type_resources, count, rng)
+
+    def reproduce(
+        self,
+        enviroment: Enviroment,
+        type_resources: dict[str, float],
+        count: int,
+        rng: RandomStream,
+        agents_rng: RandomStream,
+    ) -> tuple[list[Agent], list[int]]:
+        new_agents, resources = super().reproduce(
+            enviroment, type_resources, count, rng, agents_rng
+        )
+        mutated = rng.generator.random(len(new_agents)) < self.rate
+        for agent, mutate in zip(new_agents, mutated.tolist()):
+            if mutate and isinstance(agent, BDIAgent):
+                factors = rng.generator.lognormal(0, self.scale, len(agent.desires))
+                agent.desires = {
+                    desire: weight * factor
+                    for (desire, weight), factor in zip(
+                        agent.desires.items(), factors.tolist()
+                    )
+                }
+                agent.resolve_desires()
+        return new_agents, resources
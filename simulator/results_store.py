@@ -0,0 +1,192 @@
+"""
+This module contains the ResultsStore class, the columnar store of the summaries of a sweep.
+"""
+
+import os
+import re
+import numpy as np
+
+# Tipos de agente con columnas en el esquema por defecto
+DEFAULT_AGENT_TYPES: list[str] = [
+    "PusilanimeAgent",
+    "ThiefAgent",
+    "TipForTapAgent",
+    "TipForTapSecureAgent",
+    "RandomAgent",
+    "ABRAgent",
+    "SearchAgent",
+    "ResentfulAgent",
+    "ExploteAgent",
+]
+
+CHUNK_PATTERN = re.compile(r"simulation_(\d+)\.(parquet|npz)$")
+
+
+def summary_schema(agent_types=DEFAULT_AGENT_TYPES) -> dict[str, np.dtype]:
+    """
+    Returns the dtype of every column of the summary of a day, with a
+    count_<type> and avg_resources_<type> column for each agent type.
+    """
+    schema: dict[str, np.dtype] = {
+        "simulation_number": np.dtype(np.int64),
+        "day": np.dtype(np.int64),
+        "avg_resources": np.dtype(np.float64),
+        "total_thefts": np.dtype(np.int64),
+        "agents_alive": np.dtype(np.int64),
+    }
+    for agent_type in agent_types:
+        schema[f"count_{agent_type}"] = np.dtype(np.int64)
+    for agent_type in agent_types:
+        schema[f"avg_resources_{agent_type}"] = np.dtype(np.float64)
+    return schema
+
+
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ResultsStore:
+    """
+    Directory with the summaries of the simulations of a sweep, one chunk of
+    typed columns per simulation.
+
+    Each finished simulation is written at once as its own chunk, a Parquet
+    file when pyarrow is installed and a NumPy .npz file otherwise, so
+    nothing is kept in memory until the sweep ends and no text is parsed
+    when reading. The chunk of a simulation is found by its file name, so a
+    read filtered by simulation_number only opens those chunks, and only the
+    requested columns are loaded from them.
+
+    Attributes:
+        path (str): Directory of the store.
+        schema (dict[str, np.dtype]): Dtype of every column.
+        format (str): "parquet" or "npz", format of the new chunks.
+    """
+
+    def __init__(self, path: str, agent_types=DEFAULT_AGENT_TYPES, format=None):
+        self.path: str = path
+        self.schema: dict[str, np.dtype] = summary_schema(agent_types)
+        if format is None:
+            format = "parquet" if has_pyarrow() else "npz"
+        if format not in ("parquet", "npz"):
+            raise ValueError(f"Unknown results format: {format}")
+        if format == "parquet" and not has_pyarrow():
+            raise ImportError("pyarrow is needed to store the results as Parquet.")
+        self.format: str = format
+        os.makedirs(path, exist_ok=True)
+
+    def chunk_path(self, simulation_number: int) -> str:
+        return os.path.join(
+            self.path, f"simulation_{simulation_number:06d}.{self.format}"
+        )
+
+    def chunks(self) -> dict[int, str]:
+        """
+        Returns the path of the chunk of every stored simulation by its number.
+        """
+        chunks: dict[int, str] = {}
+        for name in sorted(os.listdir(self.path)):
+            match = CHUNK_PATTERN.match(name)
+            if match:
+                chunks[int(match.group(1))] = os.path.join(self.path, name)
+        return chunks
+
+    def simulation_numbers(self) -> list[int]:
+        return sorted(self.chunks())
+
+    def append(self, simulation_number: int, series) -> None:
+        """
+        Writes the TimeSeries of a finished simulation as a new chunk. The
+        columns of the schema missing from the series are filled with zeros
+        and the ones outside the schema are dropped.
+        """
+        size: int = len(series)
+        columns: dict[str, np.ndarray] = {}
+        for name, dtype in self.schema.items():
+            if name == "simulation_number":
+                columns[name] = np.full(size, simulation_number, dtype=dtype)
+            elif name in series.columns:
+                columns[name] = series.column(name).astype(dtype)
+            else:
+                columns[name] = np.zeros(size, dtype=dtype)
+        self.write_chunk(simulation_number, columns)
+
+    def write_chunk(self, simulation_number: int, columns: dict) -> None:
+        # Se escribe en un temporal y se renombra para no dejar chunks a medias
+        path: str = self.chunk_path(simulation_number)
+        temporary: str = path + ".tmp"
+        if self.format == "parquet":
+            import pyarrow
+            import pyarrow.parquet
+
+            pyarrow.parquet.write_table(pyarrow.table(columns), temporary)
+        else:
+            with open(temporary, "wb") as file:
+                np.savez_compressed(file, **columns)
+        os.replace(temporary, path)
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        simulation_numbers=None,
+        days=None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Returns the rows of the given simulations and days as arrays by column.
+
+        Args:
+            columns (list[str] | None): Columns to load, all of them if None.
+            simulation_numbers: Simulations to read, all of them if None.
+            days: Days to keep, all of them if None.
+        """
+        columns = list(self.schema) if columns is None else list(columns)
+        chunks: dict[int, str] = self.chunks()
+        if simulation_numbers is not None:
+            chunks = {
+                number: chunks[number]
+                for number in sorted(set(simulation_numbers))
+                if number in chunks
+            }
+        day_values = None if days is None else np.asarray(list(days), dtype=np.int64)
+
+        parts: list[dict[str, np.ndarray]] = [
+            self.read_chunk(path, columns, day_values) for path in chunks.values()
+        ]
+        return {
+            name: (
+                np.concatenate([part[name] for part in parts])
+                if parts
+                else np.zeros(0, dtype=self.schema.get(name, np.float64))
+            )
+            for name in columns
+        }
+
+    def read_chunk(
+        self, path: str, columns: list[str], days: np.ndarray | None
+    ) -> dict[str, np.ndarray]:
+        loaded = columns if days is None or "day" in columns else [*columns, "day"]
+        if path.endswith(".parquet"):
+            import pyarrow.parquet
+
+            filters = None if days is None else [("day", "in", days.tolist())]
+            table = pyarrow.parquet.read_table(path, columns=columns, filters=filters)
+            return {name: table.column(name).to_numpy() for name in columns}
+
+        with np.load(path) as data:
+            chunk: dict[str, np.ndarray] = {name: data[name] for name in loaded}
+        if days is not None:
+            mask = np.isin(chunk["day"], days)
+            chunk = {name: values[mask] for name, values in chunk.items()}
+        return {name: chunk[name] for name in columns}
+
+    def to_pandas(self, columns=None, simulation_numbers=None, days=None):
+        """
+        Returns the result of read as a pandas DataFrame.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.read(columns, simulation_numbers, days))
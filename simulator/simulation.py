@@ -1,6 +1,7 @@
+from collections.abc import Callable
+
 from agents.agent import (
     Agent,
-    BDIAgent,
     PusilanimeAgent,
     RandomAgent,
     ThiefAgent,
@@ -19,31 +20,21 @@ from event_generator import (
     Event,
     EventInfo,
 )
-from enviroment import Enviroment, EnviromentInfo
-from utils import group_prisioners_game, Action
-import random
-from stats import Stats
+from enviroment import Enviroment, ArrayEnviroment
+from event_log import EventLog
+from log_writer import LogWriter, format_event, DEFAULT_BUFFER_DAYS
+from utils import batch_group_prisioners_game, Action
+from stats import Stats, MetricsSink, AGENT_COLORS
+from random_streams import RandomStream, RandomStreams, default_stream
+from reproduction import ReproductionPolicy, FitnessProportional
+from type_totals import TypeTotals
+from recording import RecordingSchedule, ExplicitDays, TimeSeries, DEFAULT_RECORD_DAYS
 
 from gemini import make_history
 
 
-def dict_to_string(log: dict, agents: list[Agent]) -> str:
-    log_text = []
-    day = 1
-    for event, decisions in log.items():
-        # Convertir el evento a string
-        log_text.append(f"Day: {day}\n")
-        day += 1
-        event_str = str(event)
-        log_text.append(f"Event: {event_str}\n")
-
-        # Convertir el dict de decisiones a string
-        for agent, action in decisions.items():
-            agent_str = str(agent)
-            action_str = str(action)
-            log_text.append(f"\tAgent {agent_str}: {action_str} ( {agents[agent]} )\n")
-
-    return "".join(log_text)
+def dict_to_string(log: EventLog, find_agent: Callable[[int], object]) -> str:
+    return "".join(format_event(event, find_agent) for event in log)
 
 
 class Simulator:
@@ -58,252 +49,240 @@ class Simulator:
         max_population: int,
         global_visible_desitions: bool,
         noise: float,
+        array_state: bool = False,
+        sinks: list[MetricsSink] | None = None,
+        seed: int | RandomStreams | None = None,
+        log_days: int | None = DEFAULT_BUFFER_DAYS,
+        log_path: str | None = "log.txt",
+        binary_log_path: str | None = None,
+        compaction_interval: int | None = 100,
+        reproduction_policy: ReproductionPolicy | None = None,
+        record_schedule: RecordingSchedule | None = None,
     ) -> None:
+        # Every component draws from its own stream, so a seed reproduces the
+        # whole trajectory
+        self.streams: RandomStreams = (
+            seed if isinstance(seed, RandomStreams) else RandomStreams(seed)
+        )
+        self.rng: RandomStream = self.streams.stream("simulator")
+        self.agents_rng: RandomStream = self.streams.stream("agents")
+        for agent in agents:
+            agent.set_rng(self.agents_rng)
         self.event_generator: EventGenerator = event_generator
-        self.enviroment = Enviroment(agents, lost_per_day)
+        # Un generador creado con su propio stream lo conserva; los demás
+        # sacan sus eventos del stream "events" de la semilla
+        if self.event_generator.rng is default_stream:
+            self.event_generator.rng = self.streams.stream("events")
+        enviroment_class = ArrayEnviroment if array_state else Enviroment
+        self.enviroment: Enviroment = enviroment_class(
+            agents, lost_per_day, self.streams.stream("enviroment"), log_days
+        )
         self.lost_per_day: int = lost_per_day
-        self.stats = Stats(self.enviroment)
+        self.stats = Stats(self.enviroment, sinks)
         self.thief_toleration: int = thief_toleration
         self.reproduction_rate: int = reproduction_rate
         self.reproduction_density: int = reproduction_density
+        self.reproduction_policy: ReproductionPolicy = (
+            reproduction_policy or FitnessProportional()
+        )
         self.max_population: int = max_population
         self.global_visible_desitions: bool = global_visible_desitions
-        self.record_days: list[int] = [1, 90, 180, 270, 360, 450, 540, 630, 720]
+        self.record_schedule: RecordingSchedule = record_schedule or ExplicitDays(
+            DEFAULT_RECORD_DAYS
+        )
         self.summary_data: list = []
+        self.series: TimeSeries = TimeSeries(AGENT_COLORS)
         self.total_thefts = 0
         self.noise: float = noise
+        self.log_path: str | None = log_path
+        self.binary_log_path: str | None = binary_log_path
+        # Se abre en la primera ejecución y se mantiene entre llamadas a run,
+        # así una segunda ejecución continúa el log en vez de sobrescribirlo
+        self.log_writer: LogWriter | None = None
+        self.compaction_interval: int | None = compaction_interval
 
     def collect_summary_data(self, day):
-        agents_alive = self.enviroment.agents_alive
-        public_resources = self.enviroment.public_resources
-
-        # Calcular recursos totales y promedio
-        total_resources = sum([public_resources[agent] for agent in agents_alive])
-        avg_resources = total_resources / len(agents_alive) if agents_alive else 0
-
-        # Contar agentes por tipo
-        agent_type_counts = {}
-        agent_type_resources = {}
-        for agent_id in agents_alive:
-            agent_type = type(self.enviroment.agents[agent_id]).__name__
-            agent_type_counts[agent_type] = agent_type_counts.get(agent_type, 0) + 1
-            agent_type_resources.setdefault(agent_type, []).append(
-                public_resources[agent_id]
-            )
-
-        # Calcular recursos promedio por tipo de agente
-        agent_type_avg_resources = {}
-        for agent_type, resources in agent_type_resources.items():
-            agent_type_avg_resources[agent_type] = sum(resources) / len(resources)
+        # Los totales por tipo se mantienen en el entorno, no hace falta
+        # recorrer todos los agentes
+        type_totals: TypeTotals = self.enviroment.type_totals
+        agents_alive: int = len(self.enviroment.agents_alive)
+        avg_resources = (
+            type_totals.total_resources / agents_alive if agents_alive else 0
+        )
 
         # Crear un diccionario con los datos recopilados
         data = {
             "day": day,
             "avg_resources": avg_resources,
-            "agent_type_counts": agent_type_counts,
+            "agent_type_counts": type_totals.counts_by_type(),
             "total_thefts": self.total_thefts,
-            "agents_alive": len(agents_alive),
-            "agent_type_avg_resources": agent_type_avg_resources,
+            "agents_alive": agents_alive,
+            "agent_type_avg_resources": type_totals.mean_resources_by_type(),
         }
 
         return data
 
     def run(self, days: int, verbose=False) -> dict:
-        for _ in range(days):
-
-            self.enviroment.next_day()
-            # if verbose:
-            # print("Day: ", self.enviroment.day)
-            new_event: Event = self.event_generator.GetNewEvent(
-                self.enviroment.agents_alive,
-                self.thief_toleration,
-                self.enviroment.global_reputation,
-                self.enviroment.trust_matrix,
-            )
-            if verbose:
-                # print("Trust: ", self.enviroment.trust_matrix)
-                print("Event: ", new_event)
-
-            if new_event.event_type == EventType.COOP:
-                self.decide(new_event, verbose)
-                resources = self.play_the_game(new_event)
+        # El log se escribe día a día, así una ejecución interrumpida también
+        # deja su log
+        if self.log_writer is None:
+            self.log_writer = LogWriter(self.log_path, self.binary_log_path)
+        log_writer = self.log_writer
+        log_writer.echo = verbose
+        self.series.reserve(
+            len(self.series)
+            + self.record_schedule.count(days, first_day=self.enviroment.day + 1)
+        )
+        try:
+            for _ in range(days):
 
-            elif new_event.event_type == EventType.SPECIAL:
-                resources = {}
-                special_agent: list[int] = random.sample(
+                self.enviroment.next_day()
+                # if verbose:
+                # print("Day: ", self.enviroment.day)
+                new_event: Event = self.event_generator.GetNewEvent(
                     self.enviroment.agents_alive,
-                    random.randint(1, len(self.enviroment.agents_alive)),
+                    self.thief_toleration,
+                    self.enviroment.global_reputation,
+                    self.enviroment.trust_matrix,
                 )
-                for agent in special_agent:
-                    resources[agent] = new_event.resources // len(
-                        self.enviroment.agents_alive
+                if verbose:
+                    # print("Trust: ", self.enviroment.trust_matrix)
+                    print("Event: ", new_event)
+
+                if new_event.event_type == EventType.COOP:
+                    self.decide(new_event, verbose)
+                    resources = self.play_the_game(new_event)
+
+                elif new_event.event_type == EventType.SPECIAL:
+                    resources = {}
+                    special_agent: list[int] = self.rng.sample(
+                        self.enviroment.agents_alive,
+                        self.rng.randint(1, len(self.enviroment.agents_alive)),
                     )
-                self.enviroment.log[new_event] = {}
-
-            self.update_enviroment(resources)
-
-            if new_event.event_type == EventType.COOP:
-                for group in new_event.groups:
-                    for agent in group:
-                        visible_desitions: dict[int, Action] = (
-                            self.get_visible_desitions(
-                                new_event,
-                                agent,
-                                self.global_visible_desitions,
-                                self.noise,
-                            )
+                    for agent in special_agent:
+                        resources[agent] = new_event.resources // len(
+                            self.enviroment.agents_alive
                         )
-                        self.enviroment.agents[agent].passive_action(
-                            EnviromentInfo(
-                                self.enviroment.day,
-                                self.enviroment.lost_per_day,
-                                self.enviroment.public_resources,
-                                self.enviroment.agents_alive,
-                                self.enviroment.trust_matrix,
-                                self.enviroment.global_reputation,
-                            ),
-                            visible_desitions,
-                        )
-            if verbose:
-                print(f"Public resources: {self.enviroment.public_resources}")
-            if not self.enviroment.agents_alive:
-                return self.enviroment.log
-            # Graficas:
-            if new_event.event_type == EventType.COOP:
-                self.stats.plot_agent_resources(new_event, self.enviroment)
-
-            self.actual_summary_data = self.collect_summary_data(self.enviroment.day)
+                    self.enviroment.log.record_event(
+                        self.enviroment.day, new_event.event_type, new_event.resources
+                    )
+                    self.enviroment.log.record_groups(
+                        new_event.groups, agents=self.enviroment.agents
+                    )
 
-            if self.enviroment.day in self.record_days:
-                # Añadir el diccionario a la lista summary_data
-                self.summary_data.append(self.actual_summary_data)
+                log_writer.write_event(
+                    self.enviroment.log.last_event(), self.enviroment.find_agent
+                )
+                self.update_enviroment(resources)
+
+                if new_event.event_type == EventType.COOP:
+                    for group in new_event.groups:
+                        for agent in group:
+                            visible_desitions: dict[int, Action] = (
+                                self.get_visible_desitions(
+                                    new_event,
+                                    agent,
+                                    self.global_visible_desitions,
+                                    self.noise,
+                                )
+                            )
+                            self.enviroment.agents[agent].passive_action(
+                                self.enviroment.get_enviroment_from(agent),
+                                visible_desitions,
+                            )
+                if verbose:
+                    print(f"Public resources: {self.enviroment.public_resources}")
+                if not self.enviroment.agents_alive:
+                    break
+                # Graficas:
+                if new_event.event_type == EventType.COOP:
+                    self.stats.record_day(new_event, self.enviroment)
+
+                self.actual_summary_data = self.collect_summary_data(
+                    self.enviroment.day
+                )
 
-        if verbose:
-            print(dict_to_string(self.enviroment.log, self.enviroment.agents))
-        with open("log.txt", "w", encoding="ISO-8859-1") as f:
-            f.write(dict_to_string(self.enviroment.log, self.enviroment.agents))
+                if self.record_schedule.should_record(self.enviroment.day):
+                    # Añadir el diccionario a la lista summary_data
+                    self.summary_data.append(self.actual_summary_data)
+                    self.series.append(self.actual_summary_data)
+
+                # Los agentes muertos se archivan y los ids se compactan
+                if (
+                    self.compaction_interval
+                    and self.enviroment.day % self.compaction_interval == 0
+                ):
+                    self.enviroment.compact()
+        finally:
+            log_writer.flush()
+
+        return {
+            "log": self.enviroment.log,
+            "summary_data": self.summary_data,
+            "series": self.series,
+        }
 
-        return {"log": self.enviroment.log, "summary_data": self.summary_data}
+    def close(self) -> None:
+        """
+        Closes the log files and the metrics sinks once the simulation is over.
+        run can be called several times before, each call continues the log.
+        """
+        if self.log_writer is not None:
+            self.log_writer.close()
+        self.stats.close()
 
     def update_enviroment(self, resources) -> None:
-
-        for agent, resource in resources.items():
-            self.enviroment.public_resources[agent] += resource
-
-        for agent in self.enviroment.agents_alive:
-            self.enviroment.public_resources[agent] -= self.lost_per_day
+        self.enviroment.apply_resources(resources)
+        self.enviroment.apply_daily_upkeep()
 
         # Reproduction
         if self.enviroment.day % self.reproduction_rate == 0:
+            self.reproduce()
 
-            agent_type_avg_resources = self.actual_summary_data[
-                "agent_type_avg_resources"
-            ]
-            total_avg_resources = sum(agent_type_avg_resources.values())
-            agent_type_probabilities = {
-                agent_type: avg_resources / total_avg_resources
-                for agent_type, avg_resources in agent_type_avg_resources.items()
-            }
-
-            new_agents = []
-            for _ in range(self.reproduction_density):
-
-                agent_type = random.choices(
-                    list(agent_type_probabilities.keys()),
-                    weights=list(agent_type_probabilities.values()),
-                    k=1,
-                )[0]
-                agent_class: Agent = next(
-                    cls
-                    for cls in BDIAgent.__subclasses__()
-                    if cls.__name__ == agent_type
-                )
-                new_agents.append(
-                    agent_class(len(self.enviroment.agents) + len(new_agents))
-                )
-
-            self.add_agents(new_agents)
+        self.enviroment.remove_dead(self.max_population)
 
-        # Eliminar los n agentes con menos recursos
-        overpopulation = len(self.enviroment.agents_alive) - self.max_population
-        if overpopulation > 0:
-            sorted_agents: list[int] = sorted(
-                self.enviroment.agents_alive,
-                key=lambda agent: self.enviroment.public_resources[agent],
-            )
-            agents_to_remove: list[int] = sorted_agents[:overpopulation]
-            for agent in agents_to_remove:
-                self.enviroment.public_resources[agent] = 0
-
-        self.enviroment.agents_alive = [
-            agent
-            for agent in self.enviroment.agents_alive
-            if self.enviroment.public_resources[agent] > 0
-        ]
-
-    def add_agents(self, new_agents):
-
-        new_agents_count: int = len(new_agents)
-
-        # Add the new agents to the list of alive agents
-        self.enviroment.agents_alive.extend(
-            list(
-                range(
-                    len(self.enviroment.agents),
-                    len(self.enviroment.agents) + new_agents_count,
-                )
-            )
+    def reproduce(self) -> None:
+        new_agents, resources = self.reproduction_policy.reproduce(
+            self.enviroment,
+            self.actual_summary_data["agent_type_avg_resources"],
+            self.reproduction_density,
+            self.rng,
+            self.agents_rng,
         )
-
-        # Add the new agents to the public resources with a little variation
-        agent_type_avg_resources = self.actual_summary_data["agent_type_avg_resources"]
-        for new_agent in new_agents:
-            agent_type = type(new_agent).__name__
-            avg_resources = agent_type_avg_resources.get(agent_type, 450)
-            variation = random.uniform(-0.1, 0.1)  # 10% variation
-            self.enviroment.public_resources.append(
-                int(avg_resources * (1 + variation))
-            )
-
-        # Extend the trust matrix for existing agents
-        for row in self.enviroment.trust_matrix:
-            row.extend([50] * new_agents_count)
-
-        # Add new rows for the new agents
-        self.enviroment.trust_matrix.extend(
-            [[50] * (len(self.enviroment.agents) + new_agents_count)] * new_agents_count
-        )
-
-        # Add the new agents to the list
-        self.enviroment.agents.extend(new_agents)
-
-        self.enviroment.generation += 1
+        self.enviroment.add_agents(new_agents, resources)
 
     def play_the_game(self, new_event: Event) -> dict:
+        decisions: dict[int, Action] = self.enviroment.log.current
+        population: int = len(self.enviroment.agents_alive)
+        payoffs: list[list[int]] = batch_group_prisioners_game(
+            [[decisions[agent] for agent in group] for group in new_event.groups],
+            [
+                new_event.resources * len(group) // population
+                for group in new_event.groups
+            ],
+        )
         general_resources = {}
-        for group in new_event.groups:
-            resources: list[int] = group_prisioners_game(
-                [self.enviroment.log[new_event][agent] for agent in group],
-                new_event.resources * len(group) // len(self.enviroment.agents_alive),
-            )
-            for i, agent_id in enumerate(group):
-                general_resources[agent_id] = resources[i]
+        for group, resources in zip(new_event.groups, payoffs):
+            for agent_id, resource in zip(group, resources):
+                general_resources[agent_id] = resource
         return general_resources
 
     def decide(self, new_event: Event, verbose) -> None:
         if verbose:
             print("Desitions: {")
-        self.enviroment.log[new_event] = {}
-        for group in new_event.groups:
-            for agent in group:
-                enviroment_info: EnviromentInfo = self.enviroment.get_enviroment_from(
-                    agent
+        log: EventLog = self.enviroment.log
+        log.record_event(self.enviroment.day, new_event.event_type, new_event.resources)
+        day_actions: list[list[Action]] = self.decide_day(new_event)
+        for group_index, (group, actions) in enumerate(
+            zip(new_event.groups, day_actions)
+        ):
+            for agent, action in zip(group, actions):
+                log.record(
+                    agent,
+                    action,
+                    group_index,
+                    self.enviroment.agents[agent].external_id,
                 )
-                event_info: EventInfo = new_event.getEventInfo(agent)
-                action: Action = self.enviroment.agents[agent].active_action(
-                    enviroment_info, event_info
-                )
-                self.enviroment.log[new_event][agent] = action
 
                 if action == Action.EXPLOIT:
                     self.total_thefts += 1
@@ -319,18 +298,54 @@ class Simulator:
                         self.enviroment.agents[agent],
                         ")",
                     )
-            for agent in group:
-                for other in group:
-                    if agent != other:
-                        if self.enviroment.log[new_event][other] == Action.EXPLOIT:
-                            self.enviroment.trust_matrix[agent][other] -= 0.2
-                        elif self.enviroment.log[new_event][other] == Action.INACT:
-                            self.enviroment.trust_matrix[agent][other] += 0.05
-                        elif self.enviroment.log[new_event][other] == Action.COOP:
-                            self.enviroment.trust_matrix[agent][other] += 0.1
+        self.enviroment.trust_matrix.update_groups(new_event.groups, day_actions)
         if verbose:
             print("}")
 
+    def decide_day(self, new_event: Event) -> list[list[Action]]:
+        """
+        Returns the actions of the agents of every group of the event. The
+        agents of the whole day that share a batch key are decided together
+        with one call to the decide_batch of their class, each one with the
+        EventInfo of its group. The rest are decided one by one in the order
+        of the groups, so the agents that draw random numbers consume them in
+        the same order. No decision reads what the others decide that day, so
+        the order of the batches does not matter.
+        """
+        agents: list[Agent] = self.enviroment.agents
+        day_actions: list[list[Action | None]] = []
+        batches: dict[tuple, tuple[list, list, list]] = {}
+        for group_index, group in enumerate(new_event.groups):
+            actions: list[Action | None] = [None] * len(group)
+            day_actions.append(actions)
+            if not group:
+                continue
+            event_info: EventInfo = new_event.getEventInfo(group[0])
+            for position, agent_id in enumerate(group):
+                agent: Agent = agents[agent_id]
+                key = agent.batch_key()
+                if key is None:
+                    actions[position] = agent.active_action(
+                        self.enviroment.get_enviroment_from(agent_id), event_info
+                    )
+                    continue
+                batch = batches.get((type(agent), key))
+                if batch is None:
+                    batch = batches[(type(agent), key)] = ([], [], [])
+                batch[0].append(agent)
+                batch[1].append(event_info)
+                batch[2].append((group_index, position))
+
+        for (agent_class, _), (batch_agents, event_infos, places) in batches.items():
+            batch_actions: list[Action] = agent_class.decide_batch(
+                batch_agents,
+                self.enviroment.get_enviroment_from(batch_agents[0].agent_id),
+                event_infos,
+            )
+            for (group_index, position), action in zip(places, batch_actions):
+                day_actions[group_index][position] = action
+        return day_actions
+
     def set_reputation(self, agent: int, action: Action):
         if agent in self.enviroment.global_reputation:
             if action == Action.COOP:
@@ -352,24 +367,26 @@ class Simulator:
         self, event: Event, agent: int, get_all: bool, noise: float
     ) -> dict[int, Action]:
         if get_all:
-            log = self.enviroment.log[event].copy()
+            log = self.enviroment.log.current.copy()
             # Add missunderstanding with 10% probability
             for ag in log:
-                if random.random() < noise:
-                    log[ag] = random.choice([Action.COOP, Action.EXPLOIT, Action.INACT])
+                if self.rng.random() < noise:
+                    log[ag] = self.rng.choice(
+                        [Action.COOP, Action.EXPLOIT, Action.INACT]
+                    )
 
             return log
 
         else:
 
-            group: list[int] = event.getEventInfo(agent).group
+            group: tuple[int, ...] = event.getEventInfo(agent).group
             desitions: dict[int, Action] = {
-                agent: self.enviroment.log[event][agent] for agent in group
+                agent: self.enviroment.log.current[agent] for agent in group
             }
             # Add missunderstanding with 10% probability
             for ag in desitions:
-                if random.random() < noise:
-                    desitions[ag] = random.choice(
+                if self.rng.random() < noise:
+                    desitions[ag] = self.rng.choice(
                         [Action.COOP, Action.EXPLOIT, Action.INACT]
                     )
 
@@ -382,7 +399,9 @@ class Simulator:
         return str(self)
 
 
-def population_random_generator(length: int) -> list[Agent]:
+def population_random_generator(
+    length: int, rng: RandomStream = default_stream
+) -> list[Agent]:
     agent_classes = [
         PusilanimeAgent,
         ThiefAgent,
@@ -394,4 +413,4 @@ def population_random_generator(length: int) -> list[Agent]:
         ResentfulAgent,
         ExploteAgent,
     ]
-    return [random.choice(agent_classes)(i) for i in range(length)]
+    return [rng.choice(agent_classes)(i, rng=rng) for i in range(length)]
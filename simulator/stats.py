@@ -1,33 +1,235 @@
-import matplotlib.pyplot as plt
+import csv
+import time
 import numpy as np
-from matplotlib.widgets import Button
 
-from enviroment import Enviroment, EnviromentInfo
+from enviroment import Enviroment
 from event_generator import Event
 from utils import Action
 
+# Colores asignados a cada tipo de agente
+AGENT_COLORS: dict[str, str] = {
+    "ABRAgent": "blue",
+    "PusilanimeAgent": "green",
+    "ThiefAgent": "red",
+    "TipForTapAgent": "orange",
+    "TipForTapSecureAgent": "brown",
+    "RandomAgent": "purple",
+    "SearchAgent": "yellow",
+    "ResentfulAgent": "magenta",
+    "ExploteAgent": "cyan",
+}
+
+
+class MetricsSink:
+    """
+    Receives the metrics collected by Stats after every recorded day.
+    """
+
+    def record(self, stats: "Stats", environment: Enviroment, event: Event) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class NullSink(MetricsSink):
+    """
+    Sink that discards the metrics, used for headless runs.
+    """
+
+
+class FileSink(MetricsSink):
+    """
+    Appends one CSV row per recorded day with the metrics of that day.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        fieldnames: list[str] = [
+            "day",
+            "avg_resources",
+            "agents_alive",
+            "daily_thefts",
+            "total_thefts",
+        ]
+        fieldnames.extend(f"count_{agent_type}" for agent_type in AGENT_COLORS)
+        fieldnames.extend(f"avg_resources_{agent_type}" for agent_type in AGENT_COLORS)
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+        self.writer.writeheader()
+
+    def record(self, stats: "Stats", environment: Enviroment, event: Event) -> None:
+        row: dict = {
+            "day": stats.days[-1],
+            "avg_resources": stats.avg_resources_per_day[-1],
+            "agents_alive": stats.people_count_per_day[-1],
+            "daily_thefts": stats.thefts_per_day[-1],
+            "total_thefts": stats.total_thefts,
+        }
+        for agent_type in AGENT_COLORS:
+            row[f"count_{agent_type}"] = stats.type_counts_history[agent_type][-1]
+            row[f"avg_resources_{agent_type}"] = stats.type_resource_history[
+                agent_type
+            ][-1]
+        self.writer.writerow(row)
+
+    def close(self) -> None:
+        self.file.close()
+
 
 class Stats:
-    def __init__(self, environment: Enviroment):
+    """
+    Collects the metrics of the simulation on every COOP day and hands them to
+    its sinks. Without sinks the simulation runs headless: matplotlib is only
+    imported when a LiveDashboard is created.
+
+    Attributes:
+        days (list[int]): Recorded days.
+        avg_resources_per_day (list[float]): Mean resources of the alive agents.
+        thefts_per_day (list[int]): Agents that exploited on each recorded day.
+        people_count_per_day (list[int]): Alive agents on each recorded day.
+        type_resource_history (dict[str, list[float]]): Mean resources per agent type.
+        type_counts_history (dict[str, list[int]]): Alive agents per agent type.
+        type_resource_sum (dict[str, int]): Total resources per agent type on the last day.
+    """
+
+    def __init__(self, environment: Enviroment, sinks: list[MetricsSink] | None = None):
         self.environment = environment
+        self.sinks: list[MetricsSink] = sinks if sinks is not None else [NullSink()]
         self.days = []
         self.avg_resources_per_day = []
         self.total_thefts = 0  # Total de robos acumulados
         self.thefts_per_day = []  # Robos por día
         self.people_count_per_day = []
+        self.agent_colors = AGENT_COLORS
+        self.type_resource_history = {key: [] for key in self.agent_colors.keys()}
+        self.type_counts_history = {key: [] for key in self.agent_colors.keys()}
+        self.type_resource_sum = {key: 0 for key in self.agent_colors.keys()}
 
-        # Colores asignados a cada tipo de agente
-        self.agent_colors = {
-            "ABRAgent": "blue",
-            "PusilanimeAgent": "green",
-            "ThiefAgent": "red",
-            "TipForTapAgent": "orange",
-            "TipForTapSecureAgent": "brown",
-            "RandomAgent": "purple",
-            "SearchAgent": "yellow",
-            "ResentfulAgent": "magenta",
-            "ExploteAgent": "cyan",
-        }
+    def record_day(self, event: Event, environment: Enviroment) -> None:
+        agents_alive = environment.agents_alive
+        decisions: dict[int, Action] = environment.log.current
+
+        daily_thefts = sum(
+            1 for agent_id in agents_alive if decisions.get(agent_id) == Action.EXPLOIT
+        )
+        self.total_thefts += daily_thefts
+        self.thefts_per_day.append(daily_thefts)
+
+        # Calcular el promedio de recursos por tipo de agente
+        type_resource_sum = {key: 0 for key in self.agent_colors.keys()}
+        type_resource_sum.update(environment.type_totals.resources_by_type())
+        type_agent_count = {key: 0 for key in self.agent_colors.keys()}
+        type_agent_count.update(environment.type_totals.counts_by_type())
+        self.type_resource_sum = type_resource_sum
+
+        for agent_type in self.agent_colors.keys():
+            count = type_agent_count[agent_type]
+            self.type_resource_history[agent_type].append(
+                type_resource_sum[agent_type] / count if count > 0 else 0
+            )
+            self.type_counts_history[agent_type].append(count)
+
+        total_resources = environment.type_totals.total_resources
+        self.days.append(environment.day)
+        self.avg_resources_per_day.append(
+            total_resources / len(agents_alive) if agents_alive else 0
+        )
+        self.people_count_per_day.append(len(agents_alive))
+
+        for sink in self.sinks:
+            sink.record(self, environment, event)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+class PieArtists:
+    """
+    Pie chart made of one persistent wedge per agent type that is updated in
+    place instead of calling ax.pie on every frame.
+    """
+
+    def __init__(self, ax, colors: dict[str, str]):
+        from matplotlib.patches import Wedge
+
+        self.ax = ax
+        self.wedges: dict = {}
+        self.labels: dict = {}
+        self.percentages: dict = {}
+        for agent_type, color in colors.items():
+            wedge = Wedge((0, 0), 1, 90, 90, color=color, animated=True)
+            ax.add_patch(wedge)
+            self.wedges[agent_type] = wedge
+            self.labels[agent_type] = ax.text(
+                0, 0, agent_type, ha="center", va="center", fontsize=8, animated=True
+            )
+            self.percentages[agent_type] = ax.text(
+                0, 0, "", ha="center", va="center", fontsize=8, animated=True
+            )
+        ax.set_xlim(-1.4, 1.4)
+        ax.set_ylim(-1.4, 1.4)
+        ax.set_aspect("equal")
+        ax.axis("off")
+
+    def update(self, values: dict[str, float]) -> None:
+        total = sum(value for value in values.values() if value > 0)
+        angle = 90.0  # Sentido horario empezando arriba, como ax.pie
+        for agent_type, wedge in self.wedges.items():
+            value = values.get(agent_type, 0)
+            visible = total > 0 and value > 0
+            for artist in (
+                wedge,
+                self.labels[agent_type],
+                self.percentages[agent_type],
+            ):
+                artist.set_visible(visible)
+            if not visible:
+                continue
+            sweep = 360.0 * value / total
+            wedge.set_theta1(angle - sweep)
+            wedge.set_theta2(angle)
+            middle = np.deg2rad(angle - sweep / 2)
+            self.labels[agent_type].set_position(
+                (1.15 * np.cos(middle), 1.15 * np.sin(middle))
+            )
+            self.percentages[agent_type].set_position(
+                (0.6 * np.cos(middle), 0.6 * np.sin(middle))
+            )
+            self.percentages[agent_type].set_text(f"{100 * value / total:.1f}%")
+            angle -= sweep
+
+    def artists(self) -> list:
+        return [
+            *self.wedges.values(),
+            *self.labels.values(),
+            *self.percentages.values(),
+        ]
+
+
+class LiveDashboard(MetricsSink):
+    """
+    Interactive matplotlib dashboard.
+
+    Every artist is created once and updated in place (line data, bar heights,
+    a single scatter for the action markers and persistent pie wedges). The
+    figure is rendered at most fps times per second of wall time, independently
+    of how many days are simulated, and with blitting only the changing artists
+    are redrawn; the full figure is only redrawn when an axis has to grow.
+    """
+
+    def __init__(self, fps: float = 10, blit: bool = True):
+        # matplotlib solo se importa cuando se pide la visualización
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Button
+
+        self.plt = plt
+        self.frame_interval: float = 1 / fps if fps > 0 else 0
+        self.last_frame: float = float("-inf")
+        self.pending: tuple | None = None
+        self.background = None
+        self.full_redraw: bool = True
 
         # Activar el modo interactivo
         plt.ion()
@@ -38,6 +240,7 @@ class Stats:
         # Crear una figura con subplots
         self.fig, self.axes = plt.subplots(nrows=2, ncols=3, figsize=(15, 8))
         self.fig.tight_layout(pad=4.0)
+        self.blit: bool = blit and self.fig.canvas.supports_blit
 
         # Asignar cada subplot a una variable para facilitar el acceso
         self.ax1 = self.axes[0, 0]
@@ -49,17 +252,83 @@ class Stats:
             1, 2
         ]  # Nuevo subplot para la distribución de recursos por tipo
 
-        # Configurar los títulos iniciales
-        self.ax1.set_title("Recursos por Agente")
+        # Gráfica 1: Recursos por Agente
+        self.ax1.set_xlabel("Agentes vivos")
+        self.ax1.set_ylabel("Recursos")
+        self.ax1.set_title("Recursos por Agente", animated=True)
+        self.bars = []
+        self.reserve_bars(128)
+        self.markers = self.ax1.scatter([], [], s=36, zorder=3, animated=True)
+        self.type_lines: dict = {
+            agent_type: self.ax1.axhline(
+                y=0,
+                color=color,
+                linestyle="--",
+                linewidth=2,
+                label=f"{agent_type} Promedio",
+                visible=False,
+                animated=True,
+            )
+            for agent_type, color in AGENT_COLORS.items()
+        }
+        self.ax1.legend(fontsize=7, loc="upper right")
+        self.total_thefts_text = self.ax1.text(
+            0.02,
+            0.95,
+            "",
+            fontsize=12,
+            color="black",
+            weight="bold",
+            transform=self.ax1.transAxes,
+            verticalalignment="top",
+            animated=True,
+        )
+        self.daily_thefts_text = self.ax1.text(
+            0.02,
+            0.90,
+            "",
+            fontsize=12,
+            color="black",
+            weight="bold",
+            transform=self.ax1.transAxes,
+            verticalalignment="top",
+            animated=True,
+        )
+
+        # Gráfica 2: Media de Recursos por Día
+        (self.avg_line,) = self.ax2.plot([], [], color="blue", animated=True)
+        self.ax2.set_xlabel("Día")
+        self.ax2.set_ylabel("Recursos Promedio")
         self.ax2.set_title("Media de Recursos por Día")
+        self.ax2.grid(True)
+
+        # Gráfica 3: Distribución de Agentes (Vivos)
         self.ax3.set_title("Distribución de Agentes (Vivos)")
-        self.ax4.set_title("Cantidad de Personas en el Tiempo")
+        self.count_pie = PieArtists(self.ax3, AGENT_COLORS)
+
+        # Gráfica 4: Cantidad de Personas en el Tiempo
+        (self.people_line,) = self.ax4.plot([], [], color="green", animated=True)
+        self.ax4.set_xlabel("Día")
+        self.ax4.set_ylabel("Número de Personas")
+        self.ax4.set_title("Cantidad de Personas en la Sociedad a lo Largo del Tiempo")
+        self.ax4.grid(True)
+
+        # Gráfica 5: Recursos Promedio por Tipo de Agente
+        self.type_history_lines: dict = {
+            agent_type: self.ax5.plot(
+                [], [], label=agent_type, color=color, animated=True
+            )[0]
+            for agent_type, color in AGENT_COLORS.items()
+        }
+        self.ax5.set_xlabel("Día")
+        self.ax5.set_ylabel("Recursos Promedio")
         self.ax5.set_title("Recursos Promedio por Tipo de Agente")
-        self.ax6.set_title("Recursos Totales por Tipo de Agente")  # Título actualizado
+        self.ax5.legend(fontsize=7)
+        self.ax5.grid(True)
 
-        # Inicializar variables adicionales
-        self.type_resource_history = {key: [] for key in self.agent_colors.keys()}
-        self.type_counts_history = {key: [] for key in self.agent_colors.keys()}
+        # Gráfica 6: Recursos Totales por Tipo de Agente
+        self.ax6.set_title("Recursos Totales por Tipo de Agente")
+        self.resource_pie = PieArtists(self.ax6, AGENT_COLORS)
 
         # Inicializar la funcionalidad de pausa
         self.paused = False
@@ -70,6 +339,7 @@ class Stats:
         )  # Ajusta la posición y tamaño según sea necesario
         self.pause_button = Button(pause_ax, "Pausar")
         self.pause_button.on_clicked(self.toggle_pause)
+        self.fig.canvas.mpl_connect("resize_event", self.invalidate_background)
 
     def toggle_pause(self, event):
         self.paused = not self.paused
@@ -78,266 +348,185 @@ class Stats:
         else:
             self.pause_button.label.set_text("Pausar")
 
-    def plot_agent_resources(self, event: Event, environment: Enviroment):
+    def invalidate_background(self, event=None) -> None:
+        self.full_redraw = True
+
+    def reserve_bars(self, count: int) -> None:
+        if count <= len(self.bars):
+            return
+        capacity = max(count, 2 * len(self.bars))
+        new_bars = self.ax1.bar(
+            range(len(self.bars), capacity),
+            np.zeros(capacity - len(self.bars)),
+            animated=True,
+        )
+        self.bars.extend(new_bars.patches)
+
+    def record(self, stats: Stats, environment: Enviroment, event: Event) -> None:
         # Esperar si está en pausa
         while self.paused:
-            plt.pause(0.1)
-
-        # Actualizar Gráfica 1: Recursos por Agente
-        self.ax1.clear()
-        agents_alive = environment.agents_alive
-        agent_resources = []
-        agent_types = []
-        agent_colors = []
-        action_colors = []
-
-        daily_thefts = 0  # Contador de robos diarios
-
-        for agent_id in agents_alive:
-            agent = environment.agents[agent_id]
-            agent_resources.append(environment.public_resources[agent_id])
-            agent_type = type(agent).__name__
-            agent_types.append(agent_type)
-            agent_colors.append(self.agent_colors.get(agent_type, "gray"))
-
-            # Obtener la acción del agente y definir el color del punto
-            if agent_id in environment.log[event]:
-                action = environment.log[event][agent_id]
-                if action == Action.COOP:
-                    action_colors.append("green")
-                elif action == Action.EXPLOIT:
-                    action_colors.append("red")
-                    daily_thefts += 1  # Incrementar contador de robos
-                elif action == Action.INACT:
-                    action_colors.append("gray")
-            else:
-                action_colors.append("black")
-
-        # Actualizar el total de robos
-        self.total_thefts += daily_thefts
-        self.thefts_per_day.append(daily_thefts)
-
-        # Graficar los recursos de los agentes
-        bars = self.ax1.bar(
-            range(len(agents_alive)), agent_resources, color=agent_colors
+            self.plt.pause(0.1)
+
+        now = time.perf_counter()
+        if now - self.last_frame < self.frame_interval:
+            self.pending = (stats, environment, event)
+            return
+        self.last_frame = now
+        self.pending = None
+        self.render(stats, environment, event)
+
+    def render(self, stats: Stats, environment: Enviroment, event: Event) -> None:
+        self.update_agent_resources(stats, environment, event)
+        self.update_time_series(stats)
+        self.count_pie.update(
+            {
+                agent_type: history[-1]
+                for agent_type, history in stats.type_counts_history.items()
+            }
         )
-        self.ax1.set_xlabel("ID del Agente")
-        self.ax1.set_ylabel("Recursos")
-        self.ax1.set_title(f"Recursos por Agente en el Día {environment.day}")
-        self.ax1.set_xticks(range(len(agents_alive)))
-        self.ax1.set_xticklabels(agents_alive, rotation=45)
-
-        # Añadir puntos encima de las barras
-        for i, bar in enumerate(bars):
-            self.ax1.plot(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height(),
-                "o",
-                color=action_colors[i],
-                markersize=6,
-            )
-
-        # Calcular el promedio de recursos por tipo de agente
-        type_resource_sum = {key: 0 for key in self.agent_colors.keys()}
-        type_agent_count = {key: 0 for key in self.agent_colors.keys()}
+        self.resource_pie.update(stats.type_resource_sum)
+        self.draw()
 
-        for agent_id in agents_alive:
-            agent = environment.agents[agent_id]
-            agent_type = type(agent).__name__
-            type_resource_sum[agent_type] += environment.public_resources[agent_id]
-            type_agent_count[agent_type] += 1
-
-        type_resource_avg = {
-            key: (
-                type_resource_sum[key] / type_agent_count[key]
-                if type_agent_count[key] > 0
-                else 0
-            )
-            for key in self.agent_colors.keys()
-        }
-
-        # Actualizar el historial de recursos por tipo
-        for agent_type in self.agent_colors.keys():
-            self.type_resource_history[agent_type].append(type_resource_avg[agent_type])
-            self.type_counts_history[agent_type].append(type_agent_count[agent_type])
-
-        # Añadir líneas horizontales discontinuas para cada tipo de agente
-        for agent_type, color in self.agent_colors.items():
-            if type_agent_count[agent_type] > 0:
-                avg = type_resource_avg[agent_type]
-                self.ax1.axhline(
-                    y=avg,
-                    color=color,
-                    linestyle="--",
-                    linewidth=2,
-                    label=f"{agent_type} Promedio",
-                )
-
-        self.ax1.legend()
-
-        # Actualizar Gráficas
-        self.update_avg_resources(environment)
-        self.update_agent_counts(environment)
-        self.update_type_resources(environment)
-        self.update_resource_distribution(environment, type_resource_sum)
-
-        # Mostrar los indicadores de robos en la Gráfica 1
-        self.show_theft_stats()
-
-        # Dibujar las figuras
-        self.fig.canvas.draw()
-
-        # Pausar brevemente para actualizar
-        plt.pause(0.01)
-
-    def update_avg_resources(self, environment: Enviroment):
-        # Calcular el promedio de recursos de todos los agentes vivos
+    def update_agent_resources(
+        self, stats: Stats, environment: Enviroment, event: Event
+    ) -> None:
         agents_alive = environment.agents_alive
-        total_resources = sum(
-            [environment.public_resources[agent_id] for agent_id in agents_alive]
+        decisions: dict[int, Action] = environment.log.current
+        action_colors: dict = {
+            Action.COOP: "green",
+            Action.EXPLOIT: "red",
+            Action.INACT: "gray",
+        }
+        resources = np.asarray(
+            [environment.public_resources[agent_id] for agent_id in agents_alive],
+            dtype=float,
         )
-        avg_resources = total_resources / len(agents_alive) if agents_alive else 0
-
-        # Actualizar los datos de días y media de recursos
-        self.days.append(environment.day)
-        self.avg_resources_per_day.append(avg_resources)
-
-        # Almacenar el número de personas vivas
-        self.people_count_per_day.append(len(agents_alive))
-
-        # Graficar la media de recursos por día en ax2
-        self.ax2.clear()
-        self.ax2.plot(self.days, self.avg_resources_per_day, marker="o", color="blue")
-        self.ax2.set_xlabel("Día")
-        self.ax2.set_ylabel("Recursos Promedio")
-        self.ax2.set_title("Media de Recursos por Día")
-        self.ax2.grid(True)
-
-        # Graficar el número de personas vivas por día en ax4
-        self.ax4.clear()
-        self.ax4.plot(self.days, self.people_count_per_day, marker="o", color="green")
-        self.ax4.set_xlabel("Día")
-        self.ax4.set_ylabel("Número de Personas")
-        self.ax4.set_title("Cantidad de Personas en la Sociedad a lo Largo del Tiempo")
-        self.ax4.grid(True)
 
-    def update_agent_counts(self, environment: Enviroment):
-        # Contar la cantidad de agentes vivos por tipo
-        agent_count = {key: 0 for key in self.agent_colors.keys()}
-
-        for agent_id in environment.agents_alive:
-            agent_type = type(environment.agents[agent_id]).__name__
-            if agent_type in agent_count:
-                agent_count[agent_type] += 1
-
-        # Crear listas para los tipos de agentes con agentes vivos y sus conteos
-        types_with_agents = []
-        counts = []
-        colors = []
-
-        total_agents_alive = len(environment.agents_alive)
-
-        for agent_type, count in agent_count.items():
-            if count > 0:  # Solo mostrar los tipos que tienen agentes vivos
-                types_with_agents.append(agent_type)
-                counts.append(count)
-                colors.append(self.agent_colors[agent_type])
-
-        # Asegúrate de que haya agentes vivos para graficar
-        if total_agents_alive > 0:
-            self.ax3.clear()
-            # Crear el gráfico de pastel
-            wedges, texts, autotexts = self.ax3.pie(
-                counts,
-                labels=types_with_agents,
-                colors=colors,
-                autopct=lambda pct: (
-                    f"{pct:.1f}%" if pct > 0 else ""
-                ),  # Mostrar el porcentaje
-                startangle=90,
-                counterclock=False,
-            )
-
-            self.ax3.set_title("Distribución de Agentes (Vivos)")
-
-    def update_type_resources(self, environment: Enviroment):
-        # Graficar los recursos promedio por tipo de agente a lo largo del tiempo en ax5
-        self.ax5.clear()
-        for agent_type, color in self.agent_colors.items():
-            if any(self.type_resource_history[agent_type]):
-                self.ax5.plot(
-                    self.days,
-                    self.type_resource_history[agent_type],
-                    label=agent_type,
-                    color=color,
-                )
+        self.reserve_bars(len(agents_alive))
+        for i, bar in enumerate(self.bars):
+            if i < len(agents_alive):
+                agent_type = type(environment.agents[agents_alive[i]]).__name__
+                bar.set_height(resources[i])
+                bar.set_facecolor(stats.agent_colors.get(agent_type, "gray"))
+                bar.set_visible(True)
+            elif bar.get_visible():
+                bar.set_visible(False)
+            else:
+                break
 
-        self.ax5.set_xlabel("Día")
-        self.ax5.set_ylabel("Recursos Promedio")
-        self.ax5.set_title("Recursos Promedio por Tipo de Agente")
-        self.ax5.legend()
-        self.ax5.grid(True)
+        self.markers.set_offsets(
+            np.column_stack((np.arange(len(resources)), resources))
+        )
+        self.markers.set_facecolors(
+            [
+                action_colors.get(decisions.get(agent_id), "black")
+                for agent_id in agents_alive
+            ]
+        )
 
-    def update_resource_distribution(self, environment: Enviroment, type_resource_sum):
-        # Crear gráfico de pastel mostrando los recursos totales por tipo de agente
-        self.ax6.clear()
-
-        # Filtrar los tipos de agentes que tienen recursos (están vivos)
-        types_with_resources = []
-        total_resources = []
-        colors = []
-
-        for agent_type, resource_sum in type_resource_sum.items():
-            if resource_sum > 0:
-                types_with_resources.append(agent_type)
-                total_resources.append(resource_sum)
-                colors.append(self.agent_colors[agent_type])
-
-        # Asegúrate de que haya recursos para graficar
-        if total_resources:
-            self.ax6.pie(
-                total_resources,
-                labels=types_with_resources,
-                colors=colors,
-                autopct=lambda pct: f"{pct:.1f}%" if pct > 0 else "",
-                startangle=90,
-                counterclock=False,
-            )
-            self.ax6.set_title("Recursos Totales por Tipo de Agente")
-        else:
-            self.ax6.set_title("Sin recursos para mostrar")
-
-    def show_theft_stats(self):
-        # Eliminar todos los textos anteriores
-        for text in self.ax1.texts:
-            text.remove()
-
-        # Mostrar los indicadores de robos en la gráfica de recursos
-        total_thefts_label = f"Robos Totales: {self.total_thefts}"
-        daily_thefts_label = (
-            f"Robos Diarios: {self.thefts_per_day[-1]}"
-            if self.thefts_per_day
+        for agent_type, line in self.type_lines.items():
+            visible = stats.type_counts_history[agent_type][-1] > 0
+            line.set_visible(visible)
+            if visible:
+                avg = stats.type_resource_history[agent_type][-1]
+                line.set_ydata([avg, avg])
+
+        self.ax1.title.set_text(f"Recursos por Agente en el Día {environment.day}")
+        self.total_thefts_text.set_text(f"Robos Totales: {stats.total_thefts}")
+        self.daily_thefts_text.set_text(
+            f"Robos Diarios: {stats.thefts_per_day[-1]}"
+            if stats.thefts_per_day
             else "Robos Diarios: 0"
         )
 
-        # Mostrar texto en la gráfica de recursos por agente
-        self.ax1.text(
-            0.02,
-            0.95,
-            total_thefts_label,
-            fontsize=12,
-            color="black",
-            weight="bold",
-            transform=self.ax1.transAxes,
-            verticalalignment="top",
+        low = min(0.0, float(resources.min())) if len(resources) else 0.0
+        high = float(resources.max()) if len(resources) else 1.0
+        self.grow_limits(self.ax1, (-1, max(len(resources), 1)), (low, high))
+
+    def update_time_series(self, stats: Stats) -> None:
+        self.avg_line.set_data(stats.days, stats.avg_resources_per_day)
+        self.people_line.set_data(stats.days, stats.people_count_per_day)
+        self.grow_limits(
+            self.ax2,
+            (stats.days[0], stats.days[-1]),
+            (min(stats.avg_resources_per_day), max(stats.avg_resources_per_day)),
         )
-        self.ax1.text(
-            0.02,
-            0.90,
-            daily_thefts_label,
-            fontsize=12,
-            color="black",
-            weight="bold",
-            transform=self.ax1.transAxes,
-            verticalalignment="top",
+        self.grow_limits(
+            self.ax4,
+            (stats.days[0], stats.days[-1]),
+            (0, max(stats.people_count_per_day)),
         )
+
+        low, high = 0.0, 0.0
+        for agent_type, line in self.type_history_lines.items():
+            history = stats.type_resource_history[agent_type]
+            line.set_data(stats.days, history)
+            line.set_visible(any(history))
+            if any(history):
+                low = min(low, min(history))
+                high = max(high, max(history))
+        self.grow_limits(self.ax5, (stats.days[0], stats.days[-1]), (low, high))
+
+    def grow_limits(self, ax, x_range: tuple, y_range: tuple) -> None:
+        """
+        Grows the limits of ax with some headroom when the data leaves them.
+        Changing the limits forces a full redraw, so they grow geometrically
+        and a long run only triggers a few of them.
+        """
+        for (low, high), get_limits, set_limits in (
+            (x_range, ax.get_xlim, ax.set_xlim),
+            (y_range, ax.get_ylim, ax.set_ylim),
+        ):
+            current_low, current_high = get_limits()
+            if low >= current_low and high <= current_high:
+                continue
+            span = max(high - low, 1)
+            if high > current_high:
+                current_high = high + span * 0.5
+            if low < current_low:
+                current_low = low - span * 0.5
+            set_limits(current_low, current_high)
+            self.full_redraw = True
+
+    def animated_artists(self) -> list:
+        return [
+            *self.bars,
+            self.markers,
+            *self.type_lines.values(),
+            self.ax1.title,
+            self.total_thefts_text,
+            self.daily_thefts_text,
+            self.avg_line,
+            self.people_line,
+            *self.type_history_lines.values(),
+            *self.count_pie.artists(),
+            *self.resource_pie.artists(),
+        ]
+
+    def draw(self) -> None:
+        canvas = self.fig.canvas
+        if not self.blit:
+            for artist in self.animated_artists():
+                artist.set_animated(False)
+            canvas.draw_idle()
+            canvas.flush_events()
+            return
+
+        if self.full_redraw or self.background is None:
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+            self.full_redraw = False
+
+        canvas.restore_region(self.background)
+        for artist in self.animated_artists():
+            if artist.get_visible():
+                artist.axes.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def close(self) -> None:
+        # Mostrar el último día aunque haya caído entre dos cuadros
+        if self.pending is not None:
+            self.render(*self.pending)
+            self.pending = None
+        self.plt.ioff()
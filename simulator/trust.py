@@ -0,0 +1,254 @@
+"""
+This module contains the TrustMatrix class, the store of the trust between agents.
+"""
+
+import numpy as np
+
+from utils import Action
+
+# Change in the trust of an agent in other after seeing its action, indexed by Action value
+TRUST_DELTAS: np.ndarray = np.array([0.1, -0.2, 0.05])
+
+
+class TrustRow:
+    """
+    Trust of one agent in the others, indexed by agent id.
+    """
+
+    __slots__ = ("matrix", "agent", "writeable")
+
+    def __init__(self, matrix: "TrustMatrix", agent: int, writeable: bool = True):
+        self.matrix: TrustMatrix = matrix
+        self.agent: int = agent
+        self.writeable: bool = writeable
+
+    def __getitem__(self, other: int) -> float:
+        slot, other_slot = self.matrix.slot_of(self.agent), self.matrix.slot_of(other)
+        if slot < 0 or other_slot < 0:
+            return self.matrix.initial
+        return float(self.matrix.values[slot, other_slot])
+
+    def __setitem__(self, other: int, value: float) -> None:
+        if not self.writeable:
+            raise TypeError("This trust row is read-only.")
+        slot, other_slot = self.matrix.slot_of(self.agent), self.matrix.slot_of(other)
+        if slot < 0 or other_slot < 0:
+            raise IndexError("The trust of released agents can not be changed.")
+        self.matrix.values[slot, other_slot] = value
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def __iter__(self):
+        return iter(self.copy())
+
+    def copy(self) -> list[float]:
+        return self.matrix.row(self.agent, range(len(self.matrix))).tolist()
+
+
+class TrustMatrix:
+    """
+    Trust of every agent in every other agent, stored in a preallocated NumPy
+    matrix.
+
+    Agents are mapped to rows (slots) of the matrix. When the matrix is full
+    its capacity doubles, so a newborn costs O(1) amortized instead of
+    appending to every row. The rows of dead agents are released and reused
+    by the next newborns, so the matrix grows with the live population and
+    not with every agent ever born. trust_matrix[agent][other] keeps working
+    as with the list of lists it replaces.
+
+    Attributes:
+        initial (float): Trust of an agent in an agent it has not seen yet.
+        values (np.ndarray): Capacity x capacity matrix of trust between slots.
+        slots (np.ndarray): Slot of every agent id, -1 for released agents.
+    """
+
+    def __init__(self, size: int, initial: float = 50):
+        capacity: int = max(size, 1)
+        self.initial: float = initial
+        self.values: np.ndarray = np.full((capacity, capacity), initial, dtype=float)
+        self.slots: np.ndarray = np.full(capacity, -1, dtype=np.int64)
+        self.slots[:size] = np.arange(size)
+        self.size: int = size
+        self.used_slots: int = size
+        self.free_slots: list[int] = []
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, agent: int) -> TrustRow:
+        self.slot_of(agent)
+        return TrustRow(self, agent)
+
+    def slot_of(self, agent: int) -> int:
+        if agent < 0 or agent >= self.size:
+            raise IndexError(f"Agent {agent} is not in the trust matrix.")
+        return int(self.slots[agent])
+
+    def add_agents(self, count: int) -> None:
+        """
+        Adds count agents with the next ids, reusing released slots first.
+        """
+        if self.size + count > len(self.slots):
+            slots = np.full(max(2 * len(self.slots), self.size + count), -1, np.int64)
+            slots[: self.size] = self.slots[: self.size]
+            self.slots = slots
+
+        reused: int = min(count, len(self.free_slots))
+        new_slots: list[int] = [self.free_slots.pop() for _ in range(reused)]
+        missing: int = count - reused
+        if self.used_slots + missing > len(self.values):
+            self.reserve(self.used_slots + missing)
+        new_slots.extend(range(self.used_slots, self.used_slots + missing))
+        self.used_slots += missing
+
+        self.slots[self.size : self.size + count] = new_slots
+        self.size += count
+
+    def reserve(self, capacity: int) -> None:
+        new_capacity: int = len(self.values)
+        while new_capacity < capacity:
+            new_capacity *= 2
+        values = np.full((new_capacity, new_capacity), self.initial, dtype=float)
+        used: int = self.used_slots
+        values[:used, :used] = self.values[:used, :used]
+        self.values = values
+
+    def release(self, agents) -> None:
+        """
+        Frees the slots of dead agents so the next newborns reuse them.
+        """
+        for agent in agents:
+            slot = self.slot_of(agent)
+            if slot < 0:
+                continue
+            self.values[slot, :] = self.initial
+            self.values[:, slot] = self.initial
+            self.slots[agent] = -1
+            self.free_slots.append(slot)
+
+    def compact(self, agents: list[int]) -> None:
+        """
+        Renumbers the given agents to the dense ids 0..len(agents) - 1, in
+        order, dropping every other agent from the matrix.
+        """
+        slots = self.slots[np.asarray(agents, dtype=np.int64)]
+        size: int = len(agents)
+        values = np.full((max(size, 1), max(size, 1)), self.initial, dtype=float)
+        values[:size, :size] = self.values[np.ix_(slots, slots)]
+        self.values = values
+        self.slots = np.arange(max(size, 1), dtype=np.int64)
+        self.slots[size:] = -1
+        self.size = size
+        self.used_slots = size
+        self.free_slots = []
+
+    def update_group(self, group: list[int], actions: list[Action]) -> None:
+        """
+        Updates the trust of every member of group in the others after seeing
+        their actions, with one vectorized operation for the whole group.
+        """
+        if len(group) < 2:
+            return
+        slots = self.slots[group]
+        deltas = TRUST_DELTAS[[action.value for action in actions]]
+        increments = np.repeat(deltas[np.newaxis, :], len(group), axis=0)
+        np.fill_diagonal(increments, 0)
+        self.values[np.ix_(slots, slots)] += increments
+
+    def update_groups(
+        self, groups: list[list[int]], actions: list[list[Action]]
+    ) -> None:
+        """
+        update_group for every group of a day with a single scatter add over
+        the pairs of members of all the groups.
+        """
+        sizes = np.fromiter((len(group) for group in groups), np.int64, len(groups))
+        members = np.fromiter(
+            (agent for group in groups for agent in group), np.int64, sizes.sum()
+        )
+        deltas = TRUST_DELTAS[
+            np.fromiter(
+                (action.value for group in actions for action in group),
+                np.int64,
+                len(members),
+            )
+        ]
+        # Cada miembro se empareja con todas las posiciones de su grupo
+        member_sizes = np.repeat(sizes, sizes)
+        starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+        observers = np.repeat(np.arange(len(members)), member_sizes)
+        pair_starts = np.repeat(np.cumsum(member_sizes) - member_sizes, member_sizes)
+        observed = np.repeat(starts, member_sizes) + (
+            np.arange(len(observers)) - pair_starts
+        )
+        pairs = observers != observed
+        observers, observed = observers[pairs], observed[pairs]
+        slots = self.slots[members]
+        np.add.at(self.values, (slots[observers], slots[observed]), deltas[observed])
+
+    def row(self, agent: int, others) -> np.ndarray:
+        """
+        Returns the trust of agent in each of others as an array.
+        """
+        other_slots = self.slots[np.asarray(others, dtype=np.int64)]
+        result = np.full(len(other_slots), self.initial, dtype=float)
+        slot = self.slot_of(agent)
+        if slot >= 0:
+            known = other_slots >= 0
+            result[known] = self.values[slot, other_slots[known]]
+        return result
+
+    def block(self, agents, others) -> np.ndarray:
+        """
+        Returns the trust of each of agents (rows) in each of others (columns).
+        """
+        slots = self.slots[np.asarray(agents, dtype=np.int64)]
+        other_slots = self.slots[np.asarray(others, dtype=np.int64)]
+        result = np.full((len(slots), len(other_slots)), self.initial, dtype=float)
+        rows, columns = np.flatnonzero(slots >= 0), np.flatnonzero(other_slots >= 0)
+        result[np.ix_(rows, columns)] = self.values[
+            np.ix_(slots[rows], other_slots[columns])
+        ]
+        return result
+
+    def to_array(self) -> np.ndarray:
+        """
+        Returns the dense trust matrix indexed by agent id.
+        """
+        slots = self.slots[: self.size]
+        result = np.full((self.size, self.size), self.initial, dtype=float)
+        known = np.flatnonzero(slots >= 0)
+        result[np.ix_(known, known)] = self.values[np.ix_(slots[known], slots[known])]
+        return result
+
+    def read_only(self) -> "TrustMatrixView":
+        return TrustMatrixView(self)
+
+
+class TrustMatrixView:
+    """
+    Read-only view of a TrustMatrix handed to the agents.
+    """
+
+    __slots__ = ("matrix",)
+
+    def __init__(self, matrix: TrustMatrix):
+        self.matrix: TrustMatrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def __getitem__(self, agent: int) -> TrustRow:
+        self.matrix.slot_of(agent)
+        return TrustRow(self.matrix, agent, writeable=False)
+
+    def row(self, agent: int, others) -> np.ndarray:
+        return self.matrix.row(agent, others)
+
+    def block(self, agents, others) -> np.ndarray:
+        return self.matrix.block(agents, others)
+
+    def copy(self) -> np.ndarray:
+        return self.matrix.to_array()
@@ -0,0 +1,93 @@
+"""
+This module contains the TypeTotals class, the running totals of the alive agents of each type.
+"""
+
+import numpy as np
+
+
+class TypeTotals:
+    """
+    Number of alive agents and sum of their resources for each agent type.
+
+    The environment updates the totals with the changes it makes (resources
+    won or lost, daily upkeep, births and deaths), so the summaries of a day
+    are read in O(types) instead of walking every alive agent. Agent types
+    are identified by the index returned by type_index.
+
+    Attributes:
+        names (list[str]): Name of each type, by index.
+        counts (np.ndarray): Alive agents of each type.
+        sums (np.ndarray): Total resources of the alive agents of each type.
+    """
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.indices: dict[str, int] = {}
+        self.counts: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.sums: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    def type_index(self, name: str) -> int:
+        if name not in self.indices:
+            self.indices[name] = len(self.names)
+            self.names.append(name)
+            self.counts = np.append(self.counts, 0)
+            self.sums = np.append(self.sums, 0)
+        return self.indices[name]
+
+    def add_agents(self, types, resources) -> None:
+        np.add.at(self.counts, np.asarray(types, dtype=np.int64), 1)
+        self.add_resources(types, resources)
+
+    def remove_agents(self, types, resources) -> None:
+        np.subtract.at(self.counts, np.asarray(types, dtype=np.int64), 1)
+        np.subtract.at(
+            self.sums,
+            np.asarray(types, dtype=np.int64),
+            np.asarray(resources, dtype=np.int64),
+        )
+
+    def add_resources(self, types, amounts) -> None:
+        np.add.at(
+            self.sums,
+            np.asarray(types, dtype=np.int64),
+            np.asarray(amounts, dtype=np.int64),
+        )
+
+    def add_to_all(self, amount: int) -> None:
+        """
+        Adds amount to the resources of every alive agent.
+        """
+        self.sums += amount * self.counts
+
+    @property
+    def population(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def total_resources(self) -> int:
+        return int(self.sums.sum())
+
+    def counts_by_type(self) -> dict[str, int]:
+        return {
+            name: int(count)
+            for name, count in zip(self.names, self.counts.tolist())
+            if count > 0
+        }
+
+    def resources_by_type(self) -> dict[str, int]:
+        return {
+            name: int(total)
+            for name, total, count in zip(
+                self.names, self.sums.tolist(), self.counts.tolist()
+            )
+            if count > 0
+        }
+
+    def mean_resources_by_type(self) -> dict[str, float]:
+        return {
+            name: total / count
+            for name, total, count in zip(
+                self.names, self.sums.tolist(), self.counts.tolist()
+            )
+            if count > 0
+        }
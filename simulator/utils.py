@@ -1,5 +1,6 @@
 # pylint: disable=consider-using-enumerate
 from enum import Enum
+import numpy as np
 
 
 class EventType(Enum):
@@ -44,34 +45,138 @@ def negative_prisioners_game(desition1: Action, desition2: Action) -> int:
     return -7
 
 
+# Payoff tables indexed as [my action][other action] with Action values as indices
+PAYOFF_TABLE: np.ndarray = np.array(
+    [
+        [10, 0, 8],
+        [15, 0, 5],
+        [8, 8, 8],
+    ],
+    dtype=np.int64,
+)
+NEGATIVE_PAYOFF_TABLE: np.ndarray = np.array(
+    [
+        [-5, -15, -7],
+        [0, -15, -10],
+        [-7, -7, -7],
+    ],
+    dtype=np.int64,
+)
+_PAYOFF_ROWS: tuple = tuple(tuple(row) for row in PAYOFF_TABLE.tolist())
+_NEGATIVE_PAYOFF_ROWS: tuple = tuple(
+    tuple(row) for row in NEGATIVE_PAYOFF_TABLE.tolist()
+)
+
+
 def group_prisioners_game(desitions: list[Action], resources: int) -> list[int]:
+    """
+    Splits the resources of a group according to the prisoner's dilemma played
+    between every ordered pair of its members.
+
+    Instead of playing every pair, the points of each member are computed from
+    the number of members that took each action, so a group costs O(k).
+    """
     if len(desitions) == 1:
         if resources > 0:
             return [resources // (10 / 8)]
         return [resources // (15 / 7)]
 
-    list_result: list[int] = [0] * len(desitions)
-    for d1 in range(len(desitions)):
-        for d2 in range(len(desitions)):
-            if d1 != d2:
-                if resources > 0:
-                    list_result[d1] += prisioners_game(desitions[d1], desitions[d2])
-                else:
-                    list_result[d1] += negative_prisioners_game(
-                        desitions[d1], desitions[d2]
-                    )
+    table = _PAYOFF_ROWS if resources > 0 else _NEGATIVE_PAYOFF_ROWS
+    counts: list[int] = [0, 0, 0]
+    for desition in desitions:
+        counts[desition.value] += 1
+
+    # Points of each action against the whole group, without playing itself
+    points: list[int] = [
+        sum(row[other] * counts[other] for other in range(3)) - row[action]
+        for action, row in enumerate(table)
+    ]
 
     # Calculate the proportion between the total individual points and the total possible points
     if resources > 0:
-        list_result = [
-            resources * x // (len(desitions) * 10 * (len(desitions) - 1))
-            for x in list_result
-        ]
-
+        total: int = len(desitions) * 10 * (len(desitions) - 1)
     else:
-        list_result = [
-            resources * x // (len(desitions) * -15 * (len(desitions) - 1))
-            for x in list_result
-        ]
+        total = len(desitions) * -15 * (len(desitions) - 1)
+    return [resources * points[desition.value] // total for desition in desitions]
+
+
+def joining_payoffs(desitions: list[Action], resources: int) -> list:
+    """
+    Returns what an agent that joins a group playing desitions gets with
+    each action, indexed by Action value: the last value of
+    group_prisioners_game(desitions + [action], resources), counting the
+    group only once for the three actions.
+    """
+    if len(desitions) == 0:
+        return [group_prisioners_game([action], resources)[0] for action in Action]
+
+    table = _PAYOFF_ROWS if resources > 0 else _NEGATIVE_PAYOFF_ROWS
+    counts: list[int] = [0, 0, 0]
+    for desition in desitions:
+        counts[desition.value] += 1
+
+    # El agente que se une no juega contra sí mismo, así que sus puntos solo
+    # dependen de las acciones del grupo
+    size: int = len(desitions) + 1
+    total: int = size * (10 if resources > 0 else -15) * (size - 1)
+    return [
+        resources * sum(row[other] * counts[other] for other in range(3)) // total
+        for row in table
+    ]
+
+
+def batch_group_prisioners_game(
+    groups_desitions: list[list[Action]], groups_resources: list[int]
+) -> list[list[int]]:
+    """
+    Plays group_prisioners_game for every group of an event in a single call.
+
+    The actions of all groups are flattened into one array, the per group
+    action counts are taken with a single bincount and the points of every
+    agent are looked up in the payoff tables, so the cost is a handful of
+    array operations per event instead of O(k^2) Python calls per group.
+    The results are identical to calling group_prisioners_game on each group.
+    """
+    sizes = np.fromiter(
+        (len(desitions) for desitions in groups_desitions),
+        dtype=np.int64,
+        count=len(groups_desitions),
+    )
+    results: list[list[int]] = [[] for _ in groups_desitions]
+    if not sizes.any():
+        return results
+
+    codes = np.fromiter(
+        (desition.value for desitions in groups_desitions for desition in desitions),
+        dtype=np.int64,
+        count=int(sizes.sum()),
+    )
+    group_index = np.repeat(np.arange(len(sizes)), sizes)
+    resources = np.asarray(groups_resources, dtype=np.int64)
+
+    counts = np.bincount(group_index * 3 + codes, minlength=len(sizes) * 3).reshape(
+        -1, 3
+    )
+    positive = resources > 0
+    tables = np.where(positive[:, None, None], PAYOFF_TABLE, NEGATIVE_PAYOFF_TABLE)
+
+    # points[g, a] = sum_b table[g, a, b] * counts[g, b] - table[g, a, a]
+    points = np.einsum("gab,gb->ga", tables, counts) - np.diagonal(
+        tables, axis1=1, axis2=2
+    )
+    totals = sizes * np.where(positive, 10, -15) * (sizes - 1)
+    totals[totals == 0] = 1  # Empty and single member groups are handled apart
+
+    agent_points = points[group_index, codes]
+    payoffs = (resources[group_index] * agent_points // totals[group_index]).tolist()
 
-    return list_result
+    start = 0
+    for group, size in enumerate(sizes.tolist()):
+        if size == 1:
+            results[group] = group_prisioners_game(
+                groups_desitions[group], groups_resources[group]
+            )
+        else:
+            results[group] = payoffs[start : start + size]
+        start += size
+    return results
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del simulador se importan sin paquete, como al ejecutarlos
+# desde simulator/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "simulator"))
+
+
+@pytest.fixture
+def make_simulator():
+    """
+    Returns a function that builds a seeded Simulator with the parameters of
+    interface.main. simulation imports gemini, so the tests that use it are
+    skipped without its dependencies.
+    """
+    pytest.importorskip("google.generativeai")
+    pytest.importorskip("PyPDF2")
+    from event_generator import ProbabilisticEventGenerator
+    from interface import population_random_generator
+    from random_streams import RandomStreams
+    from recording import AllDays
+    from simulation import Simulator
+
+    def make(seed: int, population: int = 60, **kwargs) -> Simulator:
+        streams = RandomStreams(seed)
+        kwargs.setdefault("event_generator", ProbabilisticEventGenerator(0.7, 0.9, 0.8))
+        kwargs.setdefault("log_path", None)
+        return Simulator(
+            population_random_generator(population, streams.stream("population")),
+            lost_per_day=100,
+            thief_toleration=1,
+            reproduction_rate=10,
+            reproduction_density=10,
+            max_population=100,
+            global_visible_desitions=False,
+            noise=0.1,
+            seed=streams,
+            record_schedule=AllDays(),
+            **kwargs,
+        )
+
+    return make
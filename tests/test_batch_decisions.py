@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+
+from agents.agent import (
+    ABRAgent,
+    BDIAgent,
+    ExploteAgent,
+    PusilanimeAgent,
+    ResentfulAgent,
+    ThiefAgent,
+    TipForTapAgent,
+    TipForTapSecureAgent,
+)
+from enviroment_info import EnviromentInfo
+from event_generator import EventInfo
+from trust import TrustMatrix
+from utils import Action, EventType
+
+AGENT_CLASSES = [
+    ABRAgent,
+    ExploteAgent,
+    PusilanimeAgent,
+    ResentfulAgent,
+    ThiefAgent,
+    TipForTapAgent,
+    TipForTapSecureAgent,
+]
+
+# Agentes con varios deseos, con pesos enteros y reales
+MIXED_DESIRES = [
+    {"TipForTap": 1, "ABR": 1, "Resentful": 2},
+    {"Pusilanime": 0.5, "Thief": 0.7},
+    {"TipForTapSecure": 0.4, "ABR": 0.25, "Resentful": 0.35},
+]
+
+
+def random_groups(rng: random.Random, agents: int) -> list[list[int]]:
+    order = list(range(agents))
+    rng.shuffle(order)
+    groups: list[list[int]] = []
+    while order:
+        size = rng.randint(0, 6)
+        groups.append(order[:size])
+        order = order[size:]
+    return groups
+
+
+def test_batch_decisions_match_one_by_one():
+    rng = random.Random(1)
+    population: int = 120
+    agents: list[BDIAgent] = [
+        rng.choice(AGENT_CLASSES)(agent_id) for agent_id in range(population - 40)
+    ] + [
+        BDIAgent(agent_id, rng.choice(MIXED_DESIRES))
+        for agent_id in range(population - 40, population)
+    ]
+    enviroment_info = EnviromentInfo(
+        1, 0, [0] * population, list(range(population)), TrustMatrix(population), {}
+    )
+    for _ in range(8):
+        visible = {
+            agent: rng.choice(list(Action))
+            for agent in rng.sample(range(population), 60)
+        }
+        for agent in agents:
+            agent.passive_action(enviroment_info, visible)
+
+    groups = random_groups(rng, population)
+    infos = {
+        agent: EventInfo(EventType.COOP, group, 100)
+        for group in groups
+        for agent in group
+    }
+    batches: dict[tuple, list[BDIAgent]] = {}
+    for agent in agents:
+        batches.setdefault((type(agent), agent.batch_key()), []).append(agent)
+    for (agent_class, _), batch in batches.items():
+        event_infos = [infos[agent.agent_id] for agent in batch]
+        expected = [
+            agent.active_action(enviroment_info, event_info)
+            for agent, event_info in zip(batch, event_infos)
+        ]
+        assert agent_class.decide_batch(batch, enviroment_info, event_infos) == expected
+
+
+def test_update_groups_matches_update_group():
+    rng = random.Random(2)
+    groups = random_groups(rng, 50)
+    actions = [[rng.choice(list(Action)) for _ in group] for group in groups]
+    by_group = TrustMatrix(50)
+    by_day = TrustMatrix(50)
+    for group, group_actions in zip(groups, actions):
+        by_group.update_group(group, group_actions)
+    by_day.update_groups(groups, actions)
+    assert np.array_equal(by_group.values, by_day.values)
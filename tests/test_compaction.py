@@ -0,0 +1,27 @@
+from agents.agent import BDIAgent
+
+
+def known_agents(agent: BDIAgent) -> set[int]:
+    beliefs = agent.beliefs
+    return set(beliefs["trust"]) | beliefs["betrayers"] | set(beliefs["global_actions"])
+
+
+def test_beliefs_stay_bounded_across_compactions(make_simulator):
+    sim = make_simulator(1, compaction_interval=None)
+    enviroment = sim.enviroment
+    for _ in range(20):
+        sim.run(10)
+        enviroment.compact()
+        population: int = len(enviroment.agents)
+        assert enviroment.agents_alive == list(range(population))
+        for agent in enviroment.agents:
+            known = known_agents(agent)
+            assert all(0 <= other < population for other in known)
+
+
+def test_compaction_does_not_change_the_trajectory(make_simulator):
+    compacted = make_simulator(2, compaction_interval=5)
+    plain = make_simulator(2, compaction_interval=None)
+    compacted.run(150)
+    plain.run(150)
+    assert compacted.series.to_rows() == plain.series.to_rows()
@@ -0,0 +1,41 @@
+import pytest
+
+from agents.agent import PusilanimeAgent
+from enviroment import ArrayEnviroment, Enviroment
+from random_streams import RandomStream
+
+
+def enviroment_with_resources(enviroment_class, resources: list[int]) -> Enviroment:
+    enviroment = enviroment_class(
+        [PusilanimeAgent(agent_id) for agent_id in range(len(resources))], 0
+    )
+    enviroment.apply_resources(
+        {
+            agent: target - enviroment.public_resources[agent]
+            for agent, target in enumerate(resources)
+        }
+    )
+    return enviroment
+
+
+@pytest.mark.parametrize("enviroment_class", [Enviroment, ArrayEnviroment])
+def test_culling_matches_a_full_sort(enviroment_class):
+    rng = RandomStream(1)
+    for _ in range(50):
+        # Pocos valores distintos, para que haya muchos empates, y algunos
+        # agentes muertos para que los vivos no sean consecutivos
+        resources = [rng.randint(-3, 12) for _ in range(rng.randint(1, 80))]
+        enviroment = enviroment_with_resources(enviroment_class, resources)
+        enviroment.remove_dead()
+        alive: list[int] = list(enviroment.agents_alive)
+        max_population: int = rng.randint(0, len(alive) + 2)
+
+        expected = sorted(alive, key=lambda agent: resources[agent])[
+            : max(len(alive) - max_population, 0)
+        ]
+        assert sorted(enviroment.poorest_agents(max_population)) == sorted(expected)
+
+        enviroment.remove_dead(max_population)
+        assert list(enviroment.agents_alive) == [
+            agent for agent in alive if agent not in expected
+        ]
@@ -0,0 +1,51 @@
+import numpy as np
+
+from agents.agent import PusilanimeAgent
+from enviroment import ArrayEnviroment, Enviroment
+from random_streams import RandomStream
+
+
+def test_array_engine_follows_the_list_engine(make_simulator):
+    for seed in (1, 2):
+        lists = make_simulator(seed)
+        arrays = make_simulator(seed, array_state=True)
+        lists.run(200)
+        arrays.run(200)
+        assert lists.series.to_rows() == arrays.series.to_rows()
+        assert lists.enviroment.agents_alive == arrays.enviroment.agents_alive
+        assert list(lists.enviroment.public_resources) == list(
+            arrays.enviroment.public_resources
+        )
+
+
+def test_array_state_matches_the_lists():
+    rng = RandomStream(4)
+    enviroments = [
+        enviroment_class(
+            [PusilanimeAgent(agent_id) for agent_id in range(40)], 20, RandomStream(5)
+        )
+        for enviroment_class in (Enviroment, ArrayEnviroment)
+    ]
+    for day in range(60):
+        resources = {
+            agent: rng.randint(-80, 60) for agent in enviroments[0].agents_alive
+        }
+        births: int = rng.randint(0, 4)
+        for enviroment in enviroments:
+            enviroment.next_day()
+            enviroment.apply_resources(resources)
+            enviroment.apply_daily_upkeep()
+            enviroment.add_agents(
+                [PusilanimeAgent(len(enviroment.agents) + n) for n in range(births)],
+                [100] * births,
+            )
+            enviroment.remove_dead(45)
+            if day % 25 == 24:
+                enviroment.compact()
+
+        lists, arrays = enviroments
+        assert lists.agents_alive == arrays.agents_alive
+        assert np.array_equal(
+            np.asarray(lists.public_resources)[lists.agents_alive],
+            np.asarray(arrays.public_resources)[arrays.agents_alive],
+        )
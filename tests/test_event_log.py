@@ -0,0 +1,68 @@
+import pytest
+
+from event_log import EventLog
+from random_streams import RandomStream
+from utils import Action, EventType
+
+
+def random_day(rng: RandomStream, day: int):
+    agents = list(range(rng.randint(0, 12)))
+    rng.shuffle(agents)
+    groups: list[list[int]] = []
+    while agents:
+        size: int = rng.randint(1, 4)
+        groups.append(agents[:size])
+        agents = agents[size:]
+    event_type = EventType.COOP if rng.random() < 0.8 else EventType.SPECIAL
+    decisions = (
+        {agent: rng.choice(list(Action)) for group in groups for agent in group}
+        if event_type == EventType.COOP
+        else None
+    )
+    return day, event_type, rng.randint(-100, 300), groups, decisions
+
+
+def as_tuple(event) -> tuple:
+    return event.day, event.event_type, event.resources, event.groups, event.decisions
+
+
+@pytest.mark.parametrize("max_days", [None, 1, 3, 40])
+def test_matches_a_list_of_days(max_days):
+    """
+    With a small capacity the log has to grow, or reclaim the rows and days
+    it dropped, many times.
+    """
+    rng = RandomStream(1)
+    log = EventLog(max_days, capacity=8)
+    kept: list[tuple] = []
+    for day in range(1, 301):
+        day, event_type, resources, groups, decisions = random_day(rng, day)
+        log.record_event(day, event_type, resources)
+        log.record_groups(groups, decisions)
+        kept.append((day, event_type, resources, groups, decisions or {}))
+        if max_days is not None:
+            kept = kept[-max_days:]
+
+        assert len(log) == len(kept)
+        assert as_tuple(log.last_event()) == kept[-1]
+        assert log.current == (decisions or {})
+        if day % 10 == 0 or max_days is not None:
+            assert [as_tuple(event) for event in log] == kept
+
+    for day in (1, kept[0][0], 150, 300, 301):
+        expected = [event for event in kept if event[0] == day]
+        event = log.get_event(day)
+        assert (as_tuple(event) if event else None) == (
+            expected[0] if expected else None
+        )
+    for agent in range(12):
+        assert log.agent_history(agent) == [
+            (day, decisions[agent])
+            for day, _, _, _, decisions in kept
+            if agent in decisions
+        ]
+
+    if max_days is not None:
+        # El buffer circular no crece más allá de lo que guarda
+        assert len(log._event_days) <= max(64, 4 * max_days)
+        assert len(log._days) <= 4 * 12 * max_days + 8
@@ -0,0 +1,46 @@
+import numpy as np
+
+from event_generator import ProbabilisticEventGenerator
+from event_stream import EventSchedule, ReplayEventGenerator
+from random_streams import RandomStream
+
+
+def play(generator: ReplayEventGenerator, days: int) -> list[tuple]:
+    agents: list[int] = list(range(0, 80, 2))
+    reputation = {agent: agent for agent in agents}
+    events: list[tuple] = []
+    for _ in range(days):
+        event = generator.GetNewEvent(agents, 0.5, reputation)
+        events.append((event.event_type, event.resources, event.groups))
+    return events
+
+
+def test_saved_schedule_replays_the_same_events(tmp_path):
+    schedule = EventSchedule.generate(
+        ProbabilisticEventGenerator(0.7, 0.9, 0.8), 60, 50, RandomStream(1)
+    )
+    path = tmp_path / "schedule.npz"
+    schedule.save(str(path))
+    loaded = EventSchedule.load(str(path))
+
+    for name in EventSchedule.arrays:
+        assert np.array_equal(getattr(schedule, name), getattr(loaded, name))
+    assert play(ReplayEventGenerator(schedule), 60) == play(
+        ReplayEventGenerator(loaded), 60
+    )
+
+
+def test_replayed_simulations_are_identical(make_simulator, tmp_path):
+    schedule = EventSchedule.generate(
+        ProbabilisticEventGenerator(0.7, 0.9, 0.8), 100, 200, RandomStream(2)
+    )
+    path = tmp_path / "schedule.npz"
+    schedule.save(str(path))
+
+    first = make_simulator(4, event_generator=ReplayEventGenerator(schedule))
+    second = make_simulator(
+        4, event_generator=ReplayEventGenerator(EventSchedule.load(str(path)))
+    )
+    first.run(100)
+    second.run(100)
+    assert first.series.to_rows() == second.series.to_rows()
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from enviroment import ReputationArray
+from exclusion import HardThreshold, LogisticExclusion, exclude_from_groups
+from random_streams import RandomStream
+
+
+def loop_thief_control(groups, global_reputation, tolerated) -> list[list[int]]:
+    """
+    The thief control as it was, one agent at a time, with tolerated telling
+    whether each agent of the flattened groups is let play.
+    """
+    result: list[list[int]] = []
+    position: int = 0
+    for group in groups:
+        kept: list[int] = []
+        for agent in group:
+            if (
+                agent not in global_reputation
+                or global_reputation[agent] > 30
+                or tolerated[position]
+            ):
+                kept.append(agent)
+            position += 1
+        result.append(kept)
+    return result
+
+
+def random_case(rng: RandomStream):
+    agents: int = rng.randint(1, 60)
+    order = list(range(agents))
+    rng.shuffle(order)
+    groups: list[list[int]] = []
+    while order:
+        size: int = rng.randint(1, 6)
+        groups.append(order[:size])
+        order = order[size:]
+    reputation = {
+        agent: rng.randint(0, 100) for agent in range(agents) if rng.random() < 0.7
+    }
+    return groups, reputation
+
+
+@pytest.mark.parametrize("thief_toleration", [0, 0.3, 1])
+def test_hard_threshold_matches_the_loop(thief_toleration):
+    rng = RandomStream(1)
+    for _ in range(100):
+        groups, reputation = random_case(rng)
+        uniforms = rng.generator.random(sum(len(group) for group in groups))
+        expected = loop_thief_control(
+            groups, reputation, uniforms >= 1 - thief_toleration
+        )
+
+        array_reputation = ReputationArray(len(uniforms) + 5)
+        for agent, value in reputation.items():
+            array_reputation[agent] = value
+        for global_reputation in (reputation, array_reputation):
+            excluded = [list(group) for group in groups]
+            exclude_from_groups(
+                excluded, global_reputation, thief_toleration, HardThreshold(), uniforms
+            )
+            assert excluded == expected
+
+
+def test_logistic_exclusion_falls_with_reputation():
+    reputation = np.arange(0, 101, dtype=float)
+    known = np.ones(len(reputation), dtype=bool)
+    probability = LogisticExclusion().exclusion_probability(reputation, known, 0.2)
+    assert np.all(np.diff(probability) < 0)
+    assert np.all((probability > 0) & (probability < 0.8))
+    assert not LogisticExclusion().exclusion_probability(reputation, ~known, 0.2).any()
+
+
+def test_logistic_exclusion_does_not_overflow():
+    reputation = np.array([-1e6, -500, 0, 30, 500, 1e6])
+    known = np.ones(len(reputation), dtype=bool)
+    with np.errstate(all="raise"):
+        probability = LogisticExclusion().exclusion_probability(reputation, known, 0)
+    assert np.all(np.isfinite(probability))
+    assert probability[0] == 1 and probability[-1] == 0
+    assert probability[3] == pytest.approx(0.5)
+
+    moderate = np.linspace(-50, 150, 41)
+    assert LogisticExclusion().exclusion_probability(
+        moderate, np.ones(len(moderate), dtype=bool), 0
+    ) == pytest.approx(1 / (1 + np.exp(0.2 * (moderate - 30))))
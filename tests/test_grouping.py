@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from grouping import PoissonGrouping, TrustGrouping
+from random_streams import RandomStream
+from trust import TrustMatrix
+
+
+def alive_agents(rng: RandomStream) -> list[int]:
+    # Ids con huecos, como tras la muerte de algunos agentes
+    return [agent for agent in range(rng.randint(0, 80)) if rng.random() < 0.8]
+
+
+def assert_partition(groups: list[list[int]], agents: list[int]) -> None:
+    members = [agent for group in groups for agent in group]
+    assert sorted(members) == sorted(agents)
+
+
+@pytest.mark.parametrize(
+    "grouping",
+    [
+        PoissonGrouping(),
+        PoissonGrouping(lam=0.5),
+        PoissonGrouping(lam=3, min_size=2, max_size=4),
+        PoissonGrouping(lam=20, max_size=6),
+    ],
+)
+def test_poisson_grouping_partitions_the_agents(grouping):
+    rng = RandomStream(1)
+    for _ in range(200):
+        agents = alive_agents(rng)
+        groups = grouping.select(agents, rng)
+
+        assert_partition(groups, agents)
+        assert all(len(group) >= 1 for group in groups)
+        if grouping.max_size is not None:
+            assert all(len(group) <= grouping.max_size for group in groups)
+        # Solo el último grupo puede quedar por debajo de min_size
+        assert all(len(group) >= grouping.min_size for group in groups[:-1])
+
+
+def test_poisson_offsets_cover_the_count():
+    rng = RandomStream(2)
+    grouping = PoissonGrouping(lam=4, max_size=5)
+    for count in range(0, 100):
+        cuts = grouping.offsets(count, rng)
+        assert cuts[0] == 0 and cuts[-1] == count
+        assert np.all(np.diff(cuts) >= 1)
+        assert np.all(np.diff(cuts) <= 5)
+
+
+def test_poisson_grouping_rejects_invalid_sizes():
+    with pytest.raises(ValueError):
+        PoissonGrouping(min_size=0)
+    with pytest.raises(ValueError):
+        PoissonGrouping(min_size=3, max_size=2)
+
+
+def random_trust(rng: RandomStream, size: int = 80) -> TrustMatrix:
+    matrix = TrustMatrix(size)
+    matrix.values[:size, :size] = rng.generator.uniform(0, 100, (size, size))
+    return matrix
+
+
+@pytest.mark.parametrize("trust_scale", [50, 100, 1000])
+def test_trust_grouping_partitions_the_agents(trust_scale):
+    rng = RandomStream(3)
+    matrix = random_trust(rng)
+    grouping = TrustGrouping(trust_scale=trust_scale)
+    for _ in range(200):
+        agents = alive_agents(rng)
+        groups = grouping.select(agents, matrix, rng)
+
+        assert_partition(groups, agents)
+        assert all(len(group) >= 1 for group in groups)
+
+
+def test_trust_grouping_invites_at_most_the_invited_agents():
+    rng = RandomStream(4)
+    matrix = random_trust(rng)
+    grouping = TrustGrouping(trust_scale=60)
+    for _ in range(500):
+        free = rng.generator.random(80) < rng.random()
+        seed: int = rng.randint(0, 79)
+        free[seed] = False
+        invited: int = rng.randint(1, 10)
+        joined = grouping.invite(seed, invited, free, matrix, rng)
+
+        assert len(joined) <= invited
+        assert len(set(joined)) == len(joined)
+        assert all(free[agent] for agent in joined)
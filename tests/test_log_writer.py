@@ -0,0 +1,46 @@
+import re
+
+from event_log import LoggedEvent
+from log_writer import LogWriter, format_event, read_binary_log
+from random_streams import RandomStream
+from test_event_log import as_tuple, random_day
+
+
+def test_repeated_runs_continue_the_log(make_simulator, tmp_path):
+    text_path = tmp_path / "log.txt"
+    binary_path = tmp_path / "log.bin"
+    sim = make_simulator(1, log_path=str(text_path), binary_log_path=str(binary_path))
+    sim.run(5)
+    sim.run(5)
+    sim.close()
+
+    text_days = [
+        int(day)
+        for day in re.findall(
+            r"^Day: (\d+)$", text_path.read_text(encoding="ISO-8859-1"), re.M
+        )
+    ]
+    assert text_days == list(range(1, 11))
+    assert [event.day for event in read_binary_log(str(binary_path))] == list(
+        range(1, 11)
+    )
+
+
+def test_binary_log_round_trip(tmp_path):
+    rng = RandomStream(1)
+    events = [LoggedEvent(*random_day(rng, day)) for day in range(1, 101)]
+    for event in events:
+        event.decisions = event.decisions or {}
+    text_path = tmp_path / "log.txt"
+    binary_path = tmp_path / "log.bin"
+    # buffer_days pequeño para que el log se escriba en varios tramos
+    with LogWriter(str(text_path), str(binary_path), buffer_days=7) as writer:
+        for event in events:
+            writer.write_event(event, str)
+
+    assert [as_tuple(event) for event in read_binary_log(str(binary_path))] == [
+        as_tuple(event) for event in events
+    ]
+    assert text_path.read_text(encoding="ISO-8859-1") == "".join(
+        format_event(event, str) for event in events
+    )
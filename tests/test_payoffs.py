@@ -0,0 +1,56 @@
+from random_streams import RandomStream
+from utils import (
+    Action,
+    batch_group_prisioners_game,
+    group_prisioners_game,
+    negative_prisioners_game,
+    prisioners_game,
+)
+
+
+def pairwise_group_game(desitions: list[Action], resources: int) -> list[int]:
+    """
+    The group game as it was played before the payoff tables, every ordered
+    pair of members at a time.
+    """
+    if len(desitions) == 1:
+        if resources > 0:
+            return [resources // (10 / 8)]
+        return [resources // (15 / 7)]
+
+    game = prisioners_game if resources > 0 else negative_prisioners_game
+    points: list[int] = [
+        sum(
+            game(desition, other)
+            for position, other in enumerate(desitions)
+            if position != index
+        )
+        for index, desition in enumerate(desitions)
+    ]
+    total: int = len(desitions) * (10 if resources > 0 else -15) * (len(desitions) - 1)
+    return [resources * point // total for point in points]
+
+
+def random_groups(rng: RandomStream, count: int) -> tuple[list, list]:
+    groups = [
+        [rng.choice(list(Action)) for _ in range(rng.randint(0, 12))]
+        for _ in range(count)
+    ]
+    resources = [rng.randint(-60, 300) * len(group) for group in groups]
+    return groups, resources
+
+
+def test_group_game_matches_the_pairwise_game():
+    groups, resources = random_groups(RandomStream(1), 500)
+    for desitions, group_resources in zip(groups, resources):
+        assert group_prisioners_game(desitions, group_resources) == pairwise_group_game(
+            desitions, group_resources
+        )
+
+
+def test_batched_game_matches_the_pairwise_game():
+    groups, resources = random_groups(RandomStream(2), 500)
+    assert batch_group_prisioners_game(groups, resources) == [
+        pairwise_group_game(desitions, group_resources)
+        for desitions, group_resources in zip(groups, resources)
+    ]
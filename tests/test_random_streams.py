@@ -0,0 +1,17 @@
+from event_generator import ProbabilisticEventGenerator
+from random_streams import RandomStream, default_stream
+
+
+def test_simulator_keeps_the_stream_of_its_event_generator(make_simulator):
+    stream = RandomStream(5)
+    sim = make_simulator(
+        1, event_generator=ProbabilisticEventGenerator(0.7, 0.9, 0.8, rng=stream)
+    )
+    assert sim.event_generator.rng is stream
+
+    seeded = make_simulator(1)
+    assert seeded.event_generator.rng is not default_stream
+    again = make_simulator(1)
+    seeded.run(30)
+    again.run(30)
+    assert seeded.series.to_rows() == again.series.to_rows()
@@ -0,0 +1,135 @@
+from agents.agent import Search
+from random_streams import RandomStream
+from utils import Action, group_prisioners_game, joining_payoffs
+
+
+class RecursiveSearch(Search):
+    """
+    The search as it was written first: every node copies the reputation
+    and the alive agents and expands its three branches recursively.
+    """
+
+    def best_play(self, resources, deep, reputation, agents_alive):
+        if deep == 0:
+            return resources, Action.COOP
+
+        copy_reputation: dict[int, int] = reputation.copy()
+        copy_agents_alive: list[int] = agents_alive.copy()
+        group: list[int] = self.select_group(copy_agents_alive)
+
+        desitions = []
+        for agent in group:
+            if agent not in copy_reputation:
+                desitions.append(Action.COOP)
+                copy_reputation[agent] = 50
+            elif copy_reputation[agent] > 55:
+                desitions.append(Action.COOP)
+                copy_reputation[agent] += 10
+            elif copy_reputation[agent] < 40:
+                desitions.append(Action.EXPLOIT)
+                copy_reputation[agent] -= 30
+            else:
+                desitions.append(Action.INACT)
+                copy_reputation[agent] += 3
+
+        event_resources: int = self.rng.randint(-100, 300) * len(desitions)
+
+        results = []
+        for action in (Action.COOP, Action.INACT, Action.EXPLOIT):
+            desitions.append(action)
+            my_resources = (
+                resources + group_prisioners_game(desitions, event_resources)[-1]
+            )
+            results.append(
+                self.best_play(
+                    my_resources, deep - 1, copy_reputation, copy_agents_alive
+                )[0]
+            )
+            desitions.pop()
+        coop_reosurce, inact_reosurce, exploit_reosurce = results
+
+        if coop_reosurce > inact_reosurce and coop_reosurce > exploit_reosurce:
+            return coop_reosurce, Action.COOP
+        elif inact_reosurce > exploit_reosurce:
+            return inact_reosurce, Action.INACT
+        else:
+            return exploit_reosurce, Action.EXPLOIT
+
+
+class ShuffledRecursiveSearch(RecursiveSearch):
+    """
+    RecursiveSearch drawing the groups by shuffling a copy of the alive
+    agents, as the first version did.
+    """
+
+    def select_group(self, agents_alive):
+        agents: list[int] = agents_alive.copy()
+        self.rng.shuffle(agents)
+        rand: int = self.rng.poisson(5)
+        start: int = self.rng.randint(0, len(agents))
+        end: int = min(start + rand, len(agents))
+        return agents[start:end]
+
+
+def random_beliefs(rng: RandomStream) -> dict:
+    agents_alive: list[int] = list(range(rng.randint(1, 40)))
+    return {
+        "resources": rng.randint(0, 600),
+        "trust": {
+            agent: rng.randint(0, 100) for agent in agents_alive if rng.random() < 0.8
+        },
+        "agents_alive": agents_alive,
+    }
+
+
+def decision_counts(search_class, states: int = 300) -> dict[Action, int]:
+    rng = RandomStream(1)
+    counts: dict[Action, int] = dict.fromkeys(Action, 0)
+    for seed in range(states):
+        beliefs = random_beliefs(rng)
+        counts[search_class(rng=RandomStream(seed)).decide(beliefs, None)] += 1
+    return counts
+
+
+def test_same_decisions_as_the_recursive_search():
+    rng = RandomStream(2)
+    for seed in range(300):
+        beliefs = random_beliefs(rng)
+        depth: int = rng.randint(1, 5)
+        resources, action = Search(depth, rng=RandomStream(seed)).best_play(
+            beliefs["resources"], depth, beliefs["trust"], beliefs["agents_alive"]
+        )
+        assert (resources, action) == RecursiveSearch(
+            depth, rng=RandomStream(seed)
+        ).best_play(
+            beliefs["resources"], depth, beliefs["trust"], beliefs["agents_alive"]
+        )
+
+
+def test_decisions_follow_the_shuffled_search():
+    # Muestrear el grupo sin barajar cambia los números aleatorios, pero no
+    # la distribución de las decisiones
+    sampled = decision_counts(Search)
+    shuffled = decision_counts(ShuffledRecursiveSearch)
+    assert all(abs(sampled[action] - shuffled[action]) <= 30 for action in Action)
+
+
+def test_depth_changes_decisions():
+    beliefs = {"resources": 0, "trust": {}, "agents_alive": list(range(20))}
+    differ: int = 0
+    for seed in range(50):
+        shallow = Search(depth=1, rng=RandomStream(seed)).decide(beliefs, None)
+        deep = Search(depth=5, rng=RandomStream(seed)).decide(beliefs, None)
+        differ += shallow != deep
+    assert differ > 0
+
+
+def test_joining_payoffs_match_the_group_game():
+    rng = RandomStream(3)
+    for _ in range(200):
+        desitions = [rng.choice(list(Action)) for _ in range(rng.randint(0, 8))]
+        resources = rng.randint(-100, 300) * max(len(desitions), 1)
+        assert joining_payoffs(desitions, resources) == [
+            group_prisioners_game(desitions + [action], resources)[-1]
+            for action in Action
+        ]
@@ -0,0 +1,65 @@
+import numpy as np
+
+from random_streams import RandomStream
+from trust import TRUST_DELTAS, TrustMatrix
+from utils import Action
+
+
+def test_released_slots_are_reused():
+    matrix = TrustMatrix(4)
+    matrix.update_group([0, 1, 2, 3], [Action.EXPLOIT] * 4)
+    released = matrix.slots[[1, 2]].tolist()
+    matrix.release([1, 2])
+    matrix.add_agents(2)
+
+    assert matrix.used_slots == 4
+    assert sorted(matrix.slots[4:6].tolist()) == sorted(released)
+    assert matrix.slots[1] == matrix.slots[2] == -1
+    # Los recién nacidos no heredan la confianza de los muertos
+    for newborn in (4, 5):
+        assert matrix.row(newborn, [0, 3, 4, 5]).tolist() == [50.0] * 4
+        assert matrix[0][newborn] == 50.0
+
+
+def test_matches_a_dictionary_of_trust():
+    rng = RandomStream(1)
+    matrix = TrustMatrix(10)
+    alive: list[int] = list(range(10))
+    trust: dict[tuple[int, int], float] = {}
+    peak: int = len(alive)
+    for _ in range(300):
+        operation = rng.random()
+        if operation < 0.2 and len(alive) > 4:
+            dead = rng.sample(alive, 2)
+            matrix.release(dead)
+            alive = [agent for agent in alive if agent not in dead]
+            trust = {
+                pair: value
+                for pair, value in trust.items()
+                if pair[0] not in dead and pair[1] not in dead
+            }
+        elif operation < 0.4:
+            born: int = rng.randint(1, 3)
+            alive.extend(range(len(matrix), len(matrix) + born))
+            matrix.add_agents(born)
+            peak = max(peak, len(alive))
+        else:
+            group = rng.sample(alive, min(len(alive), rng.randint(2, 6)))
+            actions = [rng.choice(list(Action)) for _ in group]
+            matrix.update_group(group, actions)
+            for agent in group:
+                for other, action in zip(group, actions):
+                    if other != agent:
+                        trust[agent, other] = (
+                            trust.get((agent, other), 50) + TRUST_DELTAS[action.value]
+                        )
+
+    # Con los slots reutilizados la matriz crece con la población viva
+    assert matrix.used_slots == peak
+    for agent in alive:
+        expected = [trust.get((agent, other), 50) for other in alive]
+        assert np.array_equal(matrix.row(agent, alive), expected)
+    assert np.array_equal(
+        matrix.block(alive, alive),
+        [[trust.get((agent, other), 50) for other in alive] for agent in alive],
+    )
@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"array_state": True}, {"compaction_interval": 7}]
+)
+def test_totals_match_a_recount(make_simulator, options):
+    sim = make_simulator(3, **options)
+    enviroment = sim.enviroment
+    for _ in range(150):
+        sim.run(1)
+        counts: dict[str, int] = {}
+        resources: dict[str, int] = {}
+        for agent in enviroment.agents_alive:
+            name: str = type(enviroment.agents[agent]).__name__
+            counts[name] = counts.get(name, 0) + 1
+            resources[name] = (
+                resources.get(name, 0) + enviroment.public_resources[agent]
+            )
+
+        totals = enviroment.type_totals
+        assert totals.counts_by_type() == counts
+        assert totals.resources_by_type() == resources
+        assert totals.population == len(enviroment.agents_alive)
+        assert totals.total_resources == sum(resources.values())